@@ -22,16 +22,21 @@ class PoseBreakdownOperator(bpy.types.Operator):
             if not selected_bones:
                 self.report({'WARNING'}, "No bones selected.")
                 return {'CANCELLED'}
+
+            # Index fcurve per bone dari save_anm.py (lewat driver_namespace)
+            bone_fcurves = bpy.app.driver_namespace.get("raha_bone_fcurves")
+            if bone_fcurves is None:
+                self.report({'WARNING'}, "Fcurve index not found, run save_anm.py first.")
+                return {'CANCELLED'}
             
             # Hapus keyframe pada current frame untuk bone yang diseleksi
             for bone in selected_bones:
                 bone_name = bone.name
-                for fcurve in action.fcurves:
-                    if fcurve.data_path.startswith(f'pose.bones["{bone_name}"].'):
-                        for kp in fcurve.keyframe_points:
-                            if kp.co.x == current_frame:
-                                fcurve.keyframe_points.remove(kp)
-                                break  # Keluar setelah menemukan keyframe yang sesuai
+                for fcurve in bone_fcurves(action, bone_name, True):
+                    for kp in fcurve.keyframe_points:
+                        if kp.co.x == current_frame:
+                            fcurve.keyframe_points.remove(kp)
+                            break  # Keluar setelah menemukan keyframe yang sesuai
             
             # Perbarui tampilan agar perubahan terlihat
             bpy.context.scene.frame_set(current_frame)
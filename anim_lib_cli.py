@@ -0,0 +1,284 @@
+import bpy
+import os
+import sys
+import json
+import time
+import runpy
+import fnmatch
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+#============================ CLI Animation Library (headless) ============================
+# Contoh pemakaian:
+#   blender -b shot010.blend --python anim_lib_cli.py -- export --armature RIG --bones "hand.*" --start 1 --end 120 --clip //library/wave
+#   blender -b shot020.blend --python anim_lib_cli.py -- import --armature RIG --clip D:/library/wave --frame 1001 --save
+#   blender -b --python anim_lib_cli.py -- manifest shots.json --jobs 8
+#   blender -b --python anim_lib_cli.py -- dedupe-report D:/library --output dedupe.json
+#   blender -b --python anim_lib_cli.py -- store D:/library      (lalu: gc D:/library, checkout D:/library)
+#   blender -b rig.blend --python anim_lib_cli.py -- thumbnails D:/poses --armature RIG
+#
+# Manifest berisi list shot, setiap shot: {"blend": ..., "command": "export"/"import", ...argumen lain}.
+# Saat dijalankan oleh loader add-on (bukan background, tanpa "--") script ini tidak melakukan apa-apa.
+
+SCRIPT_PATH = os.path.abspath(__file__)
+
+
+def load_anim_lib():
+    # save_anm.py dijalankan sebagai modul biasa (bukan __main__) agar tidak register ulang
+    return runpy.run_path(os.path.join(os.path.dirname(SCRIPT_PATH), "save_anm.py"), run_name="save_anm")
+
+
+def match_bones(armature_obj, patterns):
+    names = [bone.name for bone in armature_obj.pose.bones]
+    if not patterns:
+        return names
+    patterns = [p.strip() for p in patterns.split(",") if p.strip()]
+    return [name for name in names if any(fnmatch.fnmatchcase(name, p) for p in patterns)]
+
+
+def get_armature(name):
+    obj = bpy.data.objects.get(name)
+    if obj is None or obj.type != 'ARMATURE':
+        raise SystemExit(f"Armature '{name}' tidak ditemukan.")
+    return obj
+
+
+def clip_paths(clip):
+    clip = bpy.path.abspath(clip)
+    base_folder = os.path.dirname(clip)
+    file_name = os.path.splitext(os.path.basename(clip))[0]
+    return base_folder, file_name
+
+
+def cmd_export(args):
+    # Export lewat fungsi yang sama dengan tombol Export di UI: hash inkremental, format klip,
+    # sidecar dan preview (di proses Blender terpisah) identik dengan hasil dari UI
+    lib = load_anim_lib()
+    armature_obj = get_armature(args.armature)
+    bone_names = set(match_bones(armature_obj, args.bones))
+    if not bone_names:
+        print(f"[ERROR] Tidak ada bone yang cocok: {args.bones}")
+        return 1
+
+    scene = bpy.context.scene
+    preview = not args.no_preview
+    if preview and scene.camera is None:
+        print("[WARNING] Scene tidak punya kamera, preview dilewati.")
+        preview = False
+
+    # Seleksi bone, rentang frame dan mode preview diubah sementara lalu dikembalikan
+    selection = {bone.name: bone.bone.select for bone in armature_obj.pose.bones}
+    settings = {name: getattr(scene, name) for name in
+                ("use_custom_frame_range", "custom_start_frame", "custom_end_frame", "anim_preview_background")}
+    active = bpy.context.view_layer.objects.active
+    try:
+        bpy.context.view_layer.objects.active = armature_obj
+        for bone in armature_obj.pose.bones:
+            bone.bone.select = bone.name in bone_names
+        if args.start is not None or args.end is not None:
+            scene.use_custom_frame_range = True
+            scene.custom_start_frame = args.start if args.start is not None else scene.frame_start
+            scene.custom_end_frame = args.end if args.end is not None else scene.frame_end
+        else:
+            scene.use_custom_frame_range = False
+        # OpenGL playblast tidak tersedia di "blender -b": preview selalu lewat proses render terpisah
+        scene.anim_preview_background = True
+
+        result = lib["export_bone_keyframe_data"](bpy.context, bpy.path.abspath(args.clip),
+                                                   clip_format=args.format, preview=preview)
+    finally:
+        for name, value in settings.items():
+            setattr(scene, name, value)
+        for bone in armature_obj.pose.bones:
+            bone.bone.select = selection[bone.name]
+        bpy.context.view_layer.objects.active = active
+
+    if result != {'FINISHED'}:
+        print(f"[ERROR] Tidak ada kurva untuk bone: {args.bones or '*'}")
+        return 1
+    base_folder, file_name = clip_paths(args.clip)
+    print(f"[INFO] Klip {file_name} ({args.format}) ditulis ke {os.path.join(base_folder, 'ANIM_DATA')}")
+
+    # Tidak ada event loop di background: tunggu job preview sampai selesai
+    while preview and lib["poll_preview_jobs"]() is not None:
+        time.sleep(0.5)
+    return 0
+
+
+def cmd_import(args):
+    lib = load_anim_lib()
+    armature_obj = get_armature(args.armature)
+    bone_names = match_bones(armature_obj, args.bones)
+
+    base_folder, file_name = clip_paths(args.clip)
+    anim_data_folder = os.path.join(base_folder, "ANIM_DATA")
+    clip_path = os.path.join(anim_data_folder, f"{file_name}{lib['ANM_EXT']}")
+    if os.path.exists(clip_path):
+        header, curves = lib["read_anim_clip"](clip_path, bone_names)
+    elif os.path.exists(os.path.join(anim_data_folder, f"{file_name}.py")):
+        header, curves = lib["read_bone_keyframe_script"](os.path.join(anim_data_folder, f"{file_name}.py"))
+    else:
+        print(f"[ERROR] Klip {file_name} tidak ditemukan di {anim_data_folder}")
+        return 1
+
+    frame = args.frame if args.frame is not None else bpy.context.scene.frame_current
+    applied = lib["apply_anim_clip"](armature_obj, header, curves, bone_names, frame)
+    print(f"[INFO] {applied} kurva diimpor dari {file_name}")
+
+    if args.output:
+        bpy.ops.wm.save_as_mainfile(filepath=bpy.path.abspath(args.output))
+    elif args.save:
+        bpy.ops.wm.save_mainfile()
+    return 0
+
+
+def load_store_lib():
+    return runpy.run_path(os.path.join(os.path.dirname(SCRIPT_PATH), "library_store.py"), run_name="library_store")
+
+
+def cmd_store(args):
+    # store / checkout / dedupe-report / gc untuk store deduplikasi (library_store.py)
+    store = load_store_lib()
+    library = bpy.path.abspath(args.library)
+    if not os.path.isdir(library):
+        print(f"[ERROR] Folder library tidak ditemukan: {library}")
+        return 1
+    action = {
+        "store": store["store_library"],
+        "checkout": store["checkout_library"],
+        "dedupe-report": store["dedupe_report"],
+        "gc": store["gc_store"],
+    }[args.command]
+    result = action(library)
+    output = json.dumps(result, indent=2)
+    if getattr(args, "output", None):
+        with open(args.output, 'w') as file:
+            file.write(output)
+    else:
+        print(output)
+    return 0
+
+
+def load_pose_lib():
+    return runpy.run_path(os.path.join(os.path.dirname(SCRIPT_PATH), "library_pose.py"), run_name="library_pose")
+
+
+def cmd_thumbnails(args):
+    # Render ulang thumbnail pose (Workbench, dari kamera scene) yang pose atau rig-nya berubah
+    pose_lib = load_pose_lib()
+    armature_obj = get_armature(args.armature)
+    library = bpy.path.abspath(args.library)
+    if not os.path.isdir(library):
+        print(f"[ERROR] Folder library tidak ditemukan: {library}")
+        return 1
+    if bpy.context.scene.camera is None:
+        print("[ERROR] Scene tidak punya kamera untuk render thumbnail.")
+        return 1
+    result = pose_lib["regenerate_pose_thumbnails"](
+        bpy.context, armature_obj, library, args.size, args.force,
+        lambda done, total: print(f"[INFO] {done}/{total}", file=sys.stderr))
+    for name, error in result["failed"].items():
+        print(f"[ERROR] {name}: {error}")
+    print(f"[INFO] {len(result['rendered'])} thumbnail dirender, {result['skipped']} masih sesuai, "
+          f"{len(result['failed'])} gagal.")
+    return 1 if result["failed"] else 0
+
+
+def shot_command(shot):
+    # Ubah satu entry manifest menjadi baris perintah "blender -b ... -- <command> ..."
+    command = [bpy.app.binary_path, "-b"]
+    if shot.get("blend"):
+        command.append(shot["blend"])
+    command += ["--python", SCRIPT_PATH, "--", shot["command"]]
+    for key, value in shot.items():
+        if key in ("blend", "command") or value is None or value is False:
+            continue
+        option = "--" + key.replace("_", "-")
+        command += [option] if value is True else [option, str(value)]
+    return command
+
+
+def run_shot(shot):
+    result = subprocess.run(shot_command(shot), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return shot, result.returncode, result.stdout
+
+
+def cmd_manifest(args):
+    with open(args.manifest, 'r') as file:
+        shots = json.load(file)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    failed = 0
+    # Satu proses Blender per shot, paralel sebanyak jumlah core
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for shot, returncode, output in pool.map(run_shot, shots):
+            label = f"{shot.get('blend', '-')} {shot['command']} {shot.get('clip', '')}"
+            if returncode == 0:
+                print(f"[OK] {label}")
+            else:
+                failed += 1
+                print(f"[FAILED {returncode}] {label}\n{output}")
+
+    print(f"[INFO] {len(shots) - failed}/{len(shots)} shot berhasil.")
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="anim_lib_cli", description="Headless export/import Animation Library")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Export klip dari file .blend yang dibuka")
+    export.add_argument("--armature", required=True)
+    export.add_argument("--bones", default="", help="Pola nama bone dipisah koma (fnmatch), kosong = semua")
+    export.add_argument("--start", type=int)
+    export.add_argument("--end", type=int)
+    export.add_argument("--clip", required=True, help="Path library + nama klip, mis. D:/lib/walk")
+    export.add_argument("--format", choices=("BINARY", "SCRIPT"), default="BINARY",
+                        help="Format klip di ANIM_DATA (default: BINARY, .anm)")
+    export.add_argument("--no-preview", action="store_true")
+    export.set_defaults(func=cmd_export)
+
+    imp = commands.add_parser("import", help="Import klip ke armature di file .blend yang dibuka")
+    imp.add_argument("--armature", required=True)
+    imp.add_argument("--bones", default="")
+    imp.add_argument("--clip", required=True)
+    imp.add_argument("--frame", type=int, help="Frame tujuan frame pertama klip (default: frame sekarang)")
+    imp.add_argument("--save", action="store_true", help="Simpan file .blend setelah import")
+    imp.add_argument("--output", help="Simpan sebagai file .blend baru")
+    imp.set_defaults(func=cmd_import)
+
+    manifest = commands.add_parser("manifest", help="Proses daftar shot dari file JSON secara paralel")
+    manifest.add_argument("manifest")
+    manifest.add_argument("--jobs", type=int, help="Jumlah proses paralel (default: jumlah core CPU)")
+    manifest.set_defaults(func=cmd_manifest)
+
+    thumbnails = commands.add_parser("thumbnails", help="Render ulang thumbnail pose yang pose atau rig-nya berubah")
+    thumbnails.add_argument("library", help="Folder library pose")
+    thumbnails.add_argument("--armature", required=True)
+    thumbnails.add_argument("--size", type=int, default=256, help="Ukuran thumbnail persegi (piksel)")
+    thumbnails.add_argument("--force", action="store_true", help="Render semua pose, juga yang masih sesuai")
+    thumbnails.set_defaults(func=cmd_thumbnails)
+
+    store_help = {
+        "store": "Masukkan file library ke .store dan link file yang isinya sama ke satu blob",
+        "checkout": "Buat ulang entry dari .store/refs.json (setelah sync .store ke site lain)",
+        "dedupe-report": "Laporan duplikat dan ukuran library (tidak mengubah file)",
+        "gc": "Hapus blob di .store yang tidak dipakai entry mana pun",
+    }
+    for name, help_text in store_help.items():
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("library", help="Folder library")
+        if name == "dedupe-report":
+            command.add_argument("--output", help="File JSON hasil (default: stdout)")
+        command.set_defaults(func=cmd_store)
+    return parser
+
+
+def main(argv):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__" and bpy.app.background and "--" in sys.argv:
+    sys.exit(main(sys.argv[sys.argv.index("--") + 1:]))
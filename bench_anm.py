@@ -0,0 +1,178 @@
+import bpy
+import os
+import sys
+import json
+import time
+import runpy
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from array import array
+from types import SimpleNamespace
+
+#============================ Benchmark save / import animation ============================
+# Contoh:
+#   blender -b --factory-startup --python bench_anm.py -- --bones 50,200,1000 --frames 2000 --output bench.json
+#
+# Untuk setiap kombinasi jumlah bone x format, script membuat armature prosedural, mengisi
+# fcurve acak, lalu mengukur insert_missing_keyframes, export_bone_keyframe_data dan
+# import_bone_keyframe_data: waktu (detik), puncak memori Python (tracemalloc) dan ukuran file.
+# Tidak melakukan apa-apa saat dijalankan oleh loader add-on (bukan background, tanpa "--").
+
+SCRIPT_PATH = os.path.abspath(__file__)
+
+# (data_path, jumlah sumbu) yang dianimasikan per bone
+BENCH_CHANNELS = (("location", 3), ("rotation_quaternion", 4), ("scale", 3))
+
+
+def load_anim_lib():
+    return runpy.run_path(os.path.join(os.path.dirname(SCRIPT_PATH), "save_anm.py"), run_name="save_anm")
+
+
+def build_rig(name, bone_count):
+    armature = bpy.data.armatures.new(name)
+    obj = bpy.data.objects.new(name, armature)
+    bpy.context.scene.collection.objects.link(obj)
+    bpy.context.view_layer.objects.active = obj
+
+    bpy.ops.object.mode_set(mode='EDIT')
+    for i in range(bone_count):
+        edit_bone = armature.edit_bones.new(f"bone.{i:04d}")
+        edit_bone.head = (i * 0.1, 0.0, 0.0)
+        edit_bone.tail = (i * 0.1, 0.0, 0.5)
+    bpy.ops.object.mode_set(mode='POSE')
+
+    for pose_bone in obj.pose.bones:
+        pose_bone.rotation_mode = 'QUATERNION'
+        pose_bone.bone.select = True
+    return obj
+
+
+def animate_rig(obj, frames, key_step, density, seed):
+    """Isi action acak; density < 1 membuat sebagian sumbu tidak di-key (untuk insert_missing)."""
+    rng = random.Random(seed)
+    action = bpy.data.actions.new(f"{obj.name}Action")
+    obj.animation_data_create()
+    obj.animation_data.action = action
+
+    key_frames = range(1, frames + 1, key_step)
+    key_count = 0
+    for pose_bone in obj.pose.bones:
+        for prop, size in BENCH_CHANNELS:
+            data_path = f'pose.bones["{pose_bone.name}"].{prop}'
+            for index in range(size):
+                if index and rng.random() > density:
+                    continue
+                co = array("f")
+                for frame in key_frames:
+                    co.extend((frame, rng.uniform(-1.0, 1.0)))
+                fcurve = action.fcurves.new(data_path, index=index, action_group=pose_bone.name)
+                fcurve.keyframe_points.add(len(key_frames))
+                fcurve.keyframe_points.foreach_set("co", co)
+                fcurve.update()
+                key_count += len(key_frames)
+    return len(action.fcurves), key_count
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    wall = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {"wall_s": round(wall, 4), "peak_kb": round(peak / 1024, 1)}
+
+
+def remove_rig(obj):
+    action = obj.animation_data.action if obj.animation_data else None
+    armature = obj.data
+    bpy.data.objects.remove(obj)
+    if action is not None:
+        bpy.data.actions.remove(action)
+    if armature.users == 0:
+        bpy.data.armatures.remove(armature)
+
+
+def run_case(lib, library, bone_count, clip_format, args):
+    if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    scene = bpy.context.scene
+    scene.use_custom_frame_range = False
+
+    source = build_rig(f"Bench{bone_count}", bone_count)
+    fcurve_count, key_count = animate_rig(source, args.frames, args.key_step, args.density, args.seed)
+    case = {
+        "bones": bone_count,
+        "frames": args.frames,
+        "key_step": args.key_step,
+        "density": args.density,
+        "format": clip_format,
+        "fcurves": fcurve_count,
+        "keys": key_count,
+    }
+
+    _result, case["insert_missing_keyframes"] = measure(lib["insert_missing_keyframes"])
+
+    clip_name = f"bench_{bone_count}_{clip_format.lower()}"
+    context = SimpleNamespace(object=source, scene=scene, selected_pose_bones=list(source.pose.bones))
+    _result, case["export_bone_keyframe_data"] = measure(
+        lib["export_bone_keyframe_data"], context, os.path.join(library, f"{clip_name}.png"), clip_format, False)
+    ext = lib["ANM_EXT"] if clip_format == 'BINARY' else ".py"
+    case["export_bone_keyframe_data"]["file_bytes"] = os.path.getsize(os.path.join(library, "ANIM_DATA", clip_name + ext))
+
+    # Import ke salinan armature tanpa animasi
+    bpy.ops.object.mode_set(mode='OBJECT')
+    target = source.copy()
+    target.animation_data_clear()
+    scene.collection.objects.link(target)
+    bpy.context.view_layer.objects.active = target
+    bpy.ops.object.mode_set(mode='POSE')
+    context = SimpleNamespace(object=target, scene=scene, selected_pose_bones=list(target.pose.bones))
+    _result, case["import_bone_keyframe_data"] = measure(
+        lib["import_bone_keyframe_data"], context, os.path.join(library, f"{clip_name}.png"))
+
+    bpy.ops.object.mode_set(mode='OBJECT')
+    remove_rig(target)
+    remove_rig(source)
+    return case
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="bench_anm", description="Benchmark save/import animation")
+    parser.add_argument("--bones", default="50,200,1000", help="Daftar jumlah bone dipisah koma")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--key-step", type=int, default=1, help="Jarak antar key (1 = key tiap frame)")
+    parser.add_argument("--density", type=float, default=0.8, help="Peluang sumbu selain yang pertama di-key")
+    parser.add_argument("--formats", default="BINARY,SCRIPT")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="File JSON hasil (default: stdout)")
+    args = parser.parse_args(argv)
+
+    lib = load_anim_lib()
+    library = tempfile.mkdtemp(prefix="raha_bench_")
+    report = {"blender": bpy.app.version_string, "cases": []}
+    try:
+        for bone_count in (int(n) for n in args.bones.split(",")):
+            for clip_format in (f.strip().upper() for f in args.formats.split(",")):
+                case = run_case(lib, library, bone_count, clip_format, args)
+                report["cases"].append(case)
+                print(f"[INFO] {bone_count} bone, {clip_format}: "
+                      f"export {case['export_bone_keyframe_data']['wall_s']} s, "
+                      f"import {case['import_bone_keyframe_data']['wall_s']} s", file=sys.stderr)
+    finally:
+        shutil.rmtree(library, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__" and bpy.app.background and "--" in sys.argv:
+    sys.exit(main(sys.argv[sys.argv.index("--") + 1:]))
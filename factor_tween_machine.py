@@ -3,29 +3,27 @@
 import bpy
 
 
-def apply_pose_breakdowner(context, factor):
+def apply_pose_breakdowner(context, factor, bone_fcurves):
     obj = context.object
     if obj and obj.type == 'ARMATURE' and obj.mode == 'POSE':
         for bone in context.selected_pose_bones:
             action = obj.animation_data.action
             if action:
-                fcurves = action.fcurves
-                for fcurve in fcurves:
-                    if fcurve.data_path.startswith(f'pose.bones["{bone.name}"]'):
-                        prev_key, next_key = None, None
-                        for keyframe in fcurve.keyframe_points:
-                            if keyframe.co[0] < context.scene.frame_current:
-                                prev_key = keyframe
-                            elif keyframe.co[0] > context.scene.frame_current:
-                                next_key = keyframe
-                                break
-
-                        if prev_key and next_key:
-                            prev_value = prev_key.co[1]
-                            next_value = next_key.co[1]
-                            new_value = (1 - factor) * prev_value + factor * next_value
-                            fcurve.keyframe_points.insert(context.scene.frame_current, new_value, options={'FAST'})
-                            fcurve.update()
+                for fcurve in bone_fcurves(action, bone.name):
+                    prev_key, next_key = None, None
+                    for keyframe in fcurve.keyframe_points:
+                        if keyframe.co[0] < context.scene.frame_current:
+                            prev_key = keyframe
+                        elif keyframe.co[0] > context.scene.frame_current:
+                            next_key = keyframe
+                            break
+
+                    if prev_key and next_key:
+                        prev_value = prev_key.co[1]
+                        next_value = next_key.co[1]
+                        new_value = (1 - factor) * prev_value + factor * next_value
+                        fcurve.keyframe_points.insert(context.scene.frame_current, new_value, options={'FAST'})
+                        fcurve.update()
 
 
 class ApplyPoseBreakdownerOperator(bpy.types.Operator):
@@ -34,8 +32,13 @@ class ApplyPoseBreakdownerOperator(bpy.types.Operator):
     bl_label = "Apply Breakdowner"
 
     def execute(self, context):
+        # Index fcurve per bone dari save_anm.py (lewat driver_namespace)
+        bone_fcurves = bpy.app.driver_namespace.get("raha_bone_fcurves")
+        if bone_fcurves is None:
+            self.report({'WARNING'}, "Fcurve index not found, run save_anm.py first.")
+            return {'CANCELLED'}
         factor = context.scene.pose_breakdowner_factor
-        apply_pose_breakdowner(context, factor)
+        apply_pose_breakdowner(context, factor, bone_fcurves)
         return {'FINISHED'}
 
 
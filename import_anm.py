@@ -1,41 +1,178 @@
 import bpy
 import os
-from bpy.props import StringProperty, EnumProperty
-from bpy.utils import previews
+from bpy.props import StringProperty, EnumProperty, IntProperty, BoolProperty, FloatProperty
 import re
+import json
+import runpy
+import struct
+from array import array
 
-# Global variables
-_icons = None
-_video_paths = []
+# Binary clip container written by save_anm.py (ANIM_DATA/<name>.anm)
+ANM_MAGIC = b"RRAN"
+ANM_EXT = ".anm"
+ANM_PREFIX = struct.Struct("<4sHI")
 
-# Function to load videos from a custom path
-def load_videos_from_path(path):
-    global _video_paths
-    _video_paths.clear()
-    
-    if os.path.exists(path) and os.path.isdir(path):
-        for file in os.listdir(path):
-            if file.lower().endswith(('.mp4', '.avi', '.mkv', '.mov', '.png')):
-                _video_paths.append((file, file, "", load_preview_icon(os.path.join(path, file))))
-
-# Function to load a preview icon
-def load_preview_icon(path):
-    global _icons
-    if not path in _icons:
-        if os.path.exists(path):
-            _icons.load(path, path, "IMAGE")
-        else:
-            return 0
-    return _icons[path].icon_id
+# Read only the JSON header of a binary clip
+def read_clip_header(filepath):
+    with open(filepath, 'rb') as file:
+        magic, _version, header_size = ANM_PREFIX.unpack(file.read(ANM_PREFIX.size))
+        if magic != ANM_MAGIC:
+            raise ValueError(f"Not a binary animation clip: {filepath}")
+        return json.loads(file.read(header_size).decode("utf-8"))
+
+# Clip metadata (bones, frame range, fps, armature, rotation modes, content hash) without reading
+# the clip data: the ANIM_DATA/<name>.json sidecar first, then the header of the binary clip
+def read_clip_meta(anim_data_dir, name):
+    try:
+        with open(os.path.join(anim_data_dir, f"{name}.json"), 'r') as file:
+            meta = json.load(file).get("meta")
+        if meta:
+            return meta
+    except (OSError, ValueError, AttributeError):
+        pass
+    clip_filepath = os.path.join(anim_data_dir, f"{name}{ANM_EXT}")
+    if os.path.exists(clip_filepath):
+        try:
+            return read_clip_header(clip_filepath)
+        except (OSError, ValueError, struct.error):
+            pass
+    return None
+
+# Metadata of the selected clip for the panel, re-read only when its sidecar changes
+_meta_cache = {"key": None, "meta": None}
+
+def selected_clip_meta(custom_path, selected_file):
+    anim_data_dir = os.path.join(custom_path, "ANIM_DATA")
+    name = os.path.splitext(selected_file)[0]
+    try:
+        mtime = os.stat(os.path.join(anim_data_dir, f"{name}.json")).st_mtime_ns
+    except OSError:
+        mtime = None
+    key = (anim_data_dir, name, mtime)
+    if _meta_cache["key"] != key:
+        _meta_cache["meta"] = read_clip_meta(anim_data_dir, name)
+        _meta_cache["key"] = key
+    return _meta_cache["meta"]
+
+# Scrub preview: the exporter writes Preview/<name>_sprite.png, SPRITE_FRAMES small frames in a
+# grid of SPRITE_COLUMNS. Selecting a clip decodes that one image once and slices it into frames;
+# the scrub slider copies a frame into a dedicated preview, so nothing else is decoded or played
+SPRITE_SUFFIX = "_sprite.png"
+SPRITE_FRAMES = 16
+SPRITE_COLUMNS = 4
+SCRUB_KEY = "__scrub__"
+_sprite_cache = {"key": None, "frames": [], "size": (0, 0)}
+
+def find_sprite_sheet(custom_path, name):
+    for folder in ("Preview", "preview"):
+        sprite_path = os.path.join(custom_path, folder, name + SPRITE_SUFFIX)
+        if os.path.exists(sprite_path):
+            return sprite_path
+    return None
+
+def load_sprite_frames(sprite_path):
+    image = bpy.data.images.load(sprite_path, check_existing=False)
+    try:
+        width, height = image.size
+        pixels = array('f', bytes(width * height * 16))
+        image.pixels.foreach_get(pixels)
+    finally:
+        bpy.data.images.remove(image)
+
+    rows = -(-SPRITE_FRAMES // SPRITE_COLUMNS)
+    cell_width, cell_height = width // SPRITE_COLUMNS, height // rows
+    row_floats = cell_width * 4
+    frames = []
+    for i in range(SPRITE_FRAMES):
+        column, row = i % SPRITE_COLUMNS, i // SPRITE_COLUMNS
+        y0 = (rows - 1 - row) * cell_height  # Pixel rows are stored bottom-up
+        frame = array('f')
+        for y in range(y0, y0 + cell_height):
+            start = (y * width + column * cell_width) * 4
+            frame.extend(pixels[start:start + row_floats])
+        frames.append(frame)
+    return frames, (cell_width, cell_height)
+
+def show_scrub_frame(scene):
+    frames = _sprite_cache["frames"]
+    if not frames or browser.icons is None:
+        return
+    index = min(int(scene.sna_video_scrub * len(frames)), len(frames) - 1)
+    preview = browser.icons.get(SCRUB_KEY) or browser.icons.new(SCRUB_KEY)
+    preview.image_size = _sprite_cache["size"]
+    preview.image_pixels_float[:] = frames[index]
+
+def scrub_available(scene):
+    key = _sprite_cache["key"]
+    return bool(_sprite_cache["frames"] and key and scene.sna_videos
+                and os.path.basename(key[0]) == os.path.splitext(scene.sna_videos)[0] + SPRITE_SUFFIX)
 
-# Enum property for the videos
+# Load the sprite sheet of the newly selected clip (re-decoded only when the file changed)
+def sna_update_selected_video(self, context):
+    selected = self.sna_videos
+    sprite_path = find_sprite_sheet(self.sna_custom_path, os.path.splitext(selected)[0]) if selected else None
+    try:
+        key = (sprite_path, os.stat(sprite_path).st_mtime_ns) if sprite_path else None
+    except OSError:
+        key = None
+    if key != _sprite_cache["key"]:
+        _sprite_cache.update(key=key, frames=[], size=(0, 0))
+        if key is not None:
+            try:
+                frames, size = load_sprite_frames(sprite_path)
+                _sprite_cache.update(frames=frames, size=size)
+            except (RuntimeError, OSError) as e:
+                print(f"[WARNING] Could not load sprite sheet {sprite_path}: {e}")
+    show_scrub_frame(self)
+
+def sna_update_scrub(self, context):
+    show_scrub_frame(self)
+
+# Scanner, index/thumbnails, watcher, icon LRU, paging, marks and the journaled batch rename/delete
+# are shared with the pose browser (library_browser.py), loaded by path like anim_lib_cli.py loads
+# save_anm.py: the add-on scripts run standalone and cannot import each other
+_library_browser = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "library_browser.py"),
+                                  run_name="library_browser")
+INVALID_NAME = _library_browser["INVALID_NAME"]
+redraw_browser = _library_browser["redraw_browser"]
+
+PREVIEW_FOLDERS = ("Preview", "preview")
+PREVIEW_EXTS = ('.mp4', '.avi', '.mov', '.mkv', SPRITE_SUFFIX)
+
+# Every file belonging to a listed clip besides its thumbnail: the listed file, its ANIM_DATA clip,
+# script and sidecar, its preview videos and sprite sheet
+def clip_entry_paths(library, file):
+    name = os.path.splitext(file)[0]
+    paths = [os.path.join(library, file)]
+    paths += [os.path.join(library, "ANIM_DATA", name + ext) for ext in ('.py', ANM_EXT, '.json')]
+    for folder in PREVIEW_FOLDERS:
+        paths += [os.path.join(library, folder, name + ext) for ext in PREVIEW_EXTS]
+    return paths
+
+# Listing of the library: browser.listing holds (file, file_path, thumb_path, tags); the persistent
+# index .anim_index.jsonl and .thumbs let a reopened library decode only the images that changed
+browser = _library_browser["LibraryBrowser"](
+    "sna_video", ('.mp4', '.avi', '.mkv', '.mov', '.png'), clip_entry_paths,
+    journal_name=".anim_journal", trash_dir=".anim_trash",
+    index_name=".anim_index.jsonl", thumb_exts=('.png',), thumb_size=128)
+
+# Enum property for the videos (enum numbers come from the file name, so a selection survives paging)
 def sna_videos_enum_items(self, context):
-    return [(item[0], item[1], item[2], item[3], i) for i, item in enumerate(_video_paths)]
+    return browser.enum_items(context.scene if context else bpy.context.scene)
+
+# Most common tags of the current listing
+def sna_video_tag_items(self, context):
+    return browser.tag_items()
+
+# Back to the first page whenever the filter changes
+def sna_update_video_filter(self, context):
+    if self.sna_video_page != 1:
+        self.sna_video_page = 1
 
 # Update function for the custom path property
 def sna_update_custom_path(self, context):
     custom_path = bpy.context.scene.sna_custom_path
-    load_videos_from_path(custom_path)
+    browser.load_from_path(custom_path)
 
 # Operator to play the selected video
 class WM_OT_PlayVideo(bpy.types.Operator):
@@ -88,8 +225,8 @@ class WM_OT_RefreshList(bpy.types.Operator):
         custom_path = context.scene.sna_custom_path
         
         if custom_path and os.path.isdir(custom_path):
-            load_videos_from_path(custom_path)  # Reload videos from the custom path
-            self.report({'INFO'}, "List refreshed.")
+            browser.load_from_path(custom_path)  # Rescan in the background, the list fills progressively
+            self.report({'INFO'}, "Refreshing list...")
         else:
             self.report({'ERROR'}, "Invalid or no folder selected.")
         
@@ -115,22 +252,39 @@ class WM_OT_ImportAnimation(bpy.types.Operator):
             self.report({'ERROR'}, f"ANIM_DATA folder not found in: {custom_path}")
             return {'CANCELLED'}
         
-        # Path to script file
+        clip_filepath = os.path.join(anim_data_dir, f"{file_name}{ANM_EXT}")
         script_filepath = os.path.join(anim_data_dir, f"{file_name}.py")
+        if not os.path.exists(clip_filepath):
+            clip_filepath = script_filepath
         
-        if not os.path.exists(script_filepath):
+        if not os.path.exists(clip_filepath):
             self.report({'ERROR'}, f"Script file {os.path.basename(script_filepath)} not found in: {anim_data_dir}")
             return {'CANCELLED'}
         
-        # Read and execute the script
-        try:
-            with open(script_filepath, 'r') as file:
-                exec(file.read())
-            self.report({'INFO'}, f"Animation data from {script_filepath} imported successfully.")
-            return {'FINISHED'}
-        except Exception as e:
-            self.report({'ERROR'}, f"Error importing script: {e}")
-            return {'CANCELLED'}
+        # Compatibility check from the metadata only
+        meta = read_clip_meta(anim_data_dir, file_name)
+        armature_obj = context.active_object
+        if meta and armature_obj and armature_obj.type == 'ARMATURE':
+            clip_bones = meta.get("bones", [])
+            missing = [name for name in clip_bones if name not in armature_obj.pose.bones]
+            if clip_bones and len(missing) == len(clip_bones):
+                self.report({'ERROR'}, f"None of the {len(clip_bones)} bones of this clip "
+                                       f"(recorded on '{meta.get('armature')}') exist in '{armature_obj.name}'.")
+                return {'CANCELLED'}
+            if missing:
+                self.report({'WARNING'}, f"{len(missing)} of {len(clip_bones)} clip bones not found in '{armature_obj.name}'.")
+            render = context.scene.render
+            if meta.get("fps") and abs(meta["fps"] - render.fps / render.fps_base) > 1e-3:
+                self.report({'WARNING'}, f"Clip was recorded at {meta['fps']:g} fps, scene is {render.fps / render.fps_base:g} fps.")
+        
+        # Clips (binary or legacy script) are applied curve by curve by the save_anm importer,
+        # without stepping the timeline or executing the script
+        result = bpy.ops.object.import_bone_keyframe_data(filepath=os.path.join(custom_path, selected_file))
+        if 'FINISHED' in result:
+            self.report({'INFO'}, f"Animation data from {clip_filepath} imported successfully.")
+        else:
+            self.report({'ERROR'}, f"Error importing animation: {clip_filepath}")
+        return result
 
 # Operator to select bones from the script
 class WM_OT_SelectBonesFromScript(bpy.types.Operator):
@@ -151,19 +305,24 @@ class WM_OT_SelectBonesFromScript(bpy.types.Operator):
             return {'CANCELLED'}
         
         # Path to script file
+        clip_filepath = os.path.join(anim_data_dir, f"{video_name}{ANM_EXT}")
         script_filepath = os.path.join(anim_data_dir, f"{video_name}.py")
         
-        if not os.path.exists(script_filepath):
+        if not os.path.exists(clip_filepath) and not os.path.exists(script_filepath):
             self.report({'ERROR'}, f"Script file {os.path.basename(script_filepath)} not found in: {anim_data_dir}")
             return {'CANCELLED'}
         
-        # Read the script
+        # Read the metadata (sidecar or binary header); old clips without it fall back to the script
         try:
-            with open(script_filepath, 'r') as file:
-                script_content = file.read()
-            
-            # Find bones in the script
-            bone_names = re.findall(r"armature_obj\.pose\.bones\[\'([^\']+)\'\]", script_content)
+            meta = read_clip_meta(anim_data_dir, video_name)
+            if meta is not None:
+                bone_names = meta.get("bones", [])
+            else:
+                with open(script_filepath, 'r') as file:
+                    script_content = file.read()
+                
+                # Find bones in the script
+                bone_names = re.findall(r"armature_obj\.pose\.bones\[\'([^\']+)\'\]", script_content)
             
             if not bone_names:
                 self.report({'WARNING'}, "No bones found in the script.")
@@ -192,43 +351,65 @@ class WM_OT_SelectBonesFromScript(bpy.types.Operator):
             self.report({'ERROR'}, f"Error reading script: {e}")
             return {'CANCELLED'}
 
-# Operator to delete the selected video and its script
+# Operator to mark clips for batch rename / delete
+class WM_OT_MarkVideo(bpy.types.Operator):
+    bl_idname = "wm.mark_video"
+    bl_label = "Mark Clips"
+    bl_description = "Mark clips for batch rename and delete"
+
+    action: EnumProperty(
+        name="Action",
+        items=[('TOGGLE', "Toggle", "Mark or unmark the selected clip"),
+               ('FILTERED', "Mark Filtered", "Mark every clip matching the filter and tag"),
+               ('CLEAR', "Clear", "Unmark all clips")],
+        default='TOGGLE'
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        if self.action == 'TOGGLE':
+            if scene.sna_videos:
+                browser.mark([scene.sna_videos], toggle=True)
+        elif self.action == 'FILTERED':
+            browser.mark_filtered(scene)
+        else:
+            browser.mark(clear=True)
+        redraw_browser()
+        return {'FINISHED'}
+
+# Operator to delete the selected or marked clips with all their files
 class WM_OT_DeleteVideo(bpy.types.Operator):
     bl_idname = "wm.delete_video"
     bl_label = "Delete Video"
-    bl_description = "Delete the selected video and its corresponding script"
+    bl_description = "Delete the marked clips (or the selected one) with their files in ANIM_DATA and preview folders"
     
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
+
     def execute(self, context):
-        selected_video = context.scene.sna_videos
         custom_path = context.scene.sna_custom_path
-        video_path = os.path.join(custom_path, selected_video)
-        video_name = os.path.splitext(selected_video)[0]
-        
-        # Path to ANIM_DATA folder
-        anim_data_dir = os.path.join(custom_path, "ANIM_DATA")
-        script_filepath = os.path.join(anim_data_dir, f"{video_name}.py")
-        
-        # Delete the script if it exists
-        if os.path.exists(script_filepath):
-            try:
-                os.remove(script_filepath)
-                self.report({'INFO'}, f"Script {os.path.basename(script_filepath)} deleted.")
-            except Exception as e:
-                self.report({'ERROR'}, f"Failed to delete script: {e}")
-                return {'CANCELLED'}
-        
-        # Delete the video
-        if os.path.exists(video_path):
-            try:
-                os.remove(video_path)
-                self.report({'INFO'}, f"Video {selected_video} deleted.")
-            except Exception as e:
-                self.report({'ERROR'}, f"Failed to delete video: {e}")
-                return {'CANCELLED'}
-        
-        # Refresh the video list
-        load_videos_from_path(custom_path)
-        
+        if browser.scan_job is not None:
+            self.report({'ERROR'}, "The library is still being scanned.")
+            return {'CANCELLED'}
+        targets = browser.batch_targets(context.scene)
+        if not targets:
+            self.report({'ERROR'}, "No clip selected.")
+            return {'CANCELLED'}
+
+        # Everything goes to a trash folder first, so the batch can still be rolled back
+        trash_dir = browser.new_trash_dir(custom_path)
+        moves = {}
+        for file in targets:
+            for src in browser.entry_files(custom_path, file):
+                moves.setdefault(src, os.path.join(trash_dir, os.path.relpath(src, custom_path)))
+
+        error = browser.run_file_transaction(custom_path, list(moves.items()), trash_dir)
+        if error:
+            self.report({'ERROR'}, f"Delete failed: {error}")
+            return {'CANCELLED'}
+
+        browser.apply_batch(custom_path, {}, set(targets))
+        self.report({'INFO'}, f"Deleted {len(targets)} clip(s), {len(moves)} files.")
         return {'FINISHED'}
 #===================================== Rename ==================================
 
@@ -236,67 +417,73 @@ class WM_OT_DeleteVideo(bpy.types.Operator):
 class WM_OT_RenameVideo(bpy.types.Operator):
     bl_idname = "wm.rename_video"
     bl_label = "Rename Video/Image"
-    bl_description = "Rename the selected video/image and update corresponding files in ANIM_DATA and preview folders"
+    bl_description = ("Rename the selected clip, or find and replace in the names of the marked clips, "
+                      "and update corresponding files in ANIM_DATA and preview folders")
 
     new_name: StringProperty(name="New Name", description="New name for the file (without extension)")
+    find: StringProperty(name="Find", description="Text to replace in the names of the marked clips")
+    replace: StringProperty(name="Replace", description="Replacement text")
 
     def invoke(self, context, event):
         return context.window_manager.invoke_props_dialog(self)
 
+    def draw(self, context):
+        targets = browser.batch_targets(context.scene)
+        if len(targets) > 1:
+            self.layout.label(text=f"{len(targets)} marked clips")
+            self.layout.prop(self, "find")
+            self.layout.prop(self, "replace")
+        else:
+            self.layout.prop(self, "new_name")
+
     def execute(self, context):
-        selected_file = context.scene.sna_videos
         custom_path = context.scene.sna_custom_path
-        file_path = os.path.join(custom_path, selected_file)
-        file_name, file_ext = os.path.splitext(selected_file)
+        if browser.scan_job is not None:
+            self.report({'ERROR'}, "The library is still being scanned.")
+            return {'CANCELLED'}
+        targets = browser.batch_targets(context.scene)
+        if not targets:
+            self.report({'ERROR'}, "No clip selected.")
+            return {'CANCELLED'}
 
         # Validasi nama baru
-        if not self.new_name:
-            self.report({'ERROR'}, "New name cannot be empty.")
+        new_names = {}
+        for file in targets:
+            name = os.path.splitext(file)[0]
+            new_name = self.new_name if len(targets) == 1 else (name.replace(self.find, self.replace) if self.find else name)
+            if new_name != name:
+                new_names[file] = new_name.strip()
+        if not new_names:
+            self.report({'ERROR'}, "New name cannot be empty." if len(targets) == 1 else "Nothing to rename.")
             return {'CANCELLED'}
+        for new_name in new_names.values():
+            if not new_name or INVALID_NAME.search(new_name):
+                self.report({'ERROR'}, f"Invalid name: '{new_name}'.")
+                return {'CANCELLED'}
 
-        # Path baru untuk file utama
-        new_file_path = os.path.join(custom_path, self.new_name + file_ext)
+        # Semua file dari semua klip dalam satu transaksi
+        moves = {}
+        renamed = {}
+        for file, new_name in new_names.items():
+            name, file_ext = os.path.splitext(file)
+            renamed[file] = new_name + file_ext
+            for src in browser.entry_files(custom_path, file):
+                suffix = os.path.basename(src)[len(name):]
+                moves.setdefault(src, os.path.join(os.path.dirname(src), new_name + suffix))
 
-        # Rename file utama
-        if os.path.exists(file_path):
-            try:
-                os.rename(file_path, new_file_path)
-                self.report({'INFO'}, f"Renamed {selected_file} to {self.new_name + file_ext}.")
-            except Exception as e:
-                self.report({'ERROR'}, f"Failed to rename file: {e}")
-                return {'CANCELLED'}
-        else:
-            self.report({'ERROR'}, f"File {selected_file} not found.")
+        error = browser.run_file_transaction(custom_path, list(moves.items()))
+        if error:
+            self.report({'ERROR'}, f"Rename failed: {error}")
             return {'CANCELLED'}
 
-        # Rename script di ANIM_DATA
-        anim_data_dir = os.path.join(custom_path, "ANIM_DATA")
-        old_script_path = os.path.join(anim_data_dir, f"{file_name}.py")
-        new_script_path = os.path.join(anim_data_dir, f"{self.new_name}.py")
-
-        if os.path.exists(old_script_path):
+        selected = context.scene.sna_videos
+        browser.apply_batch(custom_path, renamed, set())
+        if selected in renamed:
             try:
-                os.rename(old_script_path, new_script_path)
-                self.report({'INFO'}, f"Renamed script {file_name}.py to {self.new_name}.py.")
-            except Exception as e:
-                self.report({'ERROR'}, f"Failed to rename script: {e}")
-
-        # Rename file di folder preview
-        preview_folder = os.path.join(custom_path, "preview")
-        if os.path.exists(preview_folder):
-            for preview_file in os.listdir(preview_folder):
-                if preview_file.startswith(file_name):
-                    old_preview_path = os.path.join(preview_folder, preview_file)
-                    new_preview_path = os.path.join(preview_folder, preview_file.replace(file_name, self.new_name))
-                    try:
-                        os.rename(old_preview_path, new_preview_path)
-                        self.report({'INFO'}, f"Renamed preview file {preview_file}.")
-                    except Exception as e:
-                        self.report({'ERROR'}, f"Failed to rename preview file: {e}")
-
-        # Refresh list
-        load_videos_from_path(custom_path)
-
+                context.scene.sna_videos = renamed[selected]
+            except TypeError:
+                pass  # Renamed onto another page
+        self.report({'INFO'}, f"Renamed {len(renamed)} clip(s), {len(moves)} files.")
         return {'FINISHED'}
     
 # Panel class
@@ -311,7 +498,30 @@ class VIDEO_PT_Browser(bpy.types.Panel):
         layout.label(text="Animation Library")
         layout.prop(context.scene, 'sna_custom_path', text="Folder")
         
+        row = layout.row(align=True)
+        row.prop(context.scene, 'sna_video_filter', text="", icon='VIEWZOOM')
+        row.prop(context.scene, 'sna_video_tag', text="")
         layout.template_icon_view(context.scene, 'sna_videos', show_labels=True, scale=5.0, scale_popup=5.0)
+        if scrub_available(context.scene):
+            layout.template_icon(icon_value=browser.icons[SCRUB_KEY].icon_id, scale=6.0)
+            layout.prop(context.scene, 'sna_video_scrub', text="Scrub", slider=True)
+        meta = selected_clip_meta(context.scene.sna_custom_path, context.scene.sna_videos) if context.scene.sna_videos else None
+        if meta:
+            layout.label(text=f"{meta.get('armature', '?')}: {len(meta.get('bones', []))} bones, "
+                              f"frames {meta.get('frame_start', 0):g}-{meta.get('frame_end', 0):g}"
+                              + (f" @ {meta['fps']:g} fps" if meta.get("fps") else ""), icon='ARMATURE_DATA')
+        row = layout.row(align=True)
+        row.prop(context.scene, 'sna_video_page', text="Page")
+        row.label(text=f"/ {browser.page_count(context.scene)}  ({len(browser.filtered(context.scene))} clips)")
+        if browser.scan_job is not None:
+            layout.label(text=f"Scanning... {len(browser.listing)} files", icon='TIME')
+        row = layout.row(align=True)
+        row.prop(context.scene, 'sna_video_watch', text="Watch")
+        row.prop(context.scene, 'sna_video_watch_interval', text="Every (s)")
+        row = layout.row(align=True)
+        row.prop(context.scene, 'sna_video_cache_entries', text="Icons")
+        row.prop(context.scene, 'sna_video_cache_mb', text="MB")
+        layout.label(text=browser.icon_summary())
         row = layout.row()
 #        row.operator("wm.refresh_list", text="REFRESH", icon='FILE_REFRESH')         
 #        if context.scene.sna_videos:
@@ -324,13 +534,28 @@ class VIDEO_PT_Browser(bpy.types.Panel):
         row.operator("wm.import_animation", text="Import ANM")
         row = layout.row()  
         row.operator("wm.rename_video", text="Rename", icon='SORTALPHA')                   
+        row = layout.row(align=True)
+        marked = context.scene.sna_videos in browser.marked
+        row.operator("wm.mark_video", text="Mark", icon='CHECKBOX_HLT' if marked else 'CHECKBOX_DEHLT').action = 'TOGGLE'
+        row.operator("wm.mark_video", text="Mark Filtered").action = 'FILTERED'
+        row.operator("wm.mark_video", text="", icon='X').action = 'CLEAR'
+        row.label(text=f"{len(browser.marked)} marked")
         row = layout.row()          
         row.operator("floating.open_save_animation", text="Save Animation")        
 
+        # Ranking clips by bone overlap (library_catalog.py)
+        draw_catalog = bpy.app.driver_namespace.get("raha_library_catalog_draw")
+        if draw_catalog is not None:
+            draw_catalog(layout, context, 'clip')
+
+        # Deduplicating store (library_store.py)
+        draw_store = bpy.app.driver_namespace.get("raha_library_store_draw")
+        if draw_store is not None:
+            draw_store(layout, context)
+
 # Register function
 def register():
-    global _icons
-    _icons = previews.new()
+    browser.register()
     
     bpy.types.Scene.sna_custom_path = StringProperty(
         name="Custom Path",
@@ -343,7 +568,77 @@ def register():
     bpy.types.Scene.sna_videos = EnumProperty(
         name="Videos",
         description="List of videos in the selected folder",
-        items=sna_videos_enum_items
+        items=sna_videos_enum_items,
+        update=sna_update_selected_video
+    )
+    
+    bpy.types.Scene.sna_video_scrub = FloatProperty(
+        name="Scrub",
+        description="Position in the clip shown by the sprite preview",
+        default=0.0,
+        min=0.0,
+        max=1.0,
+        subtype='FACTOR',
+        update=sna_update_scrub
+    )
+    
+    bpy.types.Scene.sna_video_filter = StringProperty(
+        name="Filter",
+        description="Only show clips whose name contains this text",
+        default="",
+        options={'TEXTEDIT_UPDATE'},
+        update=sna_update_video_filter
+    )
+    
+    bpy.types.Scene.sna_video_tag = EnumProperty(
+        name="Tag",
+        description="Only show clips whose name contains this word",
+        items=sna_video_tag_items,
+        update=sna_update_video_filter
+    )
+    
+    bpy.types.Scene.sna_video_page = IntProperty(
+        name="Page",
+        description="Page of the library shown in the browser",
+        default=1,
+        min=1
+    )
+    
+    bpy.types.Scene.sna_video_page_size = IntProperty(
+        name="Page Size",
+        description="Number of clips per page",
+        default=48,
+        min=8,
+        max=512,
+        update=sna_update_video_filter
+    )
+    
+    bpy.types.Scene.sna_video_watch = BoolProperty(
+        name="Watch Folder",
+        description="Pick up files added, removed or renamed in the library folder without refreshing",
+        default=True
+    )
+    
+    bpy.types.Scene.sna_video_watch_interval = FloatProperty(
+        name="Watch Interval",
+        description="Seconds between checks of the library folder",
+        default=2.0,
+        min=0.5,
+        max=60.0
+    )
+    
+    bpy.types.Scene.sna_video_cache_entries = IntProperty(
+        name="Icon Cache Entries",
+        description="Maximum number of preview icons kept in memory (never less than one page)",
+        default=256,
+        min=8
+    )
+    
+    bpy.types.Scene.sna_video_cache_mb = IntProperty(
+        name="Icon Cache Size",
+        description="Memory budget of the preview icons in megabytes",
+        default=32,
+        min=1
     )
  
     bpy.utils.register_class(WM_OT_RenameVideo)   
@@ -351,20 +646,31 @@ def register():
     bpy.utils.register_class(WM_OT_ImportAnimation)
     bpy.utils.register_class(WM_OT_SelectBonesFromScript)
     bpy.utils.register_class(WM_OT_DeleteVideo)
+    bpy.utils.register_class(WM_OT_MarkVideo)
     bpy.utils.register_class(VIDEO_PT_Browser)
     bpy.utils.register_class(WM_OT_RefreshList)
 
 # Unregister function
 def unregister():
-    global _icons
-    previews.remove(_icons)
+    browser.unregister()
+    _sprite_cache.update(key=None, frames=[], size=(0, 0))
     
     del bpy.types.Scene.sna_custom_path
     del bpy.types.Scene.sna_videos
+    del bpy.types.Scene.sna_video_scrub
+    del bpy.types.Scene.sna_video_filter
+    del bpy.types.Scene.sna_video_tag
+    del bpy.types.Scene.sna_video_page
+    del bpy.types.Scene.sna_video_page_size
+    del bpy.types.Scene.sna_video_watch
+    del bpy.types.Scene.sna_video_watch_interval
+    del bpy.types.Scene.sna_video_cache_entries
+    del bpy.types.Scene.sna_video_cache_mb
     
     bpy.utils.unregister_class(WM_OT_RenameVideo)    
     bpy.utils.unregister_class(VIDEO_PT_Browser)
     bpy.utils.unregister_class(WM_OT_DeleteVideo)
+    bpy.utils.unregister_class(WM_OT_MarkVideo)
     bpy.utils.unregister_class(WM_OT_SelectBonesFromScript)
     bpy.utils.unregister_class(WM_OT_ImportAnimation)
     bpy.utils.unregister_class(WM_OT_PlayVideo)
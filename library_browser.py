@@ -0,0 +1,724 @@
+import bpy
+import os
+import re
+import json
+import zlib
+import time
+import queue
+import shutil
+import socket
+import threading
+from bpy.utils import previews
+from collections import OrderedDict
+
+#============================ Browser library bersama (klip dan pose) ============================
+# Satu implementasi untuk browser klip (import_anm.py) dan browser pose (library_pose.py): scan folder
+# di thread, index thumbnail persisten, pemantauan perubahan folder, cache icon LRU, tampilan per
+# halaman, tanda (mark) dan rename/hapus massal dengan journal. Script add-on dijalankan terpisah dan
+# tidak bisa saling import, jadi kedua browser memuat file ini dengan runpy (seperti anim_lib_cli.py
+# memuat save_anm.py) dan masing-masing membuat satu LibraryBrowser dengan folder, ekstensi dan
+# property scene-nya sendiri.
+
+THUMB_DIR = ".thumbs"
+INDEX_VERSION = 1
+SCAN_BATCH = 32
+SCAN_TICK = 0.02  # Detik kerja main thread per panggilan timer
+SCAN_INTERVAL = 0.05
+WATCH_FULL_EVERY = 10
+PREVIEW_BYTES = 256 * 256 * 4  # Icon dari gambar penuh: preview Blender paling besar 256 px
+TAG_LIMIT = 64
+JOURNAL_TIMEOUT = 600.0  # Detik; journal dari host lain baru dianggap ditinggalkan setelah ini
+INVALID_NAME = re.compile(r'[\\/:*?"<>|]')
+
+
+# Tag = kata-kata dari nama file, mis. "walk_cycle-fast01.png" -> walk, cycle, fast01
+def name_tags(file):
+    return frozenset(t for t in re.split(r"[^0-9a-z]+", os.path.splitext(file)[0].lower()) if t and not t.isdigit())
+
+
+def redraw_browser():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+# Index persisten: <library>/<index_name> berisi satu baris per file (nama, mtime, ukuran, thumbnail)
+# dan <library>/.thumbs berisi salinan gambar yang diperkecil, jadi membuka library lagi hanya
+# melakukan stat dan men-decode gambar yang berubah. Index yang tidak terbaca/usang dianggap kosong
+def read_library_index(path, index_name, thumb_size):
+    entries = {}
+    try:
+        with open(os.path.join(path, index_name), 'r') as file:
+            header = json.loads(file.readline() or "{}")
+            if header.get("version") != INDEX_VERSION or header.get("thumb_size") != thumb_size:
+                return entries
+            for line in file:
+                entry = json.loads(line)
+                entries[entry["name"]] = entry
+    except (OSError, ValueError, KeyError):
+        pass
+    return entries
+
+
+# Tulis ulang index secara atomik (library share yang read-only cukup tidak punya index)
+def write_library_index(path, index_name, thumb_size, entries):
+    index_path = os.path.join(path, index_name)
+    tmp_path = index_path + ".tmp"
+    try:
+        with open(tmp_path, 'w') as file:
+            file.write(json.dumps({"version": INDEX_VERSION, "thumb_size": thumb_size}) + "\n")
+            for entry in entries.values():
+                file.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"[WARNING] Gagal menulis index library {index_path}: {e}")
+
+
+# Simpan salinan gambar yang sisi terpanjangnya diperkecil ke thumb_size
+def make_thumbnail(source_path, thumb_path, thumb_size):
+    try:
+        image = bpy.data.images.load(source_path, check_existing=False)
+    except RuntimeError:
+        return False
+    try:
+        width, height = image.size
+        if not width or not height:
+            return False
+        scale = thumb_size / max(width, height)
+        if scale < 1.0:
+            image.scale(max(1, round(width * scale)), max(1, round(height * scale)))
+        os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+        image.filepath_raw = thumb_path
+        image.file_format = 'PNG'
+        image.save()
+        return True
+    except (RuntimeError, OSError):
+        return False
+    finally:
+        bpy.data.images.remove(image)
+
+
+# Snapshot untuk watcher (thread terpisah): nama -> (mtime, ukuran)
+def snapshot_library(path, list_exts, out_queue):
+    try:
+        dir_mtime = os.stat(path).st_mtime_ns
+        files = {}
+        with os.scandir(path) as items:
+            for item in items:
+                if item.is_file() and item.name.lower().endswith(list_exts):
+                    stat = item.stat()
+                    files[item.name] = (stat.st_mtime_ns, stat.st_size)
+        out_queue.put((path, dir_mtime, files))
+    except OSError as e:
+        print(f"[WARNING] Gagal memantau folder {path}: {e}")
+        out_queue.put((path, None, None))
+
+
+# Rename / hapus massal. Setiap batch menulis journal sendiri, <library>/<journal_name>-<id>.json,
+# berisi pemilik (host, pid), waktu mulai dan semua perpindahan file, sebelum file pertama dipindah.
+# File yang dihapus dipindah ke <trash_dir>/<id> dan baru dihapus setelah semua perpindahan berhasil
+# (journal ditandai "committed" dulu). Perpindahan yang gagal dikembalikan dengan urutan terbalik.
+# Saat library dibuka, hanya journal yang ditinggalkan (prosesnya sudah mati, atau dari host lain dan
+# lebih tua dari JOURNAL_TIMEOUT) yang dipulihkan, dan hanya trash yang tercatat di journal itu yang
+# dihapus: batch yang sedang berjalan di sesi Blender lain tidak disentuh
+def journal_owner():
+    return {"host": socket.gethostname(), "pid": os.getpid()}
+
+
+def process_alive(pid):
+    if os.name == 'nt':
+        import ctypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5  # ERROR_ACCESS_DENIED: proses ada, milik user lain
+        try:
+            code = ctypes.c_ulong()
+            return not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)) or code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def journal_abandoned(journal, journal_path):
+    owner = journal.get("owner") or {}
+    if owner.get("host") == socket.gethostname() and isinstance(owner.get("pid"), int):
+        # Journal sesi ini sendiri hanya tersisa dari rollback yang gagal
+        return owner["pid"] == os.getpid() or not process_alive(owner["pid"])
+    # Host lain (atau journal tanpa pemilik): prosesnya tidak bisa dicek, tunggu sampai kedaluwarsa
+    started = journal.get("time")
+    if not isinstance(started, (int, float)):
+        try:
+            started = os.path.getmtime(journal_path)
+        except OSError:
+            return False
+    return time.time() - started > JOURNAL_TIMEOUT
+
+
+def write_journal(journal_path, journal):
+    with open(journal_path + ".tmp", 'w') as file:
+        json.dump(journal, file)
+    os.replace(journal_path + ".tmp", journal_path)
+
+
+def rollback_moves(moves):
+    failed = 0
+    for src, dst in reversed(moves):
+        if os.path.exists(src) or not os.path.exists(dst):
+            continue
+        try:
+            os.rename(dst, src)
+        except OSError as e:
+            failed += 1
+            print(f"[WARNING] Gagal mengembalikan {dst}: {e}")
+    return failed
+
+
+class LibraryBrowser:
+    """Daftar satu folder library beserta scan, watcher, icon, tampilan dan batch-nya.
+
+    prefix: awalan property scene; "sna_video" memakai sna_video_filter, sna_video_page, ... dan enum sna_videos.
+    entry_paths(library, file): semua path yang bisa menjadi milik satu entry (yang tidak ada diabaikan).
+    index_name: index persisten dan thumbnail di .thumbs untuk file berekstensi thumb_exts; None = tanpa index.
+    """
+
+    def __init__(self, prefix, list_exts, entry_paths, journal_name, trash_dir,
+                 index_name=None, thumb_exts=(), thumb_size=128):
+        self.prefix = prefix
+        self.list_exts = list_exts
+        self.entry_paths = entry_paths
+        self.journal_name = journal_name
+        self.trash_dir = trash_dir
+        self.index_name = index_name
+        self.thumb_exts = thumb_exts if index_name else ()
+        self.thumb_size = thumb_size
+        self.thumb_bytes = thumb_size * thumb_size * 4  # Icon dari salinan .thumbs sendiri
+
+        self.icons = None
+        self.listing = []  # (file, file_path, thumb_path, tags)
+        self.listing_version = 0
+        self.scan_job = None
+        self.watch = {"path": None, "dir_mtime": None, "entries": {}, "pending": None, "polls": 0}
+        self.marked = set()  # Nama file yang ditandai untuk operasi massal
+        self.marks_version = 0
+        self.icon_lru = OrderedDict()  # path -> perkiraan byte
+        self.icon_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+        self.view_cache = {"filter_key": None, "matches": [], "items_key": None, "items": [],
+                           "tags_key": None, "tags": []}
+        # Timer Blender dikenali dari identitas objeknya, jadi bound method disimpan sekali
+        self.scan_timer = self.drain_scan
+        self.watch_timer = self.poll_watch
+
+    def scene_prop(self, scene, name):
+        return getattr(scene, f"{self.prefix}_{name}")
+
+    def selected(self, scene):
+        return getattr(scene, f"{self.prefix}s")
+
+    def thumb_path(self, library, thumb):
+        return os.path.join(library, THUMB_DIR, thumb) if thumb else None
+
+    def remove_thumb(self, library, entry):
+        if entry.get("thumb"):
+            try:
+                os.remove(os.path.join(library, THUMB_DIR, entry["thumb"]))
+            except OSError:
+                pass
+
+    def write_index(self, path, entries):
+        if self.index_name:
+            write_library_index(path, self.index_name, self.thumb_size, entries)
+
+    #------------------------------------ Scan ------------------------------------
+    # Folder di-scan di thread (os.scandir + stat dibanding index); entry dikirim lewat queue dan timer di
+    # main thread memindahkannya ke daftar enum sedikit demi sedikit, sambil membuat thumbnail
+
+    # Thread: kirim ("entry", entry, changed), lalu ("done", entry yang sudah tidak ada di disk)
+    def scan_library(self, path, out_queue, cancel, known):
+        old_entries = read_library_index(path, self.index_name, self.thumb_size) if self.index_name else known
+        out_queue.put(("index", dict(old_entries)))
+        try:
+            with os.scandir(path) as items:
+                for item in items:
+                    if cancel.is_set():
+                        return
+                    if not item.is_file() or not item.name.lower().endswith(self.list_exts):
+                        continue
+                    stat = item.stat()
+                    entry = {"name": item.name, "mtime": stat.st_mtime_ns, "size": stat.st_size, "thumb": None}
+                    old = old_entries.pop(item.name, None)
+                    changed = not (old and old["mtime"] == entry["mtime"] and old["size"] == entry["size"]
+                                   and (old["thumb"] is None
+                                        or os.path.exists(os.path.join(path, THUMB_DIR, old["thumb"]))))
+                    if not changed:
+                        entry["thumb"] = old["thumb"]
+                    out_queue.put(("entry", entry, changed))
+        except OSError as e:
+            print(f"[WARNING] Gagal membaca folder {path}: {e}")
+        out_queue.put(("done", old_entries))
+
+    # Thumbnail untuk gambar baru/berubah; file yang di-rename mtime dan ukurannya tetap,
+    # jadi thumbnail lamanya dipindah tanpa men-decode gambar lagi
+    def update_thumbnail(self, job, entry):
+        path = job["path"]
+        thumb_path = os.path.join(path, THUMB_DIR, entry["name"])
+        old = job["by_stat"].get((entry["mtime"], entry["size"]))
+        if old and old["name"] != entry["name"] and not os.path.exists(os.path.join(path, old["name"])):
+            try:
+                os.replace(os.path.join(path, THUMB_DIR, old["thumb"]), thumb_path)
+                return entry["name"]
+            except OSError:
+                pass
+        if make_thumbnail(os.path.join(path, entry["name"]), thumb_path, self.thumb_size):
+            return entry["name"]
+        return None
+
+    def add_entry(self, job, entry, changed):
+        file = entry["name"]
+        file_path = os.path.join(job["path"], file)
+        if changed:
+            job["changed"] = True
+            self.release_preview_icon(file_path)  # Isinya berubah sejak icon dimuat
+            if file.lower().endswith(self.thumb_exts):
+                entry["thumb"] = self.update_thumbnail(job, entry)
+        job["entries"][file] = entry
+        self.listing.append((file, file_path, self.thumb_path(job["path"], entry["thumb"]), name_tags(file)))
+
+    def finish_scan(self, job, removed):
+        # Thumbnail file yang sudah hilang (yang di-rename sudah dipindah)
+        for old in removed.values():
+            self.remove_thumb(job["path"], old)
+        if job["changed"] or removed:
+            self.write_index(job["path"], job["entries"])
+        self.start_watch(job["path"], job["entries"])
+
+    # Timer yang mengosongkan queue scan
+    def drain_scan(self):
+        job = self.scan_job
+        if job is None:
+            return None
+
+        start = time.perf_counter()
+        for _ in range(SCAN_BATCH):
+            try:
+                message = job["queue"].get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "index":
+                job["by_stat"] = {(old["mtime"], old["size"]): old for old in message[1].values() if old.get("thumb")}
+            elif message[0] == "entry":
+                self.add_entry(job, message[1], message[2])
+            else:
+                self.finish_scan(job, message[1])
+                self.scan_job = None
+                self.listing_version += 1
+                redraw_browser()
+                return None
+            if time.perf_counter() - start > SCAN_TICK:
+                break
+
+        self.listing_version += 1
+        redraw_browser()
+        return SCAN_INTERVAL
+
+    def cancel_scan(self):
+        if self.scan_job is not None:
+            self.scan_job["cancel"].set()
+            self.scan_job = None
+
+    # Muat folder library (daftar terisi bertahap oleh drain_scan)
+    def load_from_path(self, path):
+        # Tanpa index, entry dari scan sebelumnya di folder yang sama menggantikannya
+        known = dict(self.watch["entries"]) if self.watch["path"] == path else {}
+        self.cancel_scan()
+        self.listing.clear()
+        self.mark(clear=True)
+        self.listing_version += 1
+        self.watch.update(path=None, pending=None)
+
+        if os.path.exists(path) and os.path.isdir(path):
+            self.recover_file_transactions(path)
+            job = {"path": path, "queue": queue.Queue(), "cancel": threading.Event(),
+                   "entries": {}, "by_stat": {}, "changed": False}
+            threading.Thread(target=self.scan_library, args=(path, job["queue"], job["cancel"], known),
+                             daemon=True).start()
+            self.scan_job = job
+            if not bpy.app.timers.is_registered(self.scan_timer):
+                bpy.app.timers.register(self.scan_timer, first_interval=SCAN_INTERVAL)
+
+    #----------------------------------- Watcher -----------------------------------
+    # Timer mengecek mtime folder (dan snapshot penuh tiap WATCH_FULL_EVERY kali, untuk share yang mtime
+    # foldernya tidak bisa diandalkan). Snapshot diambil di thread terpisah, lalu hanya selisihnya
+    # (tambah, hapus, rename, file ditimpa) yang diterapkan ke daftar, index dan icon
+
+    def start_watch(self, path, entries):
+        try:
+            dir_mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+        self.watch.update(path=path, dir_mtime=dir_mtime, entries=entries, pending=None, polls=0)
+
+    def apply_delta(self, path, files):
+        entries = self.watch["entries"]
+        removed = {name: entry for name, entry in entries.items() if name not in files}
+        updated = [name for name, stat in files.items()
+                   if name not in entries or (entries[name]["mtime"], entries[name]["size"]) != stat]
+        if not removed and not updated:
+            return False
+
+        # Job semu agar update_thumbnail bisa memindah thumbnail file yang di-rename
+        job = {"path": path, "by_stat": {(old["mtime"], old["size"]): old for old in removed.values() if old.get("thumb")}}
+        renamed_from = {(old["mtime"], old["size"]): name for name, old in removed.items()}
+        positions = {item[0]: i for i, item in enumerate(self.listing)}
+
+        for file in updated:
+            mtime, size = files[file]
+            file_path = os.path.join(path, file)
+            entry = {"name": file, "mtime": mtime, "size": size, "thumb": None}
+            self.release_preview_icon(file_path)
+            if file.lower().endswith(self.thumb_exts):
+                entry["thumb"] = self.update_thumbnail(job, entry)
+            entries[file] = entry
+            record = (file, file_path, self.thumb_path(path, entry["thumb"]), name_tags(file))
+
+            old_name = renamed_from.pop((mtime, size), None) if file not in positions else None
+            if old_name is not None and old_name in positions:
+                # Rename: posisi di daftar tetap
+                self.listing[positions.pop(old_name)] = record
+                self.release_preview_icon(os.path.join(path, old_name))
+                del entries[old_name]
+                del removed[old_name]
+            elif file in positions:
+                self.listing[positions[file]] = record
+            else:
+                self.listing.append(record)
+
+        for file, old in removed.items():
+            self.release_preview_icon(os.path.join(path, file))
+            del entries[file]
+            self.remove_thumb(path, old)
+        if removed:
+            self.listing[:] = [item for item in self.listing if item[0] not in removed]
+
+        self.write_index(path, entries)
+        self.listing_version += 1
+        print(f"[INFO] Library {path}: {len(updated)} ditambah/berubah, {len(removed)} dihapus")
+        return True
+
+    # Timer persistent; mengembalikan interval cek berikutnya
+    def poll_watch(self):
+        scene = bpy.context.scene
+        interval = max(self.scene_prop(scene, "watch_interval"), 0.5) if scene else 2.0
+        path = self.watch["path"]
+        if scene is None or not self.scene_prop(scene, "watch") or path is None or self.scan_job is not None:
+            return interval
+
+        if self.watch["pending"] is not None:
+            try:
+                snap_path, dir_mtime, files = self.watch["pending"].get_nowait()
+            except queue.Empty:
+                return 0.2
+            self.watch["pending"] = None
+            if snap_path == self.watch["path"] and files is not None:
+                if self.apply_delta(snap_path, files):
+                    dir_mtime = os.stat(snap_path).st_mtime_ns  # Penulisan index menyentuh folder
+                    redraw_browser()
+                self.watch["dir_mtime"] = dir_mtime
+            return interval
+
+        self.watch["polls"] += 1
+        try:
+            dir_mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return interval
+        if dir_mtime != self.watch["dir_mtime"] or self.watch["polls"] % WATCH_FULL_EVERY == 0:
+            self.watch["pending"] = queue.Queue()
+            threading.Thread(target=snapshot_library, args=(path, self.list_exts, self.watch["pending"]),
+                             daemon=True).start()
+            return 0.2
+        return interval
+
+    #------------------------------------ Icon ------------------------------------
+    # Koleksi preview dipakai sebagai cache LRU: icon yang ditampilkan dipindah ke akhir icon_lru,
+    # trim_preview_icons melepas icon yang paling lama tidak tampil jika batas jumlah/byte terlewati.
+    # Ukuran icon dihitung dari perkiraan, bukan ImagePreview.image_size: membacanya membuat Blender
+    # langsung membuat preview di main thread, di dalam callback enum
+
+    # Muat icon (dari thumbnail jika ada, dengan key path aslinya)
+    def load_preview_icon(self, path, thumb_path=None):
+        if path in self.icons:
+            self.icon_stats["hits"] += 1
+            self.icon_lru.move_to_end(path)
+            return self.icons[path].icon_id
+
+        if thumb_path and os.path.exists(thumb_path):
+            self.icons.load(path, thumb_path, "IMAGE")
+            size = self.thumb_bytes
+        elif os.path.exists(path):
+            self.icons.load(path, path, "IMAGE")
+            size = PREVIEW_BYTES
+        else:
+            return 0
+        self.icon_stats["misses"] += 1
+        self.icon_lru[path] = size
+        self.icon_stats["bytes"] += size
+        return self.icons[path].icon_id
+
+    def release_preview_icon(self, path):
+        if self.icons is not None and path in self.icons:
+            del self.icons[path]
+        self.icon_stats["bytes"] -= self.icon_lru.pop(path, 0)
+
+    # Lepas icon yang paling lama tidak tampil; `keep` icon terbaru (halaman yang terlihat) selalu disimpan
+    def trim_preview_icons(self, max_entries, max_bytes, keep=0):
+        max_entries = max(max_entries, keep)
+        while self.icon_lru and len(self.icon_lru) > keep and (
+                len(self.icon_lru) > max_entries or self.icon_stats["bytes"] > max_bytes):
+            path = next(iter(self.icon_lru))
+            self.release_preview_icon(path)
+            self.icon_stats["evictions"] += 1
+
+    def icon_summary(self):
+        lookups = self.icon_stats["hits"] + self.icon_stats["misses"]
+        return (f"{len(self.icon_lru)} icons, {self.icon_stats['bytes'] / 1048576:.1f} MB, "
+                f"hit rate {self.icon_stats['hits'] / lookups if lookups else 0:.0%}, "
+                f"{self.icon_stats['evictions']} evicted")
+
+    #---------------------------------- Tampilan ----------------------------------
+    # Hanya item (dan icon) di halaman yang terlihat yang dibuat. Hasil filter, jumlah tag dan item
+    # halaman di-cache sampai daftar atau pengaturan tampilan berubah
+
+    def filtered(self, scene):
+        key = (self.listing_version, self.scene_prop(scene, "filter").lower(), self.scene_prop(scene, "tag"))
+        if self.view_cache["filter_key"] != key:
+            _version, text, tag = key
+            self.view_cache["matches"] = [i for i, item in enumerate(self.listing)
+                                          if (not text or text in item[0].lower()) and (tag in ('ALL', '') or tag in item[3])]
+            self.view_cache["filter_key"] = key
+        return self.view_cache["matches"]
+
+    def page_count(self, scene):
+        return max(1, -(-len(self.filtered(scene)) // self.scene_prop(scene, "page_size")))
+
+    # Item enum halaman yang terlihat (nomor enum dari nama file, jadi pilihan tetap saat pindah halaman)
+    def enum_items(self, scene):
+        matches = self.filtered(scene)
+        page_size = self.scene_prop(scene, "page_size")
+        page = min(self.scene_prop(scene, "page"), self.page_count(scene)) - 1
+        key = (self.view_cache["filter_key"], page, page_size, self.marks_version)
+        if self.view_cache["items_key"] != key:
+            items = []
+            for i in matches[page * page_size:(page + 1) * page_size]:
+                file, file_path, thumb_path, _tags = self.listing[i]
+                label = f"[x] {file}" if file in self.marked else file
+                # Nomor dari nama file, bukan index daftar: watcher menggeser daftar, nilai yang tersimpan
+                # di scene harus tetap menunjuk entry yang sama
+                items.append((file, label, "", self.load_preview_icon(file_path, thumb_path),
+                              zlib.crc32(file.encode()) & 0x7FFFFFFF))
+            self.trim_preview_icons(self.scene_prop(scene, "cache_entries"),
+                                    self.scene_prop(scene, "cache_mb") * 1024 * 1024, len(items))
+            self.view_cache["items"] = items
+            self.view_cache["items_key"] = key
+        return self.view_cache["items"]
+
+    # Tag yang paling sering muncul (nomor enum dari hash tag agar tetap saat daftar berubah)
+    def tag_items(self):
+        if self.view_cache["tags_key"] != self.listing_version:
+            counts = {}
+            for item in self.listing:
+                for tag in item[3]:
+                    counts[tag] = counts.get(tag, 0) + 1
+            common = sorted(counts.items(), key=lambda tc: (-tc[1], tc[0]))[:TAG_LIMIT]
+            self.view_cache["tags"] = [('ALL', "All Tags", "", 0)] + [
+                (tag, f"{tag} ({count})", "", zlib.crc32(tag.encode()) & 0x7FFFFFFF or 1) for tag, count in common]
+            self.view_cache["tags_key"] = self.listing_version
+        return self.view_cache["tags"]
+
+    #------------------------------- Operasi massal -------------------------------
+
+    # Semua file yang ada milik satu entry, termasuk thumbnail-nya
+    def entry_files(self, library, file):
+        paths = list(self.entry_paths(library, file))
+        if self.index_name:
+            paths.append(os.path.join(library, THUMB_DIR, file))
+        unique = {}
+        for path in paths:
+            if os.path.exists(path):
+                # "Preview" dan "preview" adalah folder yang sama di Windows
+                unique.setdefault(os.path.normcase(os.path.realpath(path)), path)
+        return list(unique.values())
+
+    # Folder trash baru untuk satu batch hapus
+    def new_trash_dir(self, library):
+        return os.path.join(library, self.trash_dir, f"{time.time_ns():x}-{os.getpid()}")
+
+    def journal_paths(self, library):
+        try:
+            names = sorted(os.listdir(library))
+        except OSError:
+            return []
+        return [os.path.join(library, name) for name in names
+                if name.startswith(self.journal_name) and name.endswith(".json")]
+
+    # Jalankan semua perpindahan (src, dst) atau tidak sama sekali; mengembalikan pesan error atau None
+    def run_file_transaction(self, library, moves, trash_dir=None):
+        targets = set()
+        for src, dst in moves:
+            key = os.path.normcase(dst)
+            # Hanya rename beda huruf besar/kecil yang boleh menuju path yang ada; entry hasil hardlink store
+            # berbagi inode dengan entry lain, jadi samefile() akan meloloskan rename ke entry lain
+            case_only = os.path.normcase(os.path.abspath(src)) == os.path.normcase(os.path.abspath(dst))
+            if key in targets or (os.path.exists(dst) and not case_only):
+                return f"{os.path.basename(dst)} already exists"
+            targets.add(key)
+
+        journal_path = os.path.join(library, f"{self.journal_name}-{time.time_ns():x}-{os.getpid()}.json")
+        journal = {"owner": journal_owner(), "time": time.time(), "committed": False,
+                   "trash": trash_dir and os.path.relpath(trash_dir, library),
+                   "moves": [(os.path.relpath(src, library), os.path.relpath(dst, library)) for src, dst in moves]}
+        try:
+            write_journal(journal_path, journal)
+        except OSError as e:
+            return f"Could not write the journal: {e}"
+
+        done = []
+        try:
+            for src, dst in moves:
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                os.rename(src, dst)
+                done.append((src, dst))
+        except OSError as e:
+            if rollback_moves(done):
+                # Journal disimpan agar load berikutnya menyelesaikan rollback
+                return f"{e} (rollback incomplete, recover from {journal_path})"
+            os.remove(journal_path)
+            self.remove_trash(library, trash_dir)
+            return f"{e} (no file was changed)"
+
+        if trash_dir:
+            # Titik commit: sejak di sini journal tidak di-rollback lagi, hanya trash-nya yang dihapus
+            try:
+                write_journal(journal_path, dict(journal, committed=True))
+            except OSError as e:
+                print(f"[WARNING] Gagal menandai {journal_path}: {e}")
+            self.remove_trash(library, trash_dir)
+        os.remove(journal_path)
+        return None
+
+    def remove_trash(self, library, trash_dir):
+        if not trash_dir:
+            return
+        shutil.rmtree(trash_dir, ignore_errors=True)
+        try:
+            os.rmdir(os.path.join(library, self.trash_dir))  # Hanya jika kosong
+        except OSError:
+            pass
+
+    # Selesaikan batch yang ditinggalkan oleh sesi yang crash: yang belum commit dikembalikan,
+    # trash dari batch itu (dan hanya itu) dihapus
+    def recover_file_transactions(self, library):
+        trash_root = os.path.join(library, self.trash_dir)
+        for journal_path in self.journal_paths(library):
+            try:
+                with open(journal_path, 'r') as file:
+                    journal = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Gagal membaca {journal_path}: {e}")
+                continue
+            if not journal_abandoned(journal, journal_path):
+                owner = journal.get("owner") or {}
+                print(f"[INFO] {os.path.basename(journal_path)} milik batch yang masih berjalan "
+                      f"({owner.get('host')}, pid {owner.get('pid')}), dilewati")
+                continue
+            if not journal.get("committed"):
+                moves = [(os.path.join(library, src), os.path.join(library, dst)) for src, dst in journal.get("moves", [])]
+                if rollback_moves(moves):
+                    continue
+                print(f"[INFO] {len(moves)} perpindahan file dari batch yang terputus dikembalikan di {library}")
+            trash_dir = journal.get("trash") and os.path.normpath(os.path.join(library, journal["trash"]))
+            # Journal rusak/asing tidak boleh membuat folder di luar trash library terhapus
+            if trash_dir and os.path.dirname(trash_dir) == os.path.normpath(trash_root):
+                self.remove_trash(library, trash_dir)
+            os.remove(journal_path)
+
+    # Entry yang ditandai, atau entry yang dipilih jika tidak ada yang ditandai
+    def batch_targets(self, scene):
+        listed = {item[0] for item in self.listing}
+        targets = sorted(self.marked & listed)
+        if not targets and self.selected(scene) in listed:
+            targets = [self.selected(scene)]
+        return targets
+
+    def mark(self, files=(), clear=False, toggle=False):
+        if clear:
+            self.marked.clear()
+        for file in files:
+            if toggle and file in self.marked:
+                self.marked.discard(file)
+            else:
+                self.marked.add(file)
+        self.marks_version += 1
+
+    def mark_filtered(self, scene):
+        self.mark([self.listing[i][0] for i in self.filtered(scene)])
+
+    # Terapkan batch yang sudah commit ke daftar, index dan icon tanpa scan ulang
+    def apply_batch(self, library, renamed, deleted):
+        entries = self.watch["entries"] if self.watch["path"] == library else {}
+        records = []
+        for record in self.listing:
+            file, file_path, thumb_path, tags = record
+            if file in deleted or file in renamed:
+                self.release_preview_icon(file_path)
+                entry = entries.pop(file, None)
+            if file in deleted:
+                continue
+            if file in renamed:
+                new_file = renamed[file]
+                if entry is not None:
+                    # Rename tidak mengubah mtime dan ukuran
+                    entry["name"] = new_file
+                    entry["thumb"] = new_file if entry["thumb"] else None
+                    entries[new_file] = entry
+                thumb_path = os.path.join(library, THUMB_DIR, new_file) if thumb_path else None
+                record = (new_file, os.path.join(library, new_file), thumb_path, name_tags(new_file))
+            records.append(record)
+        self.listing[:] = records
+        self.mark(clear=True)
+
+        if self.watch["path"] == library:
+            self.write_index(library, entries)
+            try:
+                self.watch["dir_mtime"] = os.stat(library).st_mtime_ns
+            except OSError:
+                pass
+        self.listing_version += 1
+        redraw_browser()
+        # Katalog bone (library_catalog.py) ikut diperbarui
+        update_catalog = bpy.app.driver_namespace.get("raha_library_catalog_update")
+        if update_catalog is not None:
+            update_catalog(library)
+
+    #---------------------------------- Register ----------------------------------
+
+    def register(self):
+        self.icons = previews.new()
+        if not bpy.app.timers.is_registered(self.watch_timer):
+            bpy.app.timers.register(self.watch_timer, first_interval=2.0, persistent=True)
+
+    def unregister(self):
+        self.cancel_scan()
+        for timer in (self.scan_timer, self.watch_timer):
+            if bpy.app.timers.is_registered(timer):
+                bpy.app.timers.unregister(timer)
+        previews.remove(self.icons)
+        self.icons = None
+        self.icon_lru.clear()
+        self.icon_stats.update(hits=0, misses=0, evictions=0, bytes=0)
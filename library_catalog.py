@@ -0,0 +1,434 @@
+import bpy
+import os
+import re
+import ast
+import json
+import struct
+import sqlite3
+import threading
+from bpy.props import StringProperty, EnumProperty
+
+#============================ Katalog library (SQLite) ============================
+# <library>/.library_catalog.sqlite menyimpan setiap klip (ANIM_DATA) dan pose (data_pose)
+# beserta nama bone-nya, dengan inverted index bone -> entry. Panel browser memakai
+# draw_catalog_matches (lewat bpy.app.driver_namespace) untuk menampilkan entry yang paling
+# cocok dengan bone terpilih / bone armature aktif. Query tidak pernah dijalankan di draw(): panel
+# hanya membaca hasil terakhir, query baru dijalankan timer dengan busy timeout pendek. Export, rename
+# dan delete di script lain memanggil update lewat CATALOG_UPDATE_KEY.
+
+CATALOG_NAME = ".library_catalog.sqlite"
+CATALOG_VERSION = 1
+CATALOG_DRAW_KEY = "raha_library_catalog_draw"
+CATALOG_UPDATE_KEY = "raha_library_catalog_update"
+MATCH_LIMIT = 8
+QUERY_TIMEOUT = 0.05  # Detik; jika thread update memegang lock, query dicoba lagi di tick berikutnya
+QUERY_RETRY = 0.2
+
+ANM_MAGIC = b"RRAN"
+ANM_EXT = ".anm"
+ANM_PREFIX = struct.Struct("<4sHI")
+POSE_MAGIC = b"RRPS"
+POSE_EXT = ".pose"
+
+# (kind, folder, ekstensi data) yang dikatalogkan
+CATALOG_SOURCES = (
+    ("clip", "ANIM_DATA", (".json", ANM_EXT, ".py")),
+    ("pose", "data_pose", (".json", POSE_EXT, ".py")),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    armature TEXT,
+    bone_count INTEGER NOT NULL,
+    UNIQUE (kind, name)
+);
+CREATE TABLE IF NOT EXISTS bones (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS entry_bones (
+    bone_id INTEGER NOT NULL,
+    entry_id INTEGER NOT NULL,
+    PRIMARY KEY (bone_id, entry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entry_bones_entry ON entry_bones (entry_id);
+"""
+
+_connections = {}  # library -> koneksi untuk query di main thread
+_updates = {}  # library -> thread update yang sedang berjalan
+_pending_updates = set()  # library yang berubah saat update-nya masih berjalan
+_generation = {}  # library -> naik setiap update selesai (invalidasi cache hasil)
+_match_cache = {"key": None, "results": [], "request": None}
+
+
+def catalog_path(library):
+    return os.path.join(library, CATALOG_NAME)
+
+
+def connect_catalog(library, timeout=5.0):
+    conn = sqlite3.connect(catalog_path(library), timeout=timeout)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != CATALOG_VERSION:
+        conn.executescript("DROP TABLE IF EXISTS entry_bones; DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS bones;")
+        conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def query_connection(library):
+    conn = _connections.get(library)
+    if conn is None:
+        conn = connect_catalog(library, QUERY_TIMEOUT)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_bones (name TEXT PRIMARY KEY)")
+        _connections[library] = conn
+    return conn
+
+
+#============================ Ambil nama bone dari file data ============================
+def read_json_meta(filepath):
+    with open(filepath, 'r') as file:
+        data = json.load(file)
+    # Sidecar klip menyimpan metadata di "meta", metadata pose langsung di root
+    return data.get("meta") if "meta" in data or "curves" in data else data
+
+
+def read_anm_header(filepath, expected=ANM_MAGIC):
+    # Klip .anm dan pose .pose memakai prefix yang sama (magic, versi, ukuran header JSON)
+    with open(filepath, 'rb') as file:
+        magic, _version, header_size = ANM_PREFIX.unpack(file.read(ANM_PREFIX.size))
+        if magic != expected:
+            raise ValueError(f"Bukan file ANIM_DATA binary: {filepath}")
+        return json.loads(file.read(header_size).decode("utf-8"))
+
+
+def read_script_bones(kind, filepath):
+    with open(filepath, 'r') as file:
+        content = file.read()
+    if kind == "clip":
+        return list(dict.fromkeys(re.findall(r"armature_obj\.pose\.bones\[\'([^\']+)\'\]", content)))
+    for node in ast.walk(ast.parse(content)):
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.List)
+                and any(isinstance(t, ast.Name) and t.id == "registered_bones" for t in node.targets)):
+            return [elt.value for elt in node.value.elts if isinstance(elt, ast.Constant) and isinstance(elt.value, str)]
+    return []
+
+
+def extract_entry(kind, folder, name, exts):
+    """Kembalikan (armature, bones) dari file data yang paling ringan dibaca."""
+    for ext in exts:
+        filepath = os.path.join(folder, name + ext)
+        if not os.path.exists(filepath):
+            continue
+        try:
+            if ext == ".json":
+                meta = read_json_meta(filepath)
+            elif ext == ANM_EXT:
+                meta = read_anm_header(filepath)
+            elif ext == POSE_EXT:
+                meta = read_anm_header(filepath, POSE_MAGIC)
+            else:
+                return None, read_script_bones(kind, filepath)
+        except (OSError, ValueError, SyntaxError, struct.error) as e:
+            print(f"[WARNING] Katalog: gagal membaca {filepath}: {e}")
+            continue
+        if meta and meta.get("bones"):
+            return meta.get("armature"), list(meta["bones"])
+    return None, []
+
+
+def scan_sources(library):
+    """{(kind, name): signature}; signature = ekstensi + mtime + size semua file data entry."""
+    found = {}
+    for kind, folder_name, exts in CATALOG_SOURCES:
+        folder = os.path.join(library, folder_name)
+        if not os.path.isdir(folder):
+            continue
+        with os.scandir(folder) as items:
+            for item in items:
+                name, ext = os.path.splitext(item.name)
+                if ext not in exts or not item.is_file():
+                    continue
+                stat = item.stat()
+                found.setdefault((kind, name), []).append(f"{ext}:{stat.st_mtime_ns}:{stat.st_size}")
+    return {key: "|".join(sorted(parts)) for key, parts in found.items()}
+
+
+def update_catalog(library):
+    """Sinkronkan katalog dengan ANIM_DATA dan data_pose. Hanya entry yang file-nya berubah yang dibaca ulang."""
+    conn = connect_catalog(library)
+    try:
+        known = {(kind, name): (entry_id, signature)
+                 for entry_id, kind, name, signature in conn.execute("SELECT id, kind, name, signature FROM entries")}
+        found = scan_sources(library)
+        folders = {kind: (os.path.join(library, folder_name), exts) for kind, folder_name, exts in CATALOG_SOURCES}
+        changed = 0
+        with conn:
+            for (kind, name), signature in found.items():
+                old = known.pop((kind, name), None)
+                if old is not None and old[1] == signature:
+                    continue
+                folder, exts = folders[kind]
+                armature, bones = extract_entry(kind, folder, name, exts)
+                if old is not None:
+                    entry_id = old[0]
+                    conn.execute("DELETE FROM entry_bones WHERE entry_id = ?", (entry_id,))
+                    conn.execute("UPDATE entries SET signature = ?, armature = ?, bone_count = ? WHERE id = ?",
+                                 (signature, armature, len(set(bones)), entry_id))
+                else:
+                    entry_id = conn.execute(
+                        "INSERT INTO entries (kind, name, signature, armature, bone_count) VALUES (?, ?, ?, ?, ?)",
+                        (kind, name, signature, armature, len(set(bones)))).lastrowid
+                conn.executemany("INSERT OR IGNORE INTO bones (name) VALUES (?)", ((bone,) for bone in bones))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO entry_bones (bone_id, entry_id) SELECT id, ? FROM bones WHERE name = ?",
+                    ((entry_id, bone) for bone in bones))
+                changed += 1
+
+            # Entry yang file-nya sudah tidak ada
+            for entry_id, _signature in known.values():
+                conn.execute("DELETE FROM entry_bones WHERE entry_id = ?", (entry_id,))
+                conn.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+        return {"entries": len(found), "changed": changed, "removed": len(known)}
+    finally:
+        conn.close()
+
+
+def query_catalog(library, bone_names, kind, mode='SELECTED', limit=MATCH_LIMIT):
+    """Entry diurutkan berdasarkan overlap bone.
+
+    SELECTED: skor Jaccard antara bone entry dan bone terpilih.
+    ARMATURE: bagian bone entry yang ada di armature (entry yang bisa diterapkan penuh di atas).
+    """
+    if not bone_names:
+        return []
+    conn = query_connection(library)
+    conn.execute("DELETE FROM query_bones")
+    conn.executemany("INSERT OR IGNORE INTO query_bones (name) VALUES (?)", ((name,) for name in bone_names))
+    if mode == 'SELECTED':
+        score = "CAST(COUNT(*) AS REAL) / (e.bone_count + ? - COUNT(*))"
+        params = (kind, len(set(bone_names)), limit)
+    else:
+        score = "CAST(COUNT(*) AS REAL) / e.bone_count"
+        params = (kind, limit)
+    # CROSS JOIN memaksa urutan query_bones -> bones -> entry_bones -> entries (lewat inverted index);
+    # tanpa itu SQLite bisa mulai dari seluruh entries karena temp table tidak punya statistik.
+    # Parameter urut sesuai posisinya di query: kind (WHERE), jumlah bone query (skor SELECTED), limit
+    rows = conn.execute(f"""
+        SELECT e.name, e.armature, COUNT(*) AS hits, e.bone_count
+        FROM query_bones q
+        CROSS JOIN bones b ON b.name = q.name
+        CROSS JOIN entry_bones eb ON eb.bone_id = b.id
+        CROSS JOIN entries e ON e.id = eb.entry_id
+        WHERE e.kind = ?
+        GROUP BY e.id
+        ORDER BY {score} DESC, hits DESC, e.name
+        LIMIT ?
+    """, params).fetchall()
+    conn.commit()  # Tutup transaksi agar update di thread lain tidak terkunci
+    return rows
+
+
+#============================ Update di background ============================
+def start_catalog_update(library):
+    if library in _updates:
+        _pending_updates.add(library)  # Jalankan sekali lagi setelah update ini selesai
+        return False
+
+    def run():
+        try:
+            result = update_catalog(library)
+            print(f"[INFO] Katalog {library}: {result['entries']} entry, "
+                  f"{result['changed']} dibaca ulang, {result['removed']} dihapus")
+        except (OSError, sqlite3.Error) as e:
+            print(f"[ERROR] Gagal memperbarui katalog {library}: {e}")
+
+    thread = threading.Thread(target=run, daemon=True)
+    _updates[library] = thread
+    thread.start()
+    if not bpy.app.timers.is_registered(poll_catalog_updates):
+        bpy.app.timers.register(poll_catalog_updates, first_interval=0.2)
+    return True
+
+
+def request_catalog_update(library):
+    """Dipanggil setelah export/rename/delete; hanya library yang sudah punya katalog."""
+    library = bpy.path.abspath(library)
+    if os.path.exists(catalog_path(library)):
+        start_catalog_update(library)
+
+
+def redraw_view3d():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+def poll_catalog_updates():
+    for library, thread in list(_updates.items()):
+        if not thread.is_alive():
+            del _updates[library]
+            _generation[library] = _generation.get(library, 0) + 1
+            if library in _pending_updates:
+                _pending_updates.discard(library)
+                start_catalog_update(library)
+    redraw_view3d()
+    return 0.2 if _updates else None
+
+
+#============================ Tampilan di panel browser ============================
+def query_bone_names(context, mode):
+    if mode == 'SELECTED':
+        return [bone.name for bone in (context.selected_pose_bones or [])]
+    obj = context.active_object
+    if obj is None or obj.type != 'ARMATURE':
+        return []
+    return [bone.name for bone in obj.data.bones]
+
+
+def run_catalog_query():
+    """Timer: jalankan query terbaru yang diminta panel, ulangi jika katalog sedang dikunci."""
+    request = _match_cache["request"]
+    if request is None:
+        return None
+    key, library, bone_names, kind, mode = request
+    try:
+        results = query_catalog(library, bone_names, kind, mode)
+    except sqlite3.OperationalError as e:
+        if "locked" in str(e):
+            return QUERY_RETRY
+        print(f"[ERROR] Query katalog gagal: {e}")
+        results = []
+    except sqlite3.Error as e:
+        print(f"[ERROR] Query katalog gagal: {e}")
+        results = []
+    _match_cache.update(key=key, results=results)
+    if _match_cache["request"] is request:
+        _match_cache["request"] = None
+    redraw_view3d()
+    return 0.0 if _match_cache["request"] is not None else None
+
+
+def catalog_matches(context, library, kind):
+    """(hasil terakhir, masih mencari). Hasil di-cache per library, set bone, mode dan versi katalog
+    (generation + mtime file); query baru hanya dijadwalkan, tidak dijalankan di draw()."""
+    mode = context.scene.sna_catalog_match
+    bone_names = query_bone_names(context, mode)
+    try:
+        catalog_mtime = os.stat(catalog_path(library)).st_mtime_ns
+    except OSError:
+        catalog_mtime = None
+    key = (library, kind, mode, _generation.get(library, 0), catalog_mtime, frozenset(bone_names))
+    if _match_cache["key"] == key:
+        return _match_cache["results"], False
+    request = _match_cache["request"]
+    if request is None or request[0] != key:
+        _match_cache["request"] = (key, library, bone_names, kind, mode)
+        if not bpy.app.timers.is_registered(run_catalog_query):
+            bpy.app.timers.register(run_catalog_query, first_interval=0.0)
+    return _match_cache["results"], True
+
+
+def draw_catalog_matches(layout, context, kind):
+    library = bpy.path.abspath(context.scene.sna_custom_path)
+    box = layout.box()
+    row = box.row(align=True)
+    row.label(text="Matching Bones", icon='BONE_DATA')
+    row.prop(context.scene, "sna_catalog_match", text="")
+    row.operator("wm.library_catalog_update", text="", icon='FILE_REFRESH')
+
+    if not library or not os.path.isdir(library):
+        return
+    if library in _updates:
+        box.label(text="Updating catalog...", icon='TIME')
+    if not os.path.exists(catalog_path(library)):
+        if library not in _updates:
+            box.label(text="No catalog yet, press refresh.")
+        return
+
+    results, searching = catalog_matches(context, library, kind)
+    if searching:
+        box.label(text="Searching...", icon='TIME')
+    elif not results:
+        box.label(text="No matching entries.")
+    for name, armature, hits, bone_count in results:
+        row = box.row(align=True)
+        op = row.operator("wm.library_catalog_pick", text=name, emboss=False)
+        op.kind = kind
+        op.name = name
+        row.label(text=f"{hits}/{bone_count}" + (f"  {armature}" if armature else ""))
+
+
+class WM_OT_LibraryCatalogUpdate(bpy.types.Operator):
+    bl_idname = "wm.library_catalog_update"
+    bl_label = "Update Library Catalog"
+    bl_description = "Index the bone names of all clips and poses in the library folder"
+
+    def execute(self, context):
+        library = bpy.path.abspath(context.scene.sna_custom_path)
+        if not library or not os.path.isdir(library):
+            self.report({'ERROR'}, "Invalid or no folder selected.")
+            return {'CANCELLED'}
+        if not start_catalog_update(library):
+            self.report({'INFO'}, "Catalog update already running.")
+        return {'FINISHED'}
+
+
+class WM_OT_LibraryCatalogPick(bpy.types.Operator):
+    bl_idname = "wm.library_catalog_pick"
+    bl_label = "Show in Browser"
+    bl_description = "Filter the browser to this entry and select it"
+
+    kind: StringProperty()
+    name: StringProperty()
+
+    def execute(self, context):
+        scene = context.scene
+        prefix = "sna_video" if self.kind == "clip" else "sna_image"
+        if not hasattr(scene, f"{prefix}_filter"):
+            return {'CANCELLED'}
+        setattr(scene, f"{prefix}_filter", self.name)
+        try:
+            setattr(scene, f"{prefix}s", f"{self.name}.png")
+        except TypeError:
+            self.report({'WARNING'}, f"{self.name} has no preview image in the browser.")
+        return {'FINISHED'}
+
+
+def register():
+    bpy.types.Scene.sna_catalog_match = EnumProperty(
+        name="Match",
+        description="Bone set the library entries are ranked against",
+        items=[
+            ('SELECTED', "Selected Bones", "Rank by overlap with the selected pose bones"),
+            ('ARMATURE', "Armature", "Rank by how much of each entry exists in the active armature"),
+        ],
+        default='SELECTED'
+    )
+    bpy.utils.register_class(WM_OT_LibraryCatalogUpdate)
+    bpy.utils.register_class(WM_OT_LibraryCatalogPick)
+    bpy.app.driver_namespace[CATALOG_DRAW_KEY] = draw_catalog_matches
+    bpy.app.driver_namespace[CATALOG_UPDATE_KEY] = request_catalog_update
+
+
+def unregister():
+    bpy.app.driver_namespace.pop(CATALOG_DRAW_KEY, None)
+    bpy.app.driver_namespace.pop(CATALOG_UPDATE_KEY, None)
+    for timer in (poll_catalog_updates, run_catalog_query):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    _pending_updates.clear()
+    for conn in _connections.values():
+        conn.close()
+    _connections.clear()
+    _match_cache.update(key=None, results=[], request=None)
+    bpy.utils.unregister_class(WM_OT_LibraryCatalogPick)
+    bpy.utils.unregister_class(WM_OT_LibraryCatalogUpdate)
+    del bpy.types.Scene.sna_catalog_match
+
+
+if __name__ == "__main__":
+    register()
@@ -1,127 +1,145 @@
 import os
 import ast  # Tambahkan ini
+import math
+import operator
 import bpy
+import gpu
 from bpy.types import Operator
 
 import bpy
 import json
 import os
+import hashlib
+import contextlib
+import runpy
+import struct
+from array import array
 from bpy_extras.io_utils import ExportHelper, ImportHelper
-from bpy.props import StringProperty, BoolProperty, FloatProperty, EnumProperty
+from bpy.props import StringProperty, BoolProperty, FloatProperty, EnumProperty, IntProperty
 from bpy.types import Operator, Panel
 from bpy.utils import previews
+from bpy.app.handlers import persistent
+
+# Scan, watcher, cache icon LRU, tampilan per halaman, tanda dan rename/hapus massal dengan journal
+# dipakai bersama browser klip (library_browser.py), dimuat lewat path seperti anim_lib_cli.py memuat
+# save_anm.py: script add-on dijalankan terpisah dan tidak bisa saling import
+_library_browser = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "library_browser.py"),
+                                  run_name="library_browser")
+INVALID_NAME = _library_browser["INVALID_NAME"]
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+# Semua file milik satu pose: gambar, data/script dan metadata di data_pose
+def pose_entry_paths(library, file):
+    name = os.path.splitext(file)[0]
+    paths = [os.path.join(library, file)]
+    paths += [os.path.join(library, "data_pose", name + ext) for ext in (POSE_EXT, '.py', '.json')]
+    return paths
+
+# Daftar pose di library: browser.listing berisi (file, file_path, None, tags); pose tidak punya index
+# atau thumbnail, icon dimuat dari gambarnya sendiri
+browser = _library_browser["LibraryBrowser"](
+    "sna_image", IMAGE_EXTS, pose_entry_paths, journal_name=".pose_journal", trash_dir=".pose_trash")
+
+# Enum property for the images (nomor enum dari nama file, jadi pilihan tetap saat pindah halaman)
+def sna_images_enum_items(self, context):
+    return browser.enum_items(context.scene if context else bpy.context.scene)
 
-# Global variables for image previews
-_icons = None
-_image_paths = []
-
-# Function to load images from a custom path
-def load_images_from_path(path):
-    global _image_paths
-    _image_paths.clear()
-    
-    if os.path.exists(path) and os.path.isdir(path):
-        for file in os.listdir(path):
-            if file.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
-                _image_paths.append((file, file, "", load_preview_icon(os.path.join(path, file))))
-
-
-# Function to load a preview icon
-def load_preview_icon(path):
-    global _icons
-    if path not in _icons:
-        if os.path.exists(path):
-            _icons.load(path, path, "IMAGE")
-        else:
-            return 0
-    return _icons[path].icon_id
+# Tag yang paling sering muncul
+def sna_image_tag_items(self, context):
+    return browser.tag_items()
 
-#=================================== rename ================================================
-# Enum property for the images 
-def sna_images_enum_items(self, context):
-    return [(item[0], item[1], item[2], item[3], i) for i, item in enumerate(_image_paths)]
+# Kembali ke halaman pertama saat filter berubah
+def sna_update_image_filter(self, context):
+    if self.sna_image_page != 1:
+        self.sna_image_page = 1
 
 # Update function for the custom path property
 def sna_update_custom_path(self, context):
     custom_path = bpy.context.scene.sna_custom_path
-    load_images_from_path(custom_path)
+    browser.load_from_path(custom_path)
 
 class RenameImageAndScript(Operator):
     bl_idname = "wm.rename_image_and_script"
     bl_label = "Rename Image and Script"
+    bl_description = "Rename the selected pose, or find and replace in the names of the marked poses"
     
     new_name: StringProperty(
         name="New Name",
         description="New name for the image and script",
         default=""
     )
+    find: StringProperty(name="Find", description="Text to replace in the names of the marked poses")
+    replace: StringProperty(name="Replace", description="Replacement text")
 
     def invoke(self, context, event):
-        selected_image = context.scene.sna_images
-        if not selected_image:
+        targets = browser.batch_targets(context.scene)
+        if not targets:
             self.report({'WARNING'}, "No image selected.")
             return {'CANCELLED'}
 
-        self.new_name = os.path.splitext(selected_image)[0]
+        self.new_name = os.path.splitext(targets[0])[0]
         return context.window_manager.invoke_props_dialog(self)
 
-    def execute(self, context):
-        selected_image = context.scene.sna_images
-        if not selected_image:
-            self.report({'WARNING'}, "No image selected.")
-            return {'CANCELLED'}
+    def draw(self, context):
+        targets = browser.batch_targets(context.scene)
+        if len(targets) > 1:
+            self.layout.label(text=f"{len(targets)} marked poses")
+            self.layout.prop(self, "find")
+            self.layout.prop(self, "replace")
+        else:
+            self.layout.prop(self, "new_name")
 
+    def execute(self, context):
         custom_path = context.scene.sna_custom_path
         if not custom_path:
             self.report({'ERROR'}, "No folder selected.")
             return {'CANCELLED'}
+        if browser.scan_job is not None:
+            self.report({'ERROR'}, "The library is still being scanned.")
+            return {'CANCELLED'}
+        targets = browser.batch_targets(context.scene)
+        if not targets:
+            self.report({'WARNING'}, "No image selected.")
+            return {'CANCELLED'}
 
-        old_name = os.path.splitext(selected_image)[0]
-        new_name = self.new_name
-
-        # Path untuk gambar lama dan baru
-        old_image_path = os.path.join(custom_path, selected_image)
-        new_image_path = os.path.join(custom_path, f"{new_name}.png")
-
-        # Path untuk script lama dan baru
-        data_pose_folder = os.path.join(custom_path, "data_pose")
-        old_script_path = os.path.join(data_pose_folder, f"{old_name}.py")
-        new_script_path = os.path.join(data_pose_folder, f"{new_name}.py")
-
-        # Rename gambar
-        if os.path.exists(old_image_path):
-            try:
-                os.rename(old_image_path, new_image_path)
-                self.report({'INFO'}, f"Renamed image: {old_image_path} to {new_image_path}")
-            except Exception as e:
-                self.report({'ERROR'}, f"Failed to rename image: {str(e)}")
-        else:
-            self.report({'WARNING'}, f"No matching image found: {old_image_path}")
+        # Nama baru per pose
+        new_names = {}
+        for file in targets:
+            old_name = os.path.splitext(file)[0]
+            new_name = self.new_name if len(targets) == 1 else (old_name.replace(self.find, self.replace) if self.find else old_name)
+            if new_name != old_name:
+                new_names[file] = new_name.strip()
+        if not new_names:
+            self.report({'WARNING'}, "Nothing to rename.")
+            return {'CANCELLED'}
+        for new_name in new_names.values():
+            if not new_name or INVALID_NAME.search(new_name):
+                self.report({'ERROR'}, f"Invalid name: '{new_name}'.")
+                return {'CANCELLED'}
+
+        # Gambar, script dan metadata semua pose dalam satu transaksi
+        moves = []
+        renamed = {}
+        for file, new_name in new_names.items():
+            old_name, ext = os.path.splitext(file)
+            renamed[file] = new_name + ext
+            for src in browser.entry_files(custom_path, file):
+                moves.append((src, os.path.join(os.path.dirname(src), new_name + os.path.basename(src)[len(old_name):])))
+
+        error = browser.run_file_transaction(custom_path, moves)
+        if error:
+            self.report({'ERROR'}, f"Rename failed: {error}")
+            return {'CANCELLED'}
 
-        # Rename script
-        if os.path.exists(old_script_path):
+        selected = context.scene.sna_images
+        browser.apply_batch(custom_path, renamed, set())
+        if selected in renamed:
             try:
-                os.rename(old_script_path, new_script_path)
-                self.report({'INFO'}, f"Renamed script: {old_script_path} to {new_script_path}")
-            except Exception as e:
-                self.report({'ERROR'}, f"Failed to rename script: {str(e)}")
-        else:
-            self.report({'WARNING'}, f"No matching script found: {old_script_path}")
-
-        # Refresh daftar gambar
-        self.refresh_images(context)
-
+                context.scene.sna_images = renamed[selected]
+            except TypeError:
+                pass  # Pindah ke halaman lain
+        self.report({'INFO'}, f"Renamed {len(renamed)} pose(s), {len(moves)} files.")
         return {'FINISHED'}
-
-    def refresh_images(self, context):
-        """Memuat ulang daftar gambar setelah rename."""
-        custom_path = context.scene.sna_custom_path
-        
-        if custom_path and os.path.isdir(custom_path):
-            load_images_from_path(custom_path)  # Reload daftar gambar
-            self.report({'INFO'}, "Image list refreshed.")
-        else:
-            self.report({'ERROR'}, "Invalid or no folder selected.")
                 
 #===================================================================================================
 # Operator to refresh the image list
@@ -134,8 +152,8 @@ class WM_OT_RefreshImageList(bpy.types.Operator):
         custom_path = context.scene.sna_custom_path
         
         if custom_path and os.path.isdir(custom_path):
-            load_images_from_path(custom_path)  # Reload images from the custom path
-            self.report({'INFO'}, "Image list refreshed.")
+            browser.load_from_path(custom_path)  # Scan ulang di background
+            self.report({'INFO'}, "Refreshing image list...")
         else:
             self.report({'ERROR'}, "Invalid or no folder selected.")
         
@@ -148,69 +166,72 @@ class WM_OT_RefreshImageList(bpy.types.Operator):
 class DeleteBonePose(Operator):
     bl_idname = "delete.bone_pose"
     bl_label = "Delete Bone Pose"
-    filename_ext = ".png"  # Menerima file PNG untuk dipilih
+    bl_description = "Delete the marked poses (or the selected one) with their script and metadata"
     
-    def execute(self, context):        
-        selected_image = context.scene.sna_images
-        if not selected_image:
-            self.report({'WARNING'}, "No image selected.")
-            return {'CANCELLED'}
+    def invoke(self, context, event):
+        return context.window_manager.invoke_confirm(self, event)
 
+    def execute(self, context):        
         custom_path = context.scene.sna_custom_path
         if not custom_path:
             self.report({'ERROR'}, "No folder selected.")
             return {'CANCELLED'}
+        if browser.scan_job is not None:
+            self.report({'ERROR'}, "The library is still being scanned.")
+            return {'CANCELLED'}
+        targets = browser.batch_targets(context.scene)
+        if not targets:
+            self.report({'WARNING'}, "No image selected.")
+            return {'CANCELLED'}
 
-        image_name = os.path.splitext(selected_image)[0]
-        data_pose_folder = os.path.join(custom_path, "data_pose")  # Menentukan folder data_pose
-        script_path = os.path.join(data_pose_folder, f"{image_name}.py")  # Path skrip
-        image_path = os.path.join(custom_path, selected_image)  # Path gambar
+        # Pindah ke trash dulu supaya batch masih bisa dikembalikan
+        trash_dir = browser.new_trash_dir(custom_path)
+        moves = [(src, os.path.join(trash_dir, os.path.relpath(src, custom_path)))
+                 for file in targets for src in browser.entry_files(custom_path, file)]
 
-        # Hapus file skrip jika ada
-        if os.path.exists(script_path):
-            try:
-                os.remove(script_path)
-                self.report({'INFO'}, f"Deleted script: {script_path}")
-            except Exception as e:
-                self.report({'ERROR'}, f"Failed to delete script: {str(e)}")
-        else:
-            self.report({'WARNING'}, f"No matching script found for image: {image_name}")
+        error = browser.run_file_transaction(custom_path, moves, trash_dir)
+        if error:
+            self.report({'ERROR'}, f"Delete failed: {error}")
+            return {'CANCELLED'}
 
-        # Hapus file gambar jika ada
-        if os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-                self.report({'INFO'}, f"Deleted image: {image_path}")
-            except Exception as e:
-                self.report({'ERROR'}, f"Failed to delete image: {str(e)}")
-        else:
-            self.report({'WARNING'}, f"No matching image found: {image_path}")
+        browser.apply_batch(custom_path, {}, set(targets))
+        self.report({'INFO'}, f"Deleted {len(targets)} pose(s), {len(moves)} files.")
+        return {'FINISHED'}
 
-        # Refresh daftar gambar
-        self.refresh_images(context)  # Panggil metode refresh setelah delete
+class MarkBonePose(Operator):
+    bl_idname = "wm.mark_bone_pose"
+    bl_label = "Mark Poses"
+    bl_description = "Mark poses for batch rename and delete"
+
+    action: EnumProperty(
+        name="Action",
+        items=[('TOGGLE', "Toggle", "Mark or unmark the selected pose"),
+               ('FILTERED', "Mark Filtered", "Mark every pose matching the filter and tag"),
+               ('CLEAR', "Clear", "Unmark all poses")],
+        default='TOGGLE'
+    )
 
-        return {'FINISHED'}
-    
-    def refresh_images(self, context):
-        """Memuat ulang daftar gambar setelah penghapusan."""
-        custom_path = context.scene.sna_custom_path
-        
-        if custom_path and os.path.isdir(custom_path):
-            load_images_from_path(custom_path)  # Reload daftar gambar
-            self.report({'INFO'}, "Image list refreshed.")
+    def execute(self, context):
+        scene = context.scene
+        if self.action == 'TOGGLE':
+            if scene.sna_images:
+                browser.mark([scene.sna_images], toggle=True)
+        elif self.action == 'FILTERED':
+            browser.mark_filtered(scene)
         else:
-            self.report({'ERROR'}, "Invalid or no folder selected.")
+            browser.mark(clear=True)
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+        return {'FINISHED'}
 
 
 #===================================================================================================
 
 def flip_selected_pose(context):
-    """Flip the pose for selected bones"""
-    try:
-        bpy.ops.pose.copy()  # Copy selected pose
-        bpy.ops.pose.paste(flipped=True)  # Paste flipped pose
-    except RuntimeError:
-        context.report({'WARNING'}, "Flip Pose failed. Ensure you're in Pose Mode and bones are selected.")
+    """Flip the pose for selected bones (like copy + paste flipped). Returns the number of bones written."""
+    obj = context.object
+    return flip_pose_bones(obj, [bone.name for bone in context.selected_pose_bones or []])
 
 def serialize_custom_properties(bone):
     custom_props = {}
@@ -229,6 +250,590 @@ def serialize_custom_properties(bone):
 
     return custom_props if custom_props else None  # Return None if empty
 
+# Metadata pose (data_pose/<name>.json) agar Select/Import cukup membaca file kecil ini,
+# tanpa membuka dan mem-parse script pose. Pose tidak punya rentang frame: "frame" hanya frame asal
+# pose diambil. frame_start/frame_end khusus metadata klip (sidecar ANIM_DATA), jadi klip satu frame
+# tetap bisa dibedakan dari pose
+def pose_meta(obj, registered_bones, bone_data):
+    scene = bpy.context.scene
+    content = json.dumps(bone_data, sort_keys=True)
+    return {
+        "armature": obj.name,
+        "bones": registered_bones,
+        "frame": scene.frame_current,
+        "fps": scene.render.fps / scene.render.fps_base,
+        "rotation_modes": {name: obj.pose.bones[name].rotation_mode for name in registered_bones},
+        "hash": hashlib.sha1(content.encode("utf-8")).hexdigest(),
+    }
+
+# Entry yang di-link ke store dedup (library_store.py) dipakai bersama pose lain: hapus nama ini
+# dulu supaya export membuat file baru, bukan mengubah blob bersama
+def detach_store_link(filepath):
+    try:
+        if os.stat(filepath).st_nlink > 1:
+            os.remove(filepath)
+    except OSError:
+        pass
+
+def read_pose_meta(meta_path):
+    try:
+        with open(meta_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+# Format pose data-only (data_pose/<name>.pose): prefix + header JSON (nama bone, channel, custom
+# property) + float32 per channel berurutan (semua bone untuk location, lalu rotation_quaternion, ...).
+# Import tidak menjalankan kode: nama bone dipetakan ke index pose.bones sekali, lalu tiap channel
+# ditulis untuk semua bone sekaligus dengan foreach_get/foreach_set
+POSE_MAGIC = b"RRPS"
+POSE_VERSION = 1
+POSE_EXT = ".pose"
+POSE_PREFIX = struct.Struct("<4sHI")
+POSE_CHANNELS = (("location", 3), ("rotation_quaternion", 4), ("rotation_euler", 3), ("scale", 3))
+
+def write_pose_data(filepath, bone_names, channels, custom_properties):
+    header = {
+        "version": POSE_VERSION,
+        "bones": bone_names,
+        "channels": [[name, width] for name, width in POSE_CHANNELS],
+        "custom_properties": custom_properties,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    with open(filepath, 'wb') as file:
+        file.write(POSE_PREFIX.pack(POSE_MAGIC, POSE_VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for name, _width in POSE_CHANNELS:
+            file.write(channels[name].tobytes())
+
+def read_pose_header(filepath):
+    with open(filepath, 'rb') as file:
+        magic, _version, header_size = POSE_PREFIX.unpack(file.read(POSE_PREFIX.size))
+        if magic != POSE_MAGIC:
+            raise ValueError(f"Bukan file pose: {filepath}")
+        return json.loads(file.read(header_size).decode("utf-8"))
+
+def read_pose_data(filepath):
+    """(header, {channel: array float32 len(bones) * lebar})"""
+    with open(filepath, 'rb') as file:
+        data = file.read()
+    magic, version, header_size = POSE_PREFIX.unpack_from(data, 0)
+    if magic != POSE_MAGIC:
+        raise ValueError(f"Bukan file pose: {filepath}")
+    if version > POSE_VERSION:
+        raise ValueError(f"Versi pose {version} lebih baru dari yang didukung ({POSE_VERSION})")
+    position = POSE_PREFIX.size + header_size
+    header = json.loads(data[POSE_PREFIX.size:position].decode("utf-8"))
+    channels = {}
+    for name, width in header["channels"]:
+        column = array('f')
+        size = column.itemsize * width * len(header["bones"])
+        column.frombytes(data[position:position + size])
+        channels[name] = column
+        position += size
+    return header, channels
+
+def read_pose_script(script_path):
+    """Pose lama (script .py) dibaca sebagai data lewat AST, tanpa exec."""
+    with open(script_path, 'r') as file:
+        tree = ast.parse(file.read(), filename=script_path)
+    bone_data = {}
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict)
+                and any(isinstance(t, ast.Name) and t.id == "bone_data" for t in node.targets)):
+            bone_data = ast.literal_eval(node.value)
+            break
+    bone_names = list(bone_data)
+    channels = {name: array('f', [0.0]) * (width * len(bone_names)) for name, width in POSE_CHANNELS}
+    for i, bone_name in enumerate(bone_names):
+        for name, width in POSE_CHANNELS:
+            channels[name][i * width:(i + 1) * width] = array('f', bone_data[bone_name][name])
+    custom_properties = {name: data["custom_properties"] for name, data in bone_data.items() if data.get("custom_properties")}
+    header = {"bones": bone_names, "custom_properties": custom_properties}
+    return header, channels
+
+# Nama bone -> index di pose.bones per armature, dibuat ulang hanya jika daftar bone berubah.
+# Key dari nama (bukan as_pointer(): alamat bisa dipakai ulang objek lain), dikosongkan saat load/undo/redo
+_bone_index_cache = {}
+
+def bone_index_map(obj):
+    names = obj.pose.bones.keys()
+    key = obj.name
+    cached = _bone_index_cache.get(key)
+    if cached is None or cached[0] != names:
+        cached = (names, {name: i for i, name in enumerate(names)})
+        _bone_index_cache[key] = cached
+    return cached[1]
+
+def read_pose_channels(obj, pose_channels=POSE_CHANNELS):
+    """Nilai channel semua bone armature: {channel: array float32}."""
+    count = len(obj.pose.bones)
+    channels = {}
+    for name, width in pose_channels:
+        column = array('f', [0.0]) * (count * width)
+        obj.pose.bones.foreach_get(name, column)
+        channels[name] = column
+    return channels
+
+def apply_pose_data(obj, header, channels, bone_names):
+    """Tulis pose ke bone `bone_names` yang ada di pose; satu foreach_set per channel. Mengembalikan jumlah bone."""
+    index = bone_index_map(obj)
+    wanted = set(bone_names)
+    pairs = [(i, index[name]) for i, name in enumerate(header["bones"]) if name in wanted and name in index]
+    if not pairs:
+        return 0
+
+    current = read_pose_channels(obj)
+    for name, width in POSE_CHANNELS:
+        source, target = channels[name], current[name]
+        for src, dst in pairs:
+            target[dst * width:(dst + 1) * width] = source[src * width:(src + 1) * width]
+        obj.pose.bones.foreach_set(name, target)
+
+    # Custom property tidak bisa lewat foreach_set: hanya bone yang punya saja
+    pose_bones = obj.pose.bones
+    for bone_name, props in header.get("custom_properties", {}).items():
+        if bone_name in wanted and bone_name in index:
+            bone = pose_bones[index[bone_name]]
+            for prop, value in props.items():
+                bone[prop] = value
+    obj.update_tag(refresh={'DATA'})
+    return len(pairs)
+
+def pose_entry_path(custom_path, image_name):
+    """data_pose/<name>.pose, atau script pose lama jika hanya itu yang ada."""
+    pose_path = os.path.join(custom_path, "data_pose", f"{image_name}{POSE_EXT}")
+    script_path = os.path.join(custom_path, "data_pose", f"{image_name}.py")
+    if os.path.exists(pose_path):
+        return pose_path
+    if os.path.exists(script_path):
+        return script_path
+    raise FileNotFoundError(f"No matching pose data found: {pose_path}")
+
+# Tabel mirror kiri/kanan per armature: pasangan nama dari bpy.utils.flip_name dan aturan tanda per
+# channel (mirror sumbu X di local space bone, sama seperti paste flipped), dihitung sekali per data
+# armature dan dibuat ulang hanya jika daftar bone berubah. Flip pose = permutasi index + kali tanda.
+# Flip juga menulis rotation_axis_angle (bone mode AXIS_ANGLE), yang tidak disimpan di file pose
+FLIP_CHANNELS = POSE_CHANNELS + (("rotation_axis_angle", 4),)
+MIRROR_SIGNS = {
+    "location": (-1.0, 1.0, 1.0),
+    "rotation_quaternion": (1.0, 1.0, -1.0, -1.0),
+    "rotation_euler": (1.0, -1.0, -1.0),
+    "rotation_axis_angle": (1.0, 1.0, -1.0, -1.0),  # (sudut, x, y, z)
+    "scale": (1.0, 1.0, 1.0),
+}
+# (nama data armature, hash nama bone) -> tabel; dikosongkan saat load/undo/redo
+_mirror_cache = {}
+
+@persistent
+def pose_cache_reset(*args):
+    _mirror_cache.clear()
+    _bone_index_cache.clear()
+
+def pose_cache_handlers():
+    handlers = bpy.app.handlers
+    return ((handlers.load_post, pose_cache_reset),
+            (handlers.undo_post, pose_cache_reset),
+            (handlers.redo_post, pose_cache_reset))
+
+def mirror_table(obj):
+    """{"names", "mirror" (index bone pasangan, atau dirinya sendiri), "perm", "signs"} untuk obj.data."""
+    names = obj.pose.bones.keys()
+    key = (obj.data.name, hash(tuple(names)))
+    table = _mirror_cache.get(key)
+    if table is not None and table["names"] == names:
+        return table
+
+    index = {name: i for i, name in enumerate(names)}
+    mirror = array('i', (index.get(bpy.utils.flip_name(name), i) for i, name in enumerate(names)))
+    perm = {}
+    signs = {}
+    for channel, width in FLIP_CHANNELS:
+        # Elemen k bone tujuan mirror[i] diambil dari elemen k bone i
+        perm[channel] = array('i', (mirror[i] * width + k for i in range(len(names)) for k in range(width)))
+        signs[channel] = array('f', MIRROR_SIGNS[channel]) * len(names)
+    table = {"names": names, "mirror": mirror, "perm": perm, "signs": signs}
+    _mirror_cache[key] = table
+    return table
+
+def flip_pose_bones(obj, bone_names):
+    """Tulis pose mirror tiap bone `bone_names` ke bone pasangannya (bone tengah ke dirinya sendiri).
+
+    Semua nilai sumber dibaca sebelum ditulis, jadi pasangan kiri/kanan yang sama-sama dipilih saling
+    bertukar. Mengembalikan jumlah bone yang ditulis.
+    """
+    table = mirror_table(obj)
+    index = bone_index_map(obj)
+    sources = [index[name] for name in bone_names if name in index]
+    if not sources:
+        return 0
+
+    mirror = table["mirror"]
+    current = read_pose_channels(obj, FLIP_CHANNELS)
+    all_bones = len(sources) == len(mirror)
+    for channel, width in FLIP_CHANNELS:
+        values, perm, signs = current[channel], table["perm"][channel], table["signs"][channel]
+        if all_bones:
+            flipped = array('f', map(operator.mul, map(values.__getitem__, perm), signs))
+        else:
+            flipped = array('f', values)
+            targets = [mirror[i] * width + k for i in sources for k in range(width)]
+            for target in targets:
+                flipped[target] = values[perm[target]] * signs[target]
+        obj.pose.bones.foreach_set(channel, flipped)
+
+    # Custom property ikut disalin (tanpa dibalik), seperti paste flipped
+    pose_bones = obj.pose.bones
+    for i in sources:
+        if mirror[i] != i:
+            props = serialize_custom_properties(pose_bones[i])
+            if props:
+                target_bone = pose_bones[mirror[i]]
+                for prop, value in props.items():
+                    target_bone[prop] = value
+    obj.update_tag(refresh={'DATA'})
+    return len(sources)
+
+def mirror_pose_data(obj, header, channels):
+    """(header, channels) pose library yang dimirror: nama bone ditukar ke pasangannya, channel dikali tanda."""
+    table = mirror_table(obj)
+    names = table["names"]
+    index = bone_index_map(obj)
+    # Bone di rig pakai tabel; nama yang tidak ada di rig langsung lewat flip_name
+    flip = {}
+    for name in header["bones"]:
+        i = index.get(name)
+        flip[name] = names[table["mirror"][i]] if i is not None else bpy.utils.flip_name(name)
+    count = len(header["bones"])
+    mirrored = {channel: array('f', map(operator.mul, channels[channel], array('f', MIRROR_SIGNS[channel]) * count))
+                for channel, _width in POSE_CHANNELS}
+    mirrored_header = dict(header)
+    mirrored_header["bones"] = [flip[name] for name in header["bones"]]
+    mirrored_header["custom_properties"] = {flip.get(name, name): props
+                                            for name, props in header.get("custom_properties", {}).items()}
+    return mirrored_header, mirrored
+
+def load_pose_entry(custom_path, image_name):
+    """(header, channels) dari data_pose/<name>.pose, atau dari script pose lama (dibaca sebagai data)."""
+    path = pose_entry_path(custom_path, image_name)
+    if path.endswith(POSE_EXT):
+        return read_pose_data(path)
+    return read_pose_script(path)
+
+# Blend pose: pose sekarang (awal) dan pose library (target) disimpan sekali sebagai array ringkas
+# untuk bone yang cocok, beserta sudut slerp tiap quaternion. Setiap perubahan faktor hanya
+# menghitung interpolasi lalu menulis satu foreach_set per channel
+LERP_CHANNELS = (("location", 3), ("rotation_euler", 3), ("scale", 3))
+
+def prepare_pose_blend(obj, header, channels, bone_names):
+    index = bone_index_map(obj)
+    wanted = set(bone_names)
+    pairs = [(i, index[name]) for i, name in enumerate(header["bones"]) if name in wanted and name in index]
+    if not pairs:
+        return None
+
+    current = read_pose_channels(obj)
+    blend = {"pairs": pairs, "current": current, "start": {}, "delta": {}}
+    for name, width in LERP_CHANNELS:
+        start, target = array('f'), array('f')
+        for src, dst in pairs:
+            start.extend(current[name][dst * width:(dst + 1) * width])
+            target.extend(channels[name][src * width:(src + 1) * width])
+        blend["start"][name] = array('f', current[name])  # Untuk batal
+        blend["delta"][name] = (start, array('f', [b - a for a, b in zip(start, target)]))
+
+    # Quaternion: jalur terpendek (tanda dibalik jika dot < 0), sudut dan sin sudut dihitung di sini
+    quats = []
+    for src, dst in pairs:
+        q0 = tuple(current["rotation_quaternion"][dst * 4:dst * 4 + 4])
+        q1 = tuple(channels["rotation_quaternion"][src * 4:src * 4 + 4])
+        dot = sum(a * b for a, b in zip(q0, q1))
+        if dot < 0.0:
+            q1, dot = tuple(-v for v in q1), -dot
+        theta = math.acos(min(dot, 1.0))
+        quats.append((dst, q0, q1, theta, math.sin(theta)))
+    blend["start"]["rotation_quaternion"] = array('f', current["rotation_quaternion"])
+    blend["quats"] = quats
+
+    # Custom property numerik ikut di-blend; yang lain diterapkan saat selesai
+    blend["props"] = []
+    pose_bones = obj.pose.bones
+    for bone_name, props in header.get("custom_properties", {}).items():
+        if bone_name in wanted and bone_name in index:
+            bone = pose_bones[index[bone_name]]
+            for prop, value in props.items():
+                old = bone.get(prop)
+                blend["props"].append((bone, prop, old, value))
+    return blend
+
+def apply_pose_blend(obj, blend, factor):
+    current = blend["current"]
+    pairs = blend["pairs"]
+    for name, width in LERP_CHANNELS:
+        start, delta = blend["delta"][name]
+        values = array('f', [a + d * factor for a, d in zip(start, delta)])
+        column = current[name]
+        for k, (_src, dst) in enumerate(pairs):
+            column[dst * width:(dst + 1) * width] = values[k * width:(k + 1) * width]
+        obj.pose.bones.foreach_set(name, column)
+
+    column = current["rotation_quaternion"]
+    sin = math.sin
+    for dst, (a0, a1, a2, a3), (b0, b1, b2, b3), theta, sin_theta in blend["quats"]:
+        if sin_theta < 1e-4:
+            w0, w1 = 1.0 - factor, factor  # Hampir sama: lerp lalu normalisasi
+        else:
+            w0, w1 = sin((1.0 - factor) * theta) / sin_theta, sin(factor * theta) / sin_theta
+        x0, x1, x2, x3 = w0 * a0 + w1 * b0, w0 * a1 + w1 * b1, w0 * a2 + w1 * b2, w0 * a3 + w1 * b3
+        scale = 1.0 / (math.sqrt(x0 * x0 + x1 * x1 + x2 * x2 + x3 * x3) or 1.0)
+        offset = dst * 4
+        column[offset] = x0 * scale
+        column[offset + 1] = x1 * scale
+        column[offset + 2] = x2 * scale
+        column[offset + 3] = x3 * scale
+    obj.pose.bones.foreach_set("rotation_quaternion", column)
+
+    for bone, prop, old, value in blend["props"]:
+        if isinstance(value, (int, float)) and isinstance(old, (int, float)):
+            mixed = old + (value - old) * factor
+            bone[prop] = round(mixed) if isinstance(value, int) and isinstance(old, int) else mixed
+    obj.update_tag(refresh={'DATA'})
+
+def restore_pose_blend(obj, blend):
+    for name, _width in POSE_CHANNELS:
+        obj.pose.bones.foreach_set(name, blend["start"][name])
+    for bone, prop, old, _value in blend["props"]:
+        if old is None:
+            if prop in bone:
+                del bone[prop]
+        else:
+            bone[prop] = old
+    obj.update_tag(refresh={'DATA'})
+
+# Thumbnail pose dirender offscreen (GPUOffScreen) dari kamera aktif, atau dari viewport jika scene
+# tidak punya kamera, pada ukuran tetap lalu langsung ditulis ke png: tanpa jendela render dan tanpa
+# mengubah scene.render
+POSE_THUMB_SIZE = 256
+
+def view3d_window_region(area):
+    for region in area.regions:
+        if region.type == 'WINDOW':
+            return region
+    return None
+
+def find_view3d(context):
+    """(space, region) View3D untuk draw_view3d: area sekarang jika 3D view, selain itu 3D view pertama."""
+    areas = [context.area] if context.area and context.area.type == 'VIEW_3D' else []
+    areas += [area for area in context.screen.areas if area.type == 'VIEW_3D'] if context.screen else []
+    for area in areas:
+        region = view3d_window_region(area)
+        if region is not None:
+            return area.spaces.active, region
+    return None, None
+
+def create_thumbnail_offscreen(context, size=POSE_THUMB_SIZE):
+    """(offscreen, space, region), atau None jika tidak ada 3D view / GPU (mis. background)."""
+    if bpy.app.background:
+        return None
+    space, region = find_view3d(context)
+    if space is None:
+        return None
+    try:
+        return gpu.types.GPUOffScreen(size, size), space, region
+    except Exception as e:
+        print(f"[WARNING] GPUOffScreen tidak tersedia: {e}")
+        return None
+
+def draw_pose_thumbnail(context, target, image_path, size=POSE_THUMB_SIZE):
+    """Gambar scene ke offscreen `target` (dari create_thumbnail_offscreen) lalu simpan sebagai png."""
+    offscreen, space, region = target
+    scene = context.scene
+    depsgraph = context.evaluated_depsgraph_get()
+    if scene.camera is not None:
+        view_matrix = scene.camera.matrix_world.inverted()
+        projection_matrix = scene.camera.calc_matrix_camera(depsgraph, x=size, y=size)
+    else:
+        view_matrix = space.region_3d.view_matrix.copy()
+        projection_matrix = space.region_3d.window_matrix.copy()
+        # Potong bagian tengah viewport menjadi persegi (skala sumbu yang lebih lebar disamakan)
+        if region.width > region.height:
+            projection_matrix[0][0] = projection_matrix[1][1]
+        else:
+            projection_matrix[1][1] = projection_matrix[0][0]
+
+    with offscreen.bind():
+        offscreen.draw_view3d(scene, context.view_layer, space, region, view_matrix, projection_matrix,
+                              do_color_management=True)
+        framebuffer = gpu.state.active_framebuffer_get()
+        buffer = framebuffer.read_color(0, 0, size, size, 4, 0, 'FLOAT')
+
+    buffer.dimensions = size * size * 4
+    image = bpy.data.images.new("raha_pose_thumbnail", size, size, alpha=True)
+    try:
+        image.pixels.foreach_set(buffer)
+        image.filepath_raw = image_path
+        image.file_format = 'PNG'
+        image.save()
+    finally:
+        bpy.data.images.remove(image)
+
+def render_pose_thumbnail(context, image_path, size=POSE_THUMB_SIZE):
+    """Render thumbnail persegi `size` ke image_path. False jika tidak ada 3D view / GPU (mis. background)."""
+    target = create_thumbnail_offscreen(context, size)
+    if target is None:
+        return False
+    try:
+        draw_pose_thumbnail(context, target, image_path, size)
+    finally:
+        target[0].free()
+    return True
+
+def render_pose_thumbnail_opengl(scene, image_path):
+    """Cadangan tanpa 3D view: render viewport OpenGL, pengaturan render dikembalikan sesudahnya."""
+    render = scene.render
+    original = (render.filepath, render.image_settings.file_format)
+    try:
+        render.image_settings.file_format = 'PNG'
+        render.filepath = image_path
+        bpy.ops.render.opengl(write_still=True)
+    finally:
+        render.filepath, render.image_settings.file_format = original
+
+# Headless (blender -b) tidak punya GPUOffScreen: thumbnail dirender Workbench dari kamera scene.
+# Pengaturan render diganti sekali untuk seluruh batch lalu dikembalikan
+@contextlib.contextmanager
+def workbench_thumbnail_settings(scene, size=POSE_THUMB_SIZE):
+    render = scene.render
+    original = (render.engine, render.resolution_x, render.resolution_y, render.resolution_percentage,
+                render.filepath, render.image_settings.file_format)
+    try:
+        render.engine = 'BLENDER_WORKBENCH'
+        render.resolution_x = render.resolution_y = size
+        render.resolution_percentage = 100
+        render.image_settings.file_format = 'PNG'
+        yield
+    finally:
+        (render.engine, render.resolution_x, render.resolution_y, render.resolution_percentage,
+         render.filepath, render.image_settings.file_format) = original
+
+def render_pose_thumbnail_workbench(scene, image_path):
+    scene.render.filepath = image_path
+    bpy.ops.render.render(write_still=True)
+
+# Regenerasi thumbnail satu library: setiap pose diterapkan ke armature lalu dirender ulang, hanya jika
+# hash file pose atau hash rig (nama bone + rest matrix) berbeda dari yang dicatat di metadata pose
+# ("thumbnail" di data_pose/<name>.json). Satu offscreen dipakai untuk semua pose
+def pose_file_hash(filepath):
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def rig_hash(obj):
+    bones = obj.data.bones
+    matrices = array('f', [0.0]) * (len(bones) * 16)
+    bones.foreach_get("matrix_local", matrices)
+    digest = hashlib.sha1("\n".join(bones.keys()).encode("utf-8"))
+    digest.update(matrices.tobytes())
+    return digest.hexdigest()
+
+def thumbnail_record(pose_path, rig, size=POSE_THUMB_SIZE):
+    return {"pose_hash": pose_file_hash(pose_path), "rig_hash": rig, "size": size}
+
+def library_pose_names(library):
+    data_pose_folder = os.path.join(library, "data_pose")
+    if not os.path.isdir(data_pose_folder):
+        return []
+    names = {os.path.splitext(file)[0] for file in os.listdir(data_pose_folder)
+             if os.path.splitext(file)[1].lower() in (POSE_EXT, '.py')}
+    return sorted(names)
+
+def stale_pose_thumbnails(library, rig, size=POSE_THUMB_SIZE, force=False):
+    """[(name, path data pose, record baru)] untuk pose yang thumbnail-nya perlu dirender ulang."""
+    stale = []
+    for name in library_pose_names(library):
+        pose_path = pose_entry_path(library, name)
+        record = thumbnail_record(pose_path, rig, size)
+        meta = read_pose_meta(os.path.join(library, "data_pose", f"{name}.json")) or {}
+        if (force or meta.get("thumbnail") != record
+                or not os.path.exists(os.path.join(library, f"{name}.png"))):
+            stale.append((name, pose_path, record))
+    return stale
+
+def regenerate_pose_thumbnails(context, obj, library, size=POSE_THUMB_SIZE, force=False, progress=None):
+    """Render ulang thumbnail pose yang usang dengan armature `obj`.
+
+    Mengembalikan {"rendered": [...], "skipped": n, "failed": {name: error}}. Pose armature dan
+    custom property yang tersentuh dikembalikan seperti semula setelah selesai.
+    """
+    scene = context.scene
+    rig = rig_hash(obj)
+    stale = stale_pose_thumbnails(library, rig, size, force)
+    result = {"rendered": [], "skipped": len(library_pose_names(library)) - len(stale), "failed": {}}
+    if not stale:
+        return result
+
+    target = create_thumbnail_offscreen(context, size)
+    if target is None and scene.camera is None:
+        raise RuntimeError("No 3D view or scene camera to render thumbnails from")
+
+    original = read_pose_channels(obj)
+    original_props = {}
+    pose_bones = obj.pose.bones
+    index = bone_index_map(obj)
+    try:
+        with contextlib.ExitStack() as stack:
+            if target is None:
+                stack.enter_context(workbench_thumbnail_settings(scene, size))
+            for i, (name, pose_path, record) in enumerate(stale):
+                try:
+                    header, channels = load_pose_entry(library, name)
+                except (OSError, ValueError, SyntaxError, KeyError, struct.error) as e:
+                    result["failed"][name] = str(e)
+                    continue
+                # Mulai dari pose asli agar bone yang tidak ada di pose ini tidak membawa pose sebelumnya
+                for channel, _width in POSE_CHANNELS:
+                    pose_bones.foreach_set(channel, original[channel])
+                for bone_name, props in header.get("custom_properties", {}).items():
+                    if bone_name in index:
+                        bone = pose_bones[index[bone_name]]
+                        for prop in props:
+                            original_props.setdefault((bone_name, prop), bone.get(prop))
+                apply_pose_data(obj, header, channels, header["bones"])
+                context.view_layer.update()
+
+                image_path = os.path.join(library, f"{name}.png")
+                detach_store_link(image_path)
+                if target is not None:
+                    draw_pose_thumbnail(context, target, image_path, size)
+                else:
+                    render_pose_thumbnail_workbench(scene, image_path)
+
+                meta_path = os.path.join(library, "data_pose", f"{name}.json")
+                meta = read_pose_meta(meta_path) or {"armature": obj.name, "bones": header["bones"]}
+                meta["thumbnail"] = record
+                with open(meta_path, 'w') as file:
+                    json.dump(meta, file, indent=1)
+                result["rendered"].append(name)
+                if progress is not None:
+                    progress(i + 1, len(stale))
+    finally:
+        if target is not None:
+            target[0].free()
+        for channel, _width in POSE_CHANNELS:
+            pose_bones.foreach_set(channel, original[channel])
+        for (bone_name, prop), value in original_props.items():
+            bone = pose_bones[bone_name]
+            if value is None:
+                if prop in bone:
+                    del bone[prop]
+            else:
+                bone[prop] = value
+        obj.update_tag(refresh={'DATA'})
+        context.view_layer.update()
+    return result
+
 class ExportBonePose(Operator):
     bl_idname = "export.bone_pose"
     bl_label = "Export Bone Pose"
@@ -257,18 +862,24 @@ class ExportBonePose(Operator):
             return {'CANCELLED'}
         
         registered_bones = [bone.name for bone in bones]  # Hanya tulang yang terpilih
-        bone_data = {}
 
+        # Nilai channel semua bone dibaca sekaligus, lalu diambil untuk bone terpilih
+        index = bone_index_map(obj)
+        current = read_pose_channels(obj)
+        channels = {name: array('f') for name, _width in POSE_CHANNELS}
+        bone_data = {}
+        custom_properties = {}
         for bone in bones:
+            i = index[bone.name]
+            bone_info = {}
+            for name, width in POSE_CHANNELS:
+                values = current[name][i * width:(i + 1) * width]
+                channels[name].extend(values)
+                bone_info[name] = values.tolist()
             custom_props = serialize_custom_properties(bone)
-            bone_info = {
-                "location": list(bone.location),
-                "rotation_quaternion": list(bone.rotation_quaternion),
-                "rotation_euler": list(bone.rotation_euler),
-                "scale": list(bone.scale)
-            }
             if custom_props:  # Only add if there are custom properties
                 bone_info["custom_properties"] = custom_props
+                custom_properties[bone.name] = custom_props
 
             bone_data[bone.name] = bone_info
 
@@ -283,59 +894,78 @@ class ExportBonePose(Operator):
         if not os.path.exists(data_pose_folder):
             os.makedirs(data_pose_folder)
         
-        script_path = os.path.join(data_pose_folder, f"{pose_name}.py")
+        pose_path = os.path.join(data_pose_folder, f"{pose_name}{POSE_EXT}")
         image_path = os.path.join(custom_path, f"{pose_name}.png")
 
-        script_content = f"""
-import bpy
-import json
+        for path in (pose_path, image_path):
+            detach_store_link(path)
+        write_pose_data(pose_path, registered_bones, channels, custom_properties)
+        # Script lama dengan nama yang sama akan tertutup oleh file .pose
+        legacy_script = os.path.join(data_pose_folder, f"{pose_name}.py")
+        if os.path.exists(legacy_script):
+            os.remove(legacy_script)
 
-def apply_bone_pose():
-    obj = bpy.context.object
-    if obj is None or obj.type != 'ARMATURE':
-        print("No armature selected.")
-        return
-    
-    registered_bones = {json.dumps(registered_bones, indent=4)}
-    bone_data = {json.dumps(bone_data, indent=4)}
-
-    selected_bones = [bone.name for bone in bpy.context.selected_pose_bones]
-    matched_bones = {{}}
-
-    for bone_name, data in bone_data.items():
-        if bone_name in selected_bones:
-            matched_bones[bone_name] = data
-
-    if not matched_bones:
-        print("No matching bones found.")
-        return
-
-    for bone_name, data in matched_bones.items():
-        bone = obj.pose.bones.get(bone_name)
-        if bone:
-            bone.location = data["location"]
-            bone.rotation_quaternion = data["rotation_quaternion"]
-            bone.rotation_euler = data["rotation_euler"]
-            bone.scale = data["scale"]
-            if "custom_properties" in data:
-                for prop, value in data["custom_properties"].items():
-                    bone[prop] = value
-                                     
+        meta = pose_meta(obj, registered_bones, bone_data)
+        meta["thumbnail"] = thumbnail_record(pose_path, rig_hash(obj))
+        with open(os.path.join(data_pose_folder, f"{pose_name}.json"), 'w') as file:
+            json.dump(meta, file, indent=1)
 
-apply_bone_pose()
-"""
-        script_content = script_content.replace("true", "True").replace("false", "False")
+        if not render_pose_thumbnail(context, image_path):
+            render_pose_thumbnail_opengl(context.scene, image_path)
 
-        with open(script_path, 'w') as file:
-            file.write(script_content)
+        update_catalog = bpy.app.driver_namespace.get("raha_library_catalog_update")
+        if update_catalog is not None:
+            update_catalog(custom_path)
+        self.report({'INFO'}, f"Bone pose exported as data: {pose_path} and image: {image_path}")
 
-        bpy.context.scene.render.image_settings.file_format = 'PNG'
-        bpy.context.scene.render.filepath = image_path
-        bpy.ops.render.view_show()
-        bpy.ops.render.opengl(write_still=True)
+        return {'FINISHED'}
+
+# Operator to re-render stale pose thumbnails after rig or shading changes
+class RegeneratePoseThumbnails(Operator):
+    bl_idname = "wm.regenerate_pose_thumbnails"
+    bl_label = "Regenerate Pose Thumbnails"
+    bl_description = "Apply every pose in the library to the active armature and re-render its thumbnail if the pose or rig changed"
+
+    force: BoolProperty(
+        name="Force",
+        description="Re-render all thumbnails, also when pose and rig are unchanged (e.g. after shading changes)",
+        default=False
+    )
 
-        self.report({'INFO'}, f"Bone pose exported as script: {script_path} and image: {image_path}")
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        obj = context.object
+        if obj is None or obj.type != 'ARMATURE':
+            self.report({'WARNING'}, "Select an armature.")
+            return {'CANCELLED'}
+        custom_path = context.scene.sna_custom_path
+        if not custom_path:
+            self.report({'ERROR'}, "No folder selected.")
+            return {'CANCELLED'}
 
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        try:
+            result = regenerate_pose_thumbnails(
+                context, obj, custom_path, force=self.force,
+                progress=lambda done, total: wm.progress_update(done * 100 // total))
+        except RuntimeError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        finally:
+            wm.progress_end()
+
+        # Icon lama masih di cache preview
+        for name in result["rendered"]:
+            browser.release_preview_icon(os.path.join(custom_path, f"{name}.png"))
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+        level = {'WARNING'} if result["failed"] else {'INFO'}
+        self.report(level, f"{len(result['rendered'])} thumbnails rendered, {result['skipped']} up to date, "
+                           f"{len(result['failed'])} failed.")
         return {'FINISHED'}
 
 # Operator to import bone pose
@@ -343,6 +973,12 @@ class ImportBonePose(Operator):
     bl_idname = "import.bone_pose"
     bl_label = "Import Bone Pose"
 
+    mirror: BoolProperty(
+        name="Mirrored",
+        description="Apply the pose mirrored to the opposite side bones",
+        default=False
+    )
+
     def execute(self, context):
         selected_image = context.scene.sna_images
         if not selected_image:
@@ -355,15 +991,39 @@ class ImportBonePose(Operator):
             return {'CANCELLED'}
 
         image_name = os.path.splitext(selected_image)[0]
-        script_path = os.path.join(custom_path, "data_pose", f"{image_name}.py")
 
-        if os.path.exists(script_path):
-            with open(script_path, "r") as file:
-                exec(file.read(), globals())
-            self.report({'INFO'}, f"Executed script: {script_path}")
-        else:
-            self.report({'WARNING'}, f"No matching script found: {script_path}")
+        # Cek kecocokan armature dari metadata saja
+        meta = read_pose_meta(os.path.join(custom_path, "data_pose", f"{image_name}.json"))
+        obj = context.object
+        if meta and obj and obj.type == 'ARMATURE':
+            missing = [name for name in meta.get("bones", []) if name not in obj.pose.bones]
+            if missing and len(missing) == len(meta["bones"]):
+                self.report({'ERROR'}, f"None of the pose bones (saved from '{meta.get('armature')}') exist in '{obj.name}'.")
+                return {'CANCELLED'}
+            if missing:
+                self.report({'WARNING'}, f"{len(missing)} of {len(meta['bones'])} pose bones not found in '{obj.name}'.")
+
+        if obj is None or obj.type != 'ARMATURE':
+            self.report({'WARNING'}, "No armature selected.")
+            return {'CANCELLED'}
+
+        # Data pose (.pose), atau script pose lama yang dibaca sebagai data
+        try:
+            header, channels = load_pose_entry(custom_path, image_name)
+        except FileNotFoundError as e:
+            self.report({'WARNING'}, str(e))
             return {'CANCELLED'}
+        except (OSError, ValueError, SyntaxError, KeyError, struct.error) as e:
+            self.report({'ERROR'}, f"Failed to read pose: {e}")
+            return {'CANCELLED'}
+        if self.mirror:
+            header, channels = mirror_pose_data(obj, header, channels)
+
+        applied = apply_pose_data(obj, header, channels, [bone.name for bone in context.selected_pose_bones or []])
+        if not applied:
+            self.report({'WARNING'}, "No matching bones found.")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Pose applied to {applied} bones.")
         
         if context.scene.set_keyframes:
             self.insert_keyframes(context)
@@ -379,39 +1039,100 @@ class ImportBonePose(Operator):
                 bpy.context.view_layer.objects.active = obj
                 bpy.ops.anim.keyframe_insert_by_name(type="LocRotScaleCProp")
 
-    def apply_bone_pose(self):
-        obj = bpy.context.object
-        if obj is None or obj.type != 'ARMATURE':
-            print("No armature selected.")
-            return
+# Operator to blend a library pose into the current pose interactively
+class BlendBonePose(Operator):
+    bl_idname = "pose.blend_bone_pose"
+    bl_label = "Blend Bone Pose"
+    bl_description = "Blend the selected library pose into the selected bones; move the mouse to set the strength"
+    bl_options = {'REGISTER', 'UNDO', 'BLOCKING', 'GRAB_CURSOR'}
+
+    factor: FloatProperty(name="Factor", default=0.5, min=0.0, max=1.0, subtype='FACTOR')
 
-        bone_data = {json.dumps(bone_data, indent=4)}
-        selected_bones = [bone.name for bone in bpy.context.selected_pose_bones]
-        matched_bones = {}
+    def invoke(self, context, event):
+        obj = context.object
+        if obj is None or obj.type != 'ARMATURE' or obj.mode != 'POSE':
+            self.report({'WARNING'}, "Select an armature in pose mode.")
+            return {'CANCELLED'}
+        selected_image = context.scene.sna_images
+        if not selected_image or not context.scene.sna_custom_path:
+            self.report({'WARNING'}, "No image selected.")
+            return {'CANCELLED'}
+        try:
+            header, channels = load_pose_entry(context.scene.sna_custom_path, os.path.splitext(selected_image)[0])
+        except (OSError, ValueError, SyntaxError, KeyError, struct.error) as e:
+            self.report({'ERROR'}, f"Failed to read pose: {e}")
+            return {'CANCELLED'}
 
-        for bone_name, data in bone_data.items():
-            if bone_name in selected_bones:
-                matched_bones[bone_name] = data
+        self._blend = prepare_pose_blend(obj, header, channels, [bone.name for bone in context.selected_pose_bones or []])
+        if self._blend is None:
+            self.report({'WARNING'}, "No matching bones found.")
+            return {'CANCELLED'}
 
-        if not matched_bones:
-            print("No matching bones found.")
-            return
+        # Faktor dari posisi mouse: lebar region = 0..100%
+        self._start_x = event.mouse_x
+        self._start_factor = self.factor
+        self._width = max(context.region.width if context.region else 600, 100)
+        apply_pose_blend(obj, self._blend, self.factor)
+        self.update_header(context)
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def update_header(self, context):
+        if context.area:
+            context.area.header_text_set(f"Blend Pose: {self.factor:.0%}   (Ctrl: 10% steps, Click/Enter: apply, Esc/Right click: cancel)")
+            context.area.tag_redraw()
+
+    def modal(self, context, event):
+        obj = context.object
+        if event.type == 'MOUSEMOVE':
+            factor = self._start_factor + (event.mouse_x - self._start_x) / self._width
+            if event.ctrl:
+                factor = round(factor * 10) / 10
+            factor = min(max(factor, 0.0), 1.0)
+            if factor != self.factor:
+                self.factor = factor
+                apply_pose_blend(obj, self._blend, factor)
+                self.update_header(context)
+            return {'RUNNING_MODAL'}
+
+        if event.type in {'LEFTMOUSE', 'RET', 'NUMPAD_ENTER'} and event.value == 'PRESS':
+            self.finish(context)
+            if context.scene.set_keyframes:
+                bpy.ops.anim.keyframe_insert_by_name(type="LocRotScaleCProp")
+            self.report({'INFO'}, f"Pose blended at {self.factor:.0%} on {len(self._blend['pairs'])} bones.")
+            return {'FINISHED'}
 
-        for bone_name, data in matched_bones.items():
-            bone = obj.pose.bones.get(bone_name)
-            if bone:
-                # Hindari mengganti rigify_parameters dan properti khusus lainnya
-                if 'rigify_parameters' not in data['custom_properties']:
-                    bone.location = data["location"]
-                    bone.rotation_quaternion = data["rotation_quaternion"]
-                    bone.rotation_euler = data["rotation_euler"]
-                    bone.scale = data["scale"]
-                    for prop, value in data["custom_properties"].items():
-                        if prop != 'bbdObject':  # Menghindari mengganti properti ID
-                            bone[prop] = value
-                else:
-                    print(f"Skipping 'rigify_parameters' for bone: {bone_name}")
+        if event.type in {'RIGHTMOUSE', 'ESC'} and event.value == 'PRESS':
+            restore_pose_blend(obj, self._blend)
+            self.finish(context)
+            return {'CANCELLED'}
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context):
+        # Custom property non-numerik ikut diterapkan jika blend lebih dari setengah
+        if self.factor >= 0.5:
+            for bone, prop, old, value in self._blend["props"]:
+                if not (isinstance(value, (int, float)) and isinstance(old, (int, float))):
+                    bone[prop] = value
+        if context.area:
+            context.area.header_text_set(None)
+            context.area.tag_redraw()
 
+    def execute(self, context):
+        # Redo panel: terapkan ulang dengan faktor yang diketik
+        obj = context.object
+        if obj is None or obj.type != 'ARMATURE' or not context.scene.sna_images:
+            return {'CANCELLED'}
+        try:
+            header, channels = load_pose_entry(context.scene.sna_custom_path, os.path.splitext(context.scene.sna_images)[0])
+        except (OSError, ValueError, SyntaxError, KeyError, struct.error) as e:
+            self.report({'ERROR'}, f"Failed to read pose: {e}")
+            return {'CANCELLED'}
+        self._blend = prepare_pose_blend(obj, header, channels, [bone.name for bone in context.selected_pose_bones or []])
+        if self._blend is None:
+            return {'CANCELLED'}
+        apply_pose_blend(obj, self._blend, self.factor)
+        self.finish(context)
         return {'FINISHED'}
 
 #=============================================================================================
@@ -433,27 +1154,37 @@ class SelectBonesFromScript(Operator):
 
         image_name = os.path.splitext(selected_image)[0]
         script_path = os.path.join(custom_path, "data_pose", f"{image_name}.py")
+        meta = read_pose_meta(os.path.join(custom_path, "data_pose", f"{image_name}.json"))
+        pose_path = os.path.join(custom_path, "data_pose", f"{image_name}{POSE_EXT}")
+        if meta is None and os.path.exists(pose_path):
+            try:
+                meta = read_pose_header(pose_path)
+            except (OSError, ValueError, struct.error):
+                meta = None
 
-        if not os.path.exists(script_path):
+        if meta is not None:
+            registered_bones = meta.get("bones", [])
+        elif not os.path.exists(script_path):
             self.report({'WARNING'}, f"No matching script found: {script_path}")
             return {'CANCELLED'}
+        else:
+            # Pose lama tanpa metadata: parse script to extract registered_bones
+            with open(script_path, "r") as file:
+                script_content = file.read()
 
-        with open(script_path, "r") as file:
-            script_content = file.read()
-
-        # Parse script to extract registered_bones
-        registered_bones = []
-        try:
-            tree = ast.parse(script_content)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Assign):
-                    for target in node.targets:
-                        if isinstance(target, ast.Name) and target.id == "registered_bones":
-                            if isinstance(node.value, ast.List):
-                                registered_bones = [elt.s for elt in node.value.elts if isinstance(elt, ast.Str)]
-        except Exception as e:
-            self.report({'ERROR'}, f"Failed to parse script: {str(e)}")
-            return {'CANCELLED'}
+            registered_bones = []
+            try:
+                tree = ast.parse(script_content)
+                for node in ast.walk(tree):
+                    if isinstance(node, ast.Assign):
+                        for target in node.targets:
+                            if isinstance(target, ast.Name) and target.id == "registered_bones":
+                                if isinstance(node.value, ast.List):
+                                    registered_bones = [elt.value for elt in node.value.elts
+                                                        if isinstance(elt, ast.Constant) and isinstance(elt.value, str)]
+            except Exception as e:
+                self.report({'ERROR'}, f"Failed to parse script: {str(e)}")
+                return {'CANCELLED'}
 
         if not registered_bones:
             self.report({'WARNING'}, "No registered bones found in the script.")
@@ -558,7 +1289,9 @@ class OBJECT_OT_FlipPoseOperator(bpy.types.Operator):
             self.report({'WARNING'}, "Flip Pose failed. Ensure an armature is selected and you're in Pose Mode.")
             return {'CANCELLED'}
         
-        flip_selected_pose(context)
+        if not flip_selected_pose(context):
+            self.report({'WARNING'}, "Flip Pose failed. Ensure you're in Pose Mode and bones are selected.")
+            return {'CANCELLED'}
         return {'FINISHED'}
 
 #=====================================================================================================
@@ -576,7 +1309,22 @@ class Raha_tombol_panel_POSE_LIB(bpy.types.Panel):
 
         # Image Browser
         layout.prop(context.scene, 'sna_custom_path', text="Folder")
+        row = layout.row(align=True)
+        row.prop(context.scene, 'sna_image_filter', text="", icon='VIEWZOOM')
+        row.prop(context.scene, 'sna_image_tag', text="")
         layout.template_icon_view(context.scene, 'sna_images', show_labels=True, scale=5.0, scale_popup=5.0)
+        row = layout.row(align=True)
+        row.prop(context.scene, 'sna_image_page', text="Page")
+        row.label(text=f"/ {browser.page_count(context.scene)}  ({len(browser.filtered(context.scene))} poses)")
+        if browser.scan_job is not None:
+            layout.label(text=f"Scanning... {len(browser.listing)} images", icon='TIME')
+        row = layout.row(align=True)
+        row.prop(context.scene, 'sna_image_watch', text="Watch")
+        row.prop(context.scene, 'sna_image_watch_interval', text="Every (s)")
+        row = layout.row(align=True)
+        row.prop(context.scene, 'sna_image_cache_entries', text="Icons")
+        row.prop(context.scene, 'sna_image_cache_mb', text="MB")
+        layout.label(text=browser.icon_summary())
         row = layout.row()
         row.operator("wm.refresh_image_list", text="", icon='FILE_REFRESH')
                     
@@ -587,8 +1335,25 @@ class Raha_tombol_panel_POSE_LIB(bpy.types.Panel):
         row = layout.row()              
         row.operator("export.bone_pose", text="Export Pose")      
         row.operator("import.bone_pose", text="Import Pose")
+        row.operator("import.bone_pose", text="", icon='MOD_MIRROR').mirror = True
+        row.operator("pose.blend_bone_pose", text="Blend Pose")
         row = layout.row()         
         row.operator("wm.rename_image_and_script", text="Rename")        
+        row.operator("wm.regenerate_pose_thumbnails", text="Thumbnails", icon='FILE_REFRESH')
+        row = layout.row(align=True)
+        marked = context.scene.sna_images in browser.marked
+        row.operator("wm.mark_bone_pose", text="Mark", icon='CHECKBOX_HLT' if marked else 'CHECKBOX_DEHLT').action = 'TOGGLE'
+        row.operator("wm.mark_bone_pose", text="Mark Filtered").action = 'FILTERED'
+        row.operator("wm.mark_bone_pose", text="", icon='X').action = 'CLEAR'
+        row.label(text=f"{len(browser.marked)} marked")
+
+        # Ranking poses by bone overlap (library_catalog.py)
+        draw_catalog = bpy.app.driver_namespace.get("raha_library_catalog_draw")
+        if draw_catalog is not None:
+            draw_catalog(layout, context, 'pose')
+        draw_store = bpy.app.driver_namespace.get("raha_library_store_draw")
+        if draw_store is not None:
+            draw_store(layout, context)
         
         layout.prop(context.scene, "set_keyframes", text="Auto Set Keyframes")      
 
@@ -612,11 +1377,16 @@ class Raha_tombol_panel_POSE_LIB(bpy.types.Panel):
 #=====================================================================================================
 
 def register():
-    global _icons
-    _icons = previews.new()
+    browser.register()
+    # Cache tabel mirror / index bone: dikosongkan saat file baru dibuka / undo / redo
+    for handlers, handler in pose_cache_handlers():
+        handlers[:] = [h for h in handlers if getattr(h, "__name__", "") != handler.__name__]
+        handlers.append(handler)
 
     bpy.utils.register_class(ExportBonePose)
     bpy.utils.register_class(ImportBonePose)
+    bpy.utils.register_class(BlendBonePose)
+    bpy.utils.register_class(RegeneratePoseThumbnails)
     bpy.utils.register_class(SelectBonesFromScript)
     bpy.utils.register_class(WM_OT_RefreshImageList)
     bpy.utils.register_class(RenameImageAndScript)
@@ -626,6 +1396,7 @@ def register():
     bpy.utils.register_class(OBJECT_OT_FlipPoseOperator)    
     bpy.utils.register_class(Raha_tombol_panel_POSE_LIB)
     bpy.utils.register_class(DeleteBonePose)
+    bpy.utils.register_class(MarkBonePose)
     bpy.utils.register_class(ApplyPercentageOperator)
 #    bpy.utils.register_class(WM_OT_RefreshImageList)
 #    bpy.utils.register_class(IMAGE_PT_Browser)
@@ -654,13 +1425,64 @@ def register():
         description="List of images in the selected folder",
         items=sna_images_enum_items
     )
+    bpy.types.Scene.sna_image_filter = StringProperty(
+        name="Filter",
+        description="Only show poses whose name contains this text",
+        default="",
+        options={'TEXTEDIT_UPDATE'},
+        update=sna_update_image_filter
+    )
+    bpy.types.Scene.sna_image_tag = EnumProperty(
+        name="Tag",
+        description="Only show poses whose name contains this word",
+        items=sna_image_tag_items,
+        update=sna_update_image_filter
+    )
+    bpy.types.Scene.sna_image_page = IntProperty(name="Page", default=1, min=1)
+    bpy.types.Scene.sna_image_page_size = IntProperty(
+        name="Page Size",
+        description="Number of poses per page",
+        default=48,
+        min=8,
+        max=512,
+        update=sna_update_image_filter
+    )
+    bpy.types.Scene.sna_image_watch = BoolProperty(
+        name="Watch Folder",
+        description="Tampilkan pose yang ditambah, dihapus atau di-rename di folder tanpa refresh",
+        default=True
+    )
+    bpy.types.Scene.sna_image_watch_interval = FloatProperty(
+        name="Watch Interval",
+        description="Jeda (detik) antar pengecekan folder library",
+        default=2.0,
+        min=0.5,
+        max=60.0
+    )
+    bpy.types.Scene.sna_image_cache_entries = IntProperty(
+        name="Icon Cache Entries",
+        description="Jumlah maksimum icon preview di memori (minimal satu halaman)",
+        default=256,
+        min=8
+    )
+    bpy.types.Scene.sna_image_cache_mb = IntProperty(
+        name="Icon Cache Size",
+        description="Batas memori icon preview dalam megabyte",
+        default=64,
+        min=1
+    )
 
 def unregister():
-    global _icons
-    previews.remove(_icons)
+    browser.unregister()
+    for handlers, handler in pose_cache_handlers():
+        if handler in handlers:
+            handlers.remove(handler)
+    pose_cache_reset()
     
     bpy.utils.unregister_class(ExportBonePose)
     bpy.utils.unregister_class(ImportBonePose)
+    bpy.utils.unregister_class(BlendBonePose)
+    bpy.utils.unregister_class(RegeneratePoseThumbnails)
     bpy.utils.unregister_class(SelectBonesFromScript)
     bpy.utils.unregister_class(WM_OT_RefreshImageList)
     bpy.utils.unregister_class(RenameImageAndScript)    
@@ -671,6 +1493,7 @@ def unregister():
     bpy.utils.unregister_class(OBJECT_OT_FlipPoseOperator)      
     bpy.utils.unregister_class(Raha_tombol_panel_POSE_LIB)
     bpy.utils.unregister_class(DeleteBonePose)
+    bpy.utils.unregister_class(MarkBonePose)
     bpy.utils.unregister_class(ApplyPercentageOperator)
     bpy.utils.unregister_class(WM_OT_RefreshImageList)
     bpy.utils.unregister_class(IMAGE_PT_Browser)
@@ -684,6 +1507,14 @@ def unregister():
     del bpy.types.Scene.calc_custom_property
     del bpy.types.Scene.sna_custom_path
     del bpy.types.Scene.sna_images
+    del bpy.types.Scene.sna_image_filter
+    del bpy.types.Scene.sna_image_tag
+    del bpy.types.Scene.sna_image_page
+    del bpy.types.Scene.sna_image_page_size
+    del bpy.types.Scene.sna_image_watch
+    del bpy.types.Scene.sna_image_watch_interval
+    del bpy.types.Scene.sna_image_cache_entries
+    del bpy.types.Scene.sna_image_cache_mb
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
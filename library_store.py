@@ -0,0 +1,393 @@
+import bpy
+import os
+import json
+import hashlib
+import threading
+from bpy.props import EnumProperty
+
+#============================ Store deduplikasi library (content-addressed) ============================
+# Opsional. <library>/.store/objects/<2 huruf>/<sha1> menyimpan isi file data dan preview satu kali,
+# dengan nama = hash isinya. File entry (png, ANIM_DATA/*.anm, data_pose/*.pose, Preview/*.mp4, ...)
+# tetap di tempatnya sebagai hardlink ke blob, jadi semua pembaca (browser, importer, CLI) tidak berubah
+# dan pose/klip yang isinya sama hanya memakai ruang sekali. Exporter melepas link sebelum menulis
+# ulang sebuah entry (detach_store_link di save_anm.py / library_pose.py), sehingga blob tidak pernah
+# diubah. .store/refs.json mencatat path entry -> hash; untuk sync ke site lain cukup kirim .store
+# (blob yang sudah ada di tujuan tidak dikirim lagi karena namanya sama), lalu jalankan checkout.
+#
+# Nama blob = hash byte mentah file, karena blob dipakai bersama lewat hardlink dan harus identik per
+# byte dengan setiap entry yang menunjuknya. Header .anm / metadata ikut di dalam hash, jadi kurva atau
+# pose yang sama tetapi direkam dengan nama armature, fps atau rentang frame lain menjadi blob berbeda;
+# entry seperti itu ditampilkan report lewat hash data kurva/pose di metadata (same_data_groups).
+
+STORE_DIR = ".store"
+OBJECTS_DIR = "objects"
+REFS_NAME = "refs.json"
+REFS_VERSION = 1
+STORE_DRAW_KEY = "raha_library_store_draw"
+HASH_CHUNK = 1 << 20
+TMP_SUFFIX = ".store_tmp"
+
+ANM_EXT = ".anm"
+VIDEO_EXTS = ('.mp4', '.avi', '.mov', '.mkv')
+
+# (folder relatif terhadap library, ekstensi) yang disimpan di store. Sidecar/metadata .json kecil dan
+# unik per entry, .thumbs bisa dibuat ulang: keduanya tidak disimpan
+STORE_SOURCES = (
+    ("", ('.png', '.jpg', '.jpeg') + VIDEO_EXTS),
+    ("ANIM_DATA", (ANM_EXT, '.py')),
+    ("data_pose", ('.pose', '.py')),
+    ("Preview", ('.png',) + VIDEO_EXTS),
+    ("preview", ('.png',) + VIDEO_EXTS),
+)
+
+_jobs = {}  # library -> thread store/report/gc yang sedang berjalan
+_results = {}  # library -> ringkasan hasil terakhir untuk panel
+
+
+def store_path(library, *parts):
+    return os.path.join(library, STORE_DIR, *parts)
+
+
+def blob_path(library, digest):
+    return store_path(library, OBJECTS_DIR, digest[:2], digest)
+
+
+def file_hash(filepath):
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_refs(library):
+    """{path relatif: [hash, size, mtime_ns]}; file refs rusak/versi lain dianggap kosong."""
+    try:
+        with open(store_path(library, REFS_NAME), 'r') as file:
+            data = json.load(file)
+        if data.get("version") == REFS_VERSION:
+            return data["refs"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def write_refs(library, refs):
+    refs_path = store_path(library, REFS_NAME)
+    with open(refs_path + ".tmp", 'w') as file:
+        json.dump({"version": REFS_VERSION, "refs": refs}, file, indent=0, sort_keys=True)
+    os.replace(refs_path + ".tmp", refs_path)
+
+
+def library_files(library):
+    """Path relatif semua file entry yang bisa disimpan di store."""
+    found = {}
+    for folder_name, exts in STORE_SOURCES:
+        folder = os.path.join(library, folder_name)
+        if not os.path.isdir(folder):
+            continue
+        with os.scandir(folder) as items:
+            for item in items:
+                if item.is_file() and item.name.lower().endswith(exts) and not item.name.endswith(TMP_SUFFIX):
+                    # "Preview" dan "preview" adalah folder yang sama di Windows
+                    key = os.path.normcase(os.path.realpath(item.path))
+                    found.setdefault(key, os.path.relpath(item.path, library))
+    return sorted(found.values())
+
+
+def cached_hash(library, rel_path, refs):
+    """Hash isi file; dihitung ulang hanya jika ukuran/mtime berbeda dari catatan refs."""
+    stat = os.stat(os.path.join(library, rel_path))
+    ref = refs.get(rel_path)
+    if ref and ref[1] == stat.st_size and ref[2] == stat.st_mtime_ns:
+        return ref[0], stat
+    return file_hash(os.path.join(library, rel_path)), stat
+
+
+def is_linked(filepath, blob):
+    try:
+        return os.path.samefile(filepath, blob)
+    except OSError:
+        return False
+
+
+#============================ Store, checkout, report, gc ============================
+def store_library(library):
+    """Masukkan semua file entry ke store dan ganti duplikat dengan hardlink ke blob yang sama."""
+    refs = read_refs(library)
+    os.makedirs(store_path(library, OBJECTS_DIR), exist_ok=True)
+    result = {"files": 0, "new_blobs": 0, "linked": 0, "saved_bytes": 0, "unsupported": 0}
+    new_refs = {}
+    for rel_path in library_files(library):
+        filepath = os.path.join(library, rel_path)
+        digest, stat = cached_hash(library, rel_path, refs)
+        blob = blob_path(library, digest)
+        result["files"] += 1
+        if is_linked(filepath, blob):
+            new_refs[rel_path] = [digest, stat.st_size, stat.st_mtime_ns]
+            continue
+        try:
+            if not os.path.exists(blob):
+                # Isi baru: file ini sendiri menjadi blob
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.link(filepath, blob)
+                result["new_blobs"] += 1
+            else:
+                # Duplikat: ganti file dengan link ke blob (atomik lewat nama sementara)
+                tmp_path = filepath + TMP_SUFFIX
+                os.link(blob, tmp_path)
+                os.replace(tmp_path, filepath)
+                result["linked"] += 1
+                result["saved_bytes"] += stat.st_size
+        except OSError as e:
+            # Filesystem tanpa hardlink (mis. FAT/exFAT, sebagian network share): file tetap apa adanya
+            result["unsupported"] += 1
+            print(f"[WARNING] Store: {rel_path} tidak bisa di-link: {e}")
+            continue
+        stat = os.stat(filepath)
+        new_refs[rel_path] = [digest, stat.st_size, stat.st_mtime_ns]
+    write_refs(library, new_refs)
+    return result
+
+
+def checkout_library(library):
+    """Buat ulang entry yang tercatat di refs tapi belum ada (setelah sync .store ke site lain)."""
+    refs = read_refs(library)
+    result = {"restored": 0, "missing_blobs": 0}
+    for rel_path, (digest, _size, _mtime) in refs.items():
+        filepath = os.path.join(library, rel_path)
+        if os.path.exists(filepath):
+            continue
+        blob = blob_path(library, digest)
+        if not os.path.exists(blob):
+            result["missing_blobs"] += 1
+            continue
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        os.link(blob, filepath)
+        result["restored"] += 1
+    return result
+
+
+def read_meta_hash(library, kind, name):
+    """Hash isi kurva/pose dari sidecar klip atau metadata pose (None jika tidak ada)."""
+    folder = "ANIM_DATA" if kind == "clip" else "data_pose"
+    try:
+        with open(os.path.join(library, folder, f"{name}.json"), 'r') as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    meta = data.get("meta") if kind == "clip" else data
+    return meta.get("hash") if isinstance(meta, dict) else None
+
+
+def dedupe_report(library, limit=50):
+    """Tanpa mengubah file: grup file yang isinya sama, entry yang datanya sama tapi file-nya beda,
+    ukuran logis (jumlah semua file) dan fisik (inode unik) library."""
+    refs = read_refs(library)
+    by_hash = {}
+    inodes = {}
+    logical = 0
+    for rel_path in library_files(library):
+        digest, stat = cached_hash(library, rel_path, refs)
+        by_hash.setdefault(digest, []).append(rel_path)
+        inodes[(stat.st_dev, stat.st_ino)] = stat.st_size
+        logical += stat.st_size
+
+    duplicates = []
+    for digest, paths in by_hash.items():
+        if len(paths) < 2:
+            continue
+        size = os.path.getsize(os.path.join(library, paths[0]))
+        stored = os.path.exists(blob_path(library, digest))
+        duplicates.append({"hash": digest, "size": size, "paths": paths, "stored": stored,
+                           "reclaimable": 0 if stored else size * (len(paths) - 1)})
+    duplicates.sort(key=lambda group: (-group["size"] * (len(group["paths"]) - 1), group["hash"]))
+
+    # Data sama, file beda: grup per hash metadata di antara file data (anm/py)
+    same_data = []
+    for kind, folder, exts in (("clip", "ANIM_DATA", (ANM_EXT, '.py')), ("pose", "data_pose", ('.pose', '.py'))):
+        groups = {}
+        for digest, paths in by_hash.items():
+            for rel_path in paths:
+                parent, file = os.path.split(rel_path)
+                name, ext = os.path.splitext(file)
+                if parent != folder or ext not in exts:
+                    continue
+                meta_hash = read_meta_hash(library, kind, name)
+                if meta_hash:
+                    groups.setdefault(meta_hash, {}).setdefault(digest, []).append(name)
+        for meta_hash, files in groups.items():
+            if len(files) > 1:
+                same_data.append({"kind": kind, "data_hash": meta_hash, "entries": sorted(sum(files.values(), []))})
+
+    reclaimable = sum(group["reclaimable"] for group in duplicates)
+    return {
+        "library": library,
+        "files": sum(len(paths) for paths in by_hash.values()),
+        "unique_contents": len(by_hash),
+        "logical_bytes": logical,
+        "physical_bytes": sum(inodes.values()),
+        "reclaimable_bytes": reclaimable,
+        "duplicate_groups": len(duplicates),
+        "duplicates": duplicates[:limit],
+        "same_data_groups": same_data[:limit],
+    }
+
+
+def gc_store(library):
+    """Hapus blob yang tidak lagi dipakai entry mana pun dan rapikan refs."""
+    refs = read_refs(library)
+    live = {}
+    for rel_path, ref in refs.items():
+        blob = blob_path(library, ref[0])
+        if is_linked(os.path.join(library, rel_path), blob):
+            live[rel_path] = ref
+    kept = {ref[0] for ref in live.values()}
+
+    result = {"removed_blobs": 0, "freed_bytes": 0, "dropped_refs": len(refs) - len(live)}
+    objects = store_path(library, OBJECTS_DIR)
+    if os.path.isdir(objects):
+        for prefix in os.listdir(objects):
+            folder = os.path.join(objects, prefix)
+            for digest in os.listdir(folder):
+                blob = os.path.join(folder, digest)
+                stat = os.stat(blob)
+                # Link count dipakai juga, untuk entry yang di-link tapi belum tercatat di refs
+                if digest in kept or stat.st_nlink > 1:
+                    continue
+                os.remove(blob)
+                result["removed_blobs"] += 1
+                result["freed_bytes"] += stat.st_size
+            if not os.listdir(folder):
+                os.rmdir(folder)
+
+    # Nama sementara sisa store yang terputus
+    for folder_name, _exts in STORE_SOURCES:
+        folder = os.path.join(library, folder_name)
+        if os.path.isdir(folder):
+            for file in os.listdir(folder):
+                if file.endswith(TMP_SUFFIX):
+                    os.remove(os.path.join(folder, file))
+
+    if os.path.isdir(store_path(library)):
+        write_refs(library, live)
+    return result
+
+
+#============================ Job di background ============================
+STORE_ACTIONS = {
+    'STORE': store_library,
+    'CHECKOUT': checkout_library,
+    'REPORT': dedupe_report,
+    'GC': gc_store,
+}
+
+
+def summarize(action, result):
+    mb = 1024 * 1024
+    if action == 'STORE':
+        return (f"{result['files']} files, {result['new_blobs']} new blobs, {result['linked']} linked, "
+                f"{result['saved_bytes'] / mb:.1f} MB saved")
+    if action == 'CHECKOUT':
+        return f"{result['restored']} files restored, {result['missing_blobs']} missing blobs"
+    if action == 'REPORT':
+        return (f"{result['logical_bytes'] / mb:.1f} MB logical, {result['physical_bytes'] / mb:.1f} MB on disk, "
+                f"{result['duplicate_groups']} duplicate groups, {result['reclaimable_bytes'] / mb:.1f} MB reclaimable")
+    return f"{result['removed_blobs']} blobs removed, {result['freed_bytes'] / mb:.1f} MB freed"
+
+
+def start_store_job(library, action):
+    if library in _jobs:
+        return False
+
+    def run():
+        try:
+            result = STORE_ACTIONS[action](library)
+            _results[library] = summarize(action, result)
+            if action == 'REPORT':
+                report_path = store_path(library, "dedupe_report.json")
+                os.makedirs(os.path.dirname(report_path), exist_ok=True)
+                with open(report_path, 'w') as file:
+                    json.dump(result, file, indent=1)
+        except Exception as e:
+            # Semua error dicatat: tanpa hasil panel dan print di bawah akan gagal dengan KeyError
+            _results[library] = f"Failed: {e}"
+        print(f"[INFO] Store {library} ({action}): {_results[library]}")
+
+    thread = threading.Thread(target=run, daemon=True)
+    _jobs[library] = thread
+    thread.start()
+    if not bpy.app.timers.is_registered(poll_store_jobs):
+        bpy.app.timers.register(poll_store_jobs, first_interval=0.5)
+    return True
+
+
+def poll_store_jobs():
+    for library, thread in list(_jobs.items()):
+        if not thread.is_alive():
+            del _jobs[library]
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+    return 0.5 if _jobs else None
+
+
+#============================ Tampilan di panel browser ============================
+def draw_store(layout, context):
+    library = bpy.path.abspath(context.scene.sna_custom_path)
+    box = layout.box()
+    row = box.row(align=True)
+    row.label(text="Dedupe Store", icon='PACKAGE')
+    row.operator("wm.library_store", text="Store").action = 'STORE'
+    row.operator("wm.library_store", text="Checkout").action = 'CHECKOUT'
+    row.operator("wm.library_store", text="Report").action = 'REPORT'
+    row.operator("wm.library_store", text="GC").action = 'GC'
+    if library in _jobs:
+        box.label(text="Working...", icon='TIME')
+    elif library in _results:
+        box.label(text=_results[library])
+
+
+class WM_OT_LibraryStore(bpy.types.Operator):
+    bl_idname = "wm.library_store"
+    bl_label = "Library Store"
+    bl_description = ("Deduplicate the library into its content-addressed store, restore entries from it, "
+                      "report duplicates or collect unused blobs")
+
+    action: EnumProperty(
+        name="Action",
+        items=[
+            ('STORE', "Store", "Move file contents into .store and hardlink identical files to one blob"),
+            ('CHECKOUT', "Checkout", "Recreate the entries recorded in .store/refs.json that are missing, e.g. after syncing .store"),
+            ('REPORT', "Report", "Write .store/dedupe_report.json without changing any file"),
+            ('GC', "Garbage Collect", "Remove blobs no entry uses anymore"),
+        ],
+        default='REPORT'
+    )
+
+    def execute(self, context):
+        library = bpy.path.abspath(context.scene.sna_custom_path)
+        if not library or not os.path.isdir(library):
+            self.report({'ERROR'}, "Invalid or no folder selected.")
+            return {'CANCELLED'}
+        if not start_store_job(library, self.action):
+            self.report({'INFO'}, "A store job is already running for this library.")
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(WM_OT_LibraryStore)
+    bpy.app.driver_namespace[STORE_DRAW_KEY] = draw_store
+
+
+def unregister():
+    bpy.app.driver_namespace.pop(STORE_DRAW_KEY, None)
+    if bpy.app.timers.is_registered(poll_store_jobs):
+        bpy.app.timers.unregister(poll_store_jobs)
+    _results.clear()
+    bpy.utils.unregister_class(WM_OT_LibraryStore)
+
+
+if __name__ == "__main__":
+    register()
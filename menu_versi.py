@@ -111,7 +111,8 @@ def download_and_extract(version):
 
 def execute_all_scripts(folder_path):
     if os.path.exists(folder_path):
-        for root, _, files in os.walk(folder_path):
+        for root, dirs, files in os.walk(folder_path):
+            dirs[:] = [d for d in dirs if d != "tests"]  # Unit test pytest, bukan script add-on
             for file in files:
                 if file.endswith(".py"):
                     script_path = os.path.join(root, file)
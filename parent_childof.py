@@ -5,18 +5,18 @@ import webbrowser
 from bpy.props import FloatVectorProperty
 
 #========================================= ENABLE =============================================================
-def get_previous_keyframe(bone, current_frame):
+def get_previous_keyframe(bone, current_frame, bone_fcurves):
     """
     Mencari keyframe sebelumnya dari tulang (bone) yang sedang dipilih.
     """
-    keyframes = [int(kp.co.x) for fcurve in bpy.context.object.animation_data.action.fcurves 
-                 if fcurve.data_path.startswith(f'pose.bones["{bone.name}"].')
+    action = bpy.context.object.animation_data.action
+    keyframes = [int(kp.co.x) for fcurve in bone_fcurves(action, bone.name, True)
                  for kp in fcurve.keyframe_points]
     keyframes = sorted(set(keyframes))
     prev_key = max([kf for kf in keyframes if kf < current_frame], default=None)
     return prev_key
 
-def copy_paste_keyframes():
+def copy_paste_keyframes(bone_fcurves):
     """
     Menyalin keyframe dari frame sebelumnya dan menempelkannya ke frame berikutnya.
     Termasuk lokasi, rotasi (Euler dan Quaternion), serta nilai influence dari constraint "parent_child".
@@ -34,7 +34,7 @@ def copy_paste_keyframes():
         return
     
     # Cari keyframe sebelumnya
-    prev_keyframe = get_previous_keyframe(bone, current_frame)
+    prev_keyframe = get_previous_keyframe(bone, current_frame, bone_fcurves)
     if prev_keyframe is None:
         return
     
@@ -86,7 +86,12 @@ class OBJECT_OT_ENABLE(bpy.types.Operator):
     bl_description = "Copy keyframe from previous frame and paste it to the next frame"
     
     def execute(self, context):
-        copy_paste_keyframes()
+        # Index fcurve per bone dari save_anm.py (lewat driver_namespace)
+        bone_fcurves = bpy.app.driver_namespace.get("raha_bone_fcurves")
+        if bone_fcurves is None:
+            self.report({'WARNING'}, "Fcurve index not found, run save_anm.py first.")
+            return {'CANCELLED'}
+        copy_paste_keyframes(bone_fcurves)
         return {'FINISHED'}
 
 
@@ -1,6 +1,19 @@
 import bpy
 import math
 import os
+import re
+import ast
+import json
+import hashlib
+import mmap
+import shutil
+import struct
+import tempfile
+import subprocess
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from bpy.app.handlers import persistent
 # Tambahkan properti ke scene
 bpy.types.Scene.use_custom_frame_range = bpy.props.BoolProperty(
     name="Gunakan Rentang Bingkai Kustom",
@@ -26,8 +39,45 @@ bpy.types.Scene.insert_missing_keyframes = bpy.props.BoolProperty(
     default=False
 )
 
+bpy.types.Scene.anim_preview_background = bpy.props.BoolProperty(
+    name="Preview di Background",
+    description="Render preview mp4/png di proses Blender terpisah agar UI tidak membeku",
+    default=True
+)
+
+bpy.types.Scene.anim_clip_format = bpy.props.EnumProperty(
+    name="Format Klip",
+    description="Format file ANIM_DATA saat export",
+    items=[
+        ('SCRIPT', "Script (.py)", "Script Python per frame (format lama)"),
+        ('BINARY', "Binary (.anm)", "Kurva lossless (handle, interpolasi, easing), cepat untuk rig besar"),
+    ],
+    default='BINARY'
+)
+
         
 #================================ DEF insert_missing_keyframes =============================
+# Channel transform yang dilengkapi beserta jumlah sumbunya
+FILL_CHANNELS = {
+    ".location": 3,
+    ".rotation_euler": 3,
+    ".rotation_quaternion": 4,
+    ".scale": 3,
+}
+
+def build_channel_key_index(action):
+    """Index sekali jalan: bone -> channel -> {array_index: (fcurve, waktu key terurut)}."""
+    index = {}
+    for fcurve in action.fcurves:
+        bone_name, path = parse_bone_data_path(fcurve.data_path)
+        if path not in FILL_CHANNELS:
+            continue
+        points = fcurve.keyframe_points
+        co = array("f", bytes(8 * len(points)))
+        points.foreach_get("co", co)
+        index.setdefault(bone_name, {}).setdefault(path, {})[fcurve.array_index] = (fcurve, co[0::2])
+    return index
+
 def insert_missing_keyframes():
     obj = bpy.context.active_object
 
@@ -42,82 +92,534 @@ def insert_missing_keyframes():
         return
     
     scene = bpy.context.scene
-    original_start_frame = scene.frame_start
-    original_end_frame = scene.frame_end
+    frame_range = None
+    if scene.use_custom_frame_range:
+        frame_range = (scene.custom_start_frame, scene.custom_end_frame)
+
+    index = build_channel_key_index(action)
+    inserted = 0
+
+    for bone_name, channels in index.items():
+        bone = obj.pose.bones.get(bone_name)
+        if bone is None:
+            continue
+
+        for path, axes in channels.items():
+            # Frame yang sudah punya key di salah satu sumbu channel ini
+            keyed = {axis: set(frames) for axis, (_fcurve, frames) in axes.items()}
+            frames = set().union(*keyed.values())
+            if frame_range is not None:
+                frames = {frame for frame in frames if frame_range[0] <= frame <= frame_range[1]}
+
+            channel_inserted = 0
+            for axis in range(FILL_CHANNELS[path]):
+                missing = sorted(frames - keyed.get(axis, set()))
+                if not missing:
+                    continue
+
+                if axis in axes:
+                    fcurve = axes[axis][0]
+                    values = [fcurve.evaluate(frame) for frame in missing]
+                else:
+                    # Sumbu tanpa fcurve: nilainya konstan sepanjang waktu
+                    fcurve = action.fcurves.new(bone_data_path(bone_name, path), index=axis, action_group=bone_name)
+                    values = [getattr(bone, path[1:])[axis]] * len(missing)
+
+                write_fcurve_keys(fcurve, keys_from_points(zip(missing, values)))
+                channel_inserted += len(missing)
+
+            if channel_inserted:
+                inserted += channel_inserted
+                print(f"Keyframe {path[1:]} dilengkapi untuk bone {bone_name}.")
+
+    print(f"{inserted} keyframe yang hilang ditambahkan.")
+
+#================================ FORMAT ANIM_DATA BINARY (.anm) ===========================
+# Struktur file .anm:
+#   MAGIC (4 byte) | versi (uint16) | panjang header (uint32) | header JSON (utf-8) | blok data
+# Header menyimpan daftar fcurve (bone, path, index, jumlah key, offset, ukuran).
+# Setiap fcurve punya satu blok data berurutan sesuai ANM_FIELDS, sehingga export/import
+# cukup satu foreach_get/foreach_set per kolom per fcurve.
+# Versi 2 menyimpan key secara lossless: handle, tipe handle, interpolasi dan easing per key.
+ANM_MAGIC = b"RRAN"
+ANM_VERSION = 2
+ANM_EXT = ".anm"
+ANM_PREFIX = struct.Struct("<4sHI")
+ANM_FIELDS = (
+    ("co", "f", 2),
+    ("handle_left", "f", 2),
+    ("handle_right", "f", 2),
+    ("interpolation", "B", 1),
+    ("easing", "B", 1),
+    ("handle_left_type", "B", 1),
+    ("handle_right_type", "B", 1),
+    ("back", "f", 1),
+    ("amplitude", "f", 1),
+    ("period", "f", 1),
+)
+# Nilai default Blender untuk kolom yang tidak ada di file versi lama / key baru
+# (interpolation BEZIER, easing AUTO, handle AUTO_CLAMPED)
+ANM_DEFAULTS = {
+    "interpolation": 2,
+    "easing": 0,
+    "handle_left_type": 4,
+    "handle_right_type": 4,
+    "back": 1.70158,
+    "amplitude": 0.8,
+    "period": 4.1,
+}
+
+_BONE_PATH_RE = re.compile(r'^pose\.bones\["((?:[^"\\]|\\.)*)"\](.*)$')
+
+
+def parse_bone_data_path(data_path):
+    """'pose.bones["Bone"].location' -> ("Bone", ".location"), atau (None, None)."""
+    match = _BONE_PATH_RE.match(data_path)
+    if not match:
+        return None, None
+    bone_name = match.group(1).replace('\\"', '"').replace('\\\\', '\\')
+    return bone_name, match.group(2)
+
+
+def bone_data_path(bone_name, path):
+    return f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"]{path}'
+
+
+#================================ INDEX FCURVE PER ACTION ==================================
+# Satu kali scan action.fcurves -> bone -> {(path, array_index): fcurve}. Dipakai exporter dan,
+# lewat bpy.app.driver_namespace, oleh tool lain (tween, child-of) yang dijalankan sebagai script terpisah.
+# Cache menyimpan objek FCurve langsung, jadi wajib dikosongkan setiap kali Blender bisa membangun ulang
+# action (load file, undo, redo): pointer action bisa dipakai ulang dengan jumlah fcurve yang sama.
+ACTION_INDEX_KEY = "raha_bone_fcurves"
+_action_index_cache = {}
+
+def get_action_index(action):
+    key = action.as_pointer()
+    fcurves = action.fcurves
+    cached = _action_index_cache.get(key)
+    # Jumlah fcurve dicek juga, jaga-jaga jika handler belum sempat berjalan
+    if cached is not None and cached[0] == len(fcurves):
+        return cached[1]
+
+    index = {}
+    for fcurve in fcurves:
+        bone_name, path = parse_bone_data_path(fcurve.data_path)
+        if bone_name is not None:
+            index.setdefault(bone_name, {})[(path, fcurve.array_index)] = fcurve
+    _action_index_cache[key] = (len(fcurves), index)
+    return index
+
+def get_bone_fcurves(action, bone_name, transforms_only=False):
+    curves = get_action_index(action).get(bone_name, {})
+    if transforms_only:
+        return [fcurve for (path, _index), fcurve in curves.items() if path.startswith(".")]
+    return list(curves.values())
+
+@persistent
+def action_index_depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Action):
+            _action_index_cache.pop(update.id.original.as_pointer(), None)
+
+@persistent
+def action_index_reset(*args):
+    _action_index_cache.clear()
+
+def action_index_handlers():
+    handlers = bpy.app.handlers
+    return ((handlers.depsgraph_update_post, action_index_depsgraph_update),
+            (handlers.load_post, action_index_reset),
+            (handlers.undo_post, action_index_reset),
+            (handlers.redo_post, action_index_reset))
+
+
+def read_fcurve_keys(fcurve, frame_range=None):
+    """Ambil semua key satu fcurve sekaligus dengan foreach_get."""
+    points = fcurve.keyframe_points
+    count = len(points)
+    keys = {}
+    for name, code, width in ANM_FIELDS:
+        # Enum (interpolation) dibaca sebagai int lalu dipadatkan ke tipe kolom
+        buffer = array("i" if code == "B" else code, bytes(4 * width * count))
+        points.foreach_get(name, buffer)
+        keys[name] = buffer if code != "B" else array(code, buffer)
+
+    if frame_range is not None:
+        # keyframe_points selalu terurut berdasarkan frame, cukup potong dengan bisect
+        frames = keys["co"][0::2]
+        lo = bisect_left(frames, frame_range[0])
+        hi = bisect_right(frames, frame_range[1])
+        if lo > 0 or hi < count:
+            for name, code, width in ANM_FIELDS:
+                keys[name] = keys[name][lo * width:hi * width]
+            count = hi - lo
+
+    keys["count"] = count
+    return keys
+
+
+def fill_missing_fields(keys):
+    """Lengkapi kolom yang tidak ada (file versi lama) dengan nilai default Blender."""
+    keys = dict(keys)
+    count = keys["count"]
+    for name, code, width in ANM_FIELDS:
+        if name not in keys:
+            keys[name] = array(code, [ANM_DEFAULTS[name]]) * (width * count)
+    return keys
+
+
+def write_fcurve_keys(fcurve, keys, frame_offset=0.0):
+    """Tulis key ke fcurve dengan keyframe_points.add + satu foreach_set per kolom.
+
+    Key lama pada frame yang sama diganti (seperti keyframe_insert), key lain dipertahankan.
+    """
+    count = keys["count"]
+    if count == 0:
+        return
+    keys = fill_missing_fields(keys)
+    if frame_offset:
+        for name in ("co", "handle_left", "handle_right"):
+            shifted = array("f", keys[name])
+            shifted[0::2] = array("f", [x + frame_offset for x in shifted[0::2]])
+            keys[name] = shifted
+
+    points = fcurve.keyframe_points
+    existing = len(points)
+    if existing:
+        old = read_fcurve_keys(fcurve)
+        new_frames = set(keys["co"][0::2])
+        rows = [(frame, 0, i) for i, frame in enumerate(old["co"][0::2]) if frame not in new_frames]
+        rows.extend((frame, 1, i) for i, frame in enumerate(keys["co"][0::2]))
+        rows.sort()
+        merged = {}
+        for name, code, width in ANM_FIELDS:
+            sources = (old[name], keys[name])
+            column = array(code)
+            for _frame, source, i in rows:
+                column.extend(sources[source][i * width:(i + 1) * width])
+            merged[name] = column
+        keys = merged
+        count = len(rows)
+
+    if count > existing:
+        points.add(count - existing)
+    for name, code, width in ANM_FIELDS:
+        column = keys[name]
+        points.foreach_set(name, column if code != "B" else array("i", column))
+    fcurve.update()
+
+
+def collect_anim_clip(armature_obj, bone_names, frame_range=None):
+    """Kumpulkan fcurve bone terpilih (transform + custom property) sebagai data kolom."""
+    action = armature_obj.animation_data.action if armature_obj.animation_data else None
+    if action is None:
+        return []
 
-    try:
-        if scene.use_custom_frame_range:
-            scene.frame_start = scene.custom_start_frame
-            scene.frame_end = scene.custom_end_frame
+    index = get_action_index(action)
+    curves = []
+    # Kelompokkan per bone agar blok data satu bone berdekatan di file
+    for bone_name in bone_names:
+        for (path, array_index), fcurve in sorted(index.get(bone_name, {}).items()):
+            keys = read_fcurve_keys(fcurve, frame_range)
+            if keys["count"] == 0:
+                continue
+            keys.update(bone=bone_name, path=path, index=array_index, extrapolation=fcurve.extrapolation)
+            curves.append(keys)
+    return curves
 
-        # Ambil semua keyframe yang ada pada action
-        keyframes = set()  # Set untuk menyimpan frame-frame unik
-        for fcurve in action.fcurves:
-            for keyframe in fcurve.keyframe_points:
-                keyframes.add(int(keyframe.co.x))  # Masukkan frame sebagai integer
-
-        # Iterasi melalui keyframe yang ada
-        for current_frame in sorted(keyframes):
-            bpy.context.scene.frame_set(current_frame)  # Set frame saat ini
-
-            # Iterasi setiap bone yang dipilih
-            for bone in obj.pose.bones:
-                keyframe_status_euler = [False, False, False]  # Status keyframe untuk Rotation Euler (X, Y, Z)
-                keyframe_status_quat = [False, False, False, False]  # Status keyframe untuk Quaternion (W, X, Y, Z)
-                keyframe_status_loc = [False, False, False]  # Status keyframe untuk Location (X, Y, Z)
-                keyframe_status_scale = [False, False, False]  # Status keyframe untuk Scale (X, Y, Z)
-
-                # Periksa keyframe hanya pada frame saat ini
-                for fcurve in action.fcurves:
-                    if fcurve.data_path == f'pose.bones["{bone.name}"].rotation_euler':
-                        for keyframe in fcurve.keyframe_points:
-                            if int(keyframe.co.x) == current_frame:
-                                keyframe_status_euler[fcurve.array_index] = True
 
-                    elif fcurve.data_path == f'pose.bones["{bone.name}"].rotation_quaternion':
-                        for keyframe in fcurve.keyframe_points:
-                            if int(keyframe.co.x) == current_frame:
-                                keyframe_status_quat[fcurve.array_index] = True
+def curve_key(curve):
+    return f'{curve["bone"]}{curve["path"]}[{curve["index"]}]'
 
-                    elif fcurve.data_path == f'pose.bones["{bone.name}"].location':
-                        for keyframe in fcurve.keyframe_points:
-                            if int(keyframe.co.x) == current_frame:
-                                keyframe_status_loc[fcurve.array_index] = True
 
-                    elif fcurve.data_path == f'pose.bones["{bone.name}"].scale':
-                        for keyframe in fcurve.keyframe_points:
-                            if int(keyframe.co.x) == current_frame:
-                                keyframe_status_scale[fcurve.array_index] = True
-
-                # Hitung jumlah sumbu yang memiliki keyframe
-                keyframe_count_euler = sum(keyframe_status_euler)
-                keyframe_count_quat = sum(keyframe_status_quat)
-                keyframe_count_loc = sum(keyframe_status_loc)
-                keyframe_count_scale = sum(keyframe_status_scale)
-
-                # Tambahkan keyframe yang hilang jika hanya sebagian ada
-                if 0 < keyframe_count_euler < 3:
-                    if not keyframe_status_euler[0]: bone.keyframe_insert(data_path="rotation_euler", index=0)  # X
-                    if not keyframe_status_euler[1]: bone.keyframe_insert(data_path="rotation_euler", index=1)  # Y
-                    if not keyframe_status_euler[2]: bone.keyframe_insert(data_path="rotation_euler", index=2)  # Z
-                    print(f"Keyframe rotation_euler ditambahkan untuk bone {bone.name} pada frame {current_frame}.")
-
-                if 0 < keyframe_count_loc < 3:
-                    if not keyframe_status_loc[0]: bone.keyframe_insert(data_path="location", index=0)  # X
-                    if not keyframe_status_loc[1]: bone.keyframe_insert(data_path="location", index=1)  # Y
-                    if not keyframe_status_loc[2]: bone.keyframe_insert(data_path="location", index=2)  # Z
-                    print(f"Keyframe location ditambahkan untuk bone {bone.name} pada frame {current_frame}.")
-
-                if 0 < keyframe_count_scale < 3:
-                    if not keyframe_status_scale[0]: bone.keyframe_insert(data_path="scale", index=0)  # X
-                    if not keyframe_status_scale[1]: bone.keyframe_insert(data_path="scale", index=1)  # Y
-                    if not keyframe_status_scale[2]: bone.keyframe_insert(data_path="scale", index=2)  # Z
-                    print(f"Keyframe scale ditambahkan untuk bone {bone.name} pada frame {current_frame}.")
+def curve_block(curve):
+    return b"".join(curve[name].tobytes() for name, _code, _width in ANM_FIELDS)
+
+
+def hash_curves(curves):
+    """Hash isi tiap kurva, disimpan di sidecar untuk export ulang yang inkremental."""
+    return {curve_key(curve): hashlib.sha1(curve_block(curve)).hexdigest() for curve in curves}
+
+
+def detach_store_link(filepath):
+    """File entry yang di-link ke store dedup (library_store.py) dipakai bersama entry lain:
+    hapus nama ini dulu supaya penulisan membuat file baru, bukan mengubah blob bersama."""
+    try:
+        if os.stat(filepath).st_nlink > 1:
+            os.remove(filepath)
+    except OSError:
+        pass
+
+
+def write_anim_clip(filepath, curves, meta, changed=None):
+    """Tulis file .anm. Jika `changed` diisi dan layout file lama sama, hanya blok itu yang ditulis ulang."""
+    header = dict(meta)
+    header["version"] = ANM_VERSION
+    header["fields"] = [list(field) for field in ANM_FIELDS]
+    header["curves"] = []
+
+    blocks = []
+    offset = 0
+    for curve in curves:
+        block = curve_block(curve)
+        header["curves"].append({
+            "bone": curve["bone"],
+            "path": curve["path"],
+            "index": curve["index"],
+            "count": curve["count"],
+            "extrapolation": curve.get("extrapolation", 'CONSTANT'),
+            "offset": offset,
+            "size": len(block),
+        })
+        blocks.append(block)
+        offset += len(block)
+
+    # Daftar isi per bone: [offset, ukuran] blok-blok bone itu (kurva satu bone selalu berurutan)
+    toc = {}
+    for entry in header["curves"]:
+        bone_range = toc.setdefault(entry["bone"], [entry["offset"], 0])
+        bone_range[1] = entry["offset"] + entry["size"] - bone_range[0]
+    header["toc"] = toc
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix = ANM_PREFIX.pack(ANM_MAGIC, ANM_VERSION, len(header_bytes))
+
+    detach_store_link(filepath)
+    if changed is not None and os.path.exists(filepath):
+        with open(filepath, 'r+b') as file:
+            old_header = file.read(len(prefix) + len(header_bytes))
+            # Header identik -> offset semua blok sama, cukup timpa blok yang berubah
+            if old_header == prefix + header_bytes:
+                base = len(old_header)
+                for curve, entry, block in zip(curves, header["curves"], blocks):
+                    if curve_key(curve) in changed:
+                        file.seek(base + entry["offset"])
+                        file.write(block)
+                return
+
+    with open(filepath, 'wb') as file:
+        file.write(prefix)
+        file.write(header_bytes)
+        for block in blocks:
+            file.write(block)
+
+
+def read_clip_sidecar(sidecar_path):
+    if not os.path.exists(sidecar_path):
+        return {}
+    try:
+        with open(sidecar_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_clip_sidecar(sidecar_path, data):
+    with open(sidecar_path, 'w') as file:
+        json.dump(data, file, indent=1)
+
+
+def read_anim_clip(filepath, bone_names=None):
+    """Baca klip .anm. Jika bone_names diisi, hanya blok bone tersebut yang dibaca (lewat mmap + toc)."""
+    with open(filepath, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version, header_size = ANM_PREFIX.unpack_from(data, 0)
+        if magic != ANM_MAGIC:
+            raise ValueError(f"Bukan file ANIM_DATA binary: {filepath}")
+        if version > ANM_VERSION:
+            raise ValueError(f"Versi file {version} lebih baru dari yang didukung ({ANM_VERSION})")
+
+        start = ANM_PREFIX.size
+        header = json.loads(data[start:start + header_size].decode("utf-8"))
+        base = start + header_size
+
+        entries_by_bone = {}
+        for entry in header["curves"]:
+            entries_by_bone.setdefault(entry["bone"], []).append(entry)
+        wanted = entries_by_bone.keys() if bone_names is None else [n for n in bone_names if n in entries_by_bone]
+
+        curves = []
+        for bone_name in wanted:
+            entries = entries_by_bone[bone_name]
+            # File lama tanpa toc: rentang bone dihitung dari entry kurvanya
+            bone_offset, bone_size = header.get("toc", {}).get(bone_name) or (
+                entries[0]["offset"], entries[-1]["offset"] + entries[-1]["size"] - entries[0]["offset"])
+            block = data[base + bone_offset:base + bone_offset + bone_size]
+
+            for entry in entries:
+                position = entry["offset"] - bone_offset
+                count = entry["count"]
+                curve = dict(entry)
+                for name, code, width in header["fields"]:
+                    column = array(code)
+                    size = column.itemsize * width * count
+                    column.frombytes(block[position:position + size])
+                    curve[name] = column
+                    position += size
+                curves.append(fill_missing_fields(curve))
+    return header, curves
+
+
+def keys_from_points(points, interpolation=2):
+    """[(frame, value), ...] -> kolom key; handle diisi co lalu dihitung ulang oleh fcurve.update()."""
+    points = sorted(points)
+    co = array("f")
+    for frame, value in points:
+        co.extend((frame, value))
+    keys = {
+        "count": len(points),
+        "co": co,
+        "handle_left": array("f", co),
+        "handle_right": array("f", co),
+        "interpolation": array("B", [interpolation]) * len(points),
+    }
+    return fill_missing_fields(keys)
+
+
+def _literal_value(node):
+    # int(1.0) / float(1.0) ditulis oleh exporter lama untuk custom property
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ("int", "float") and node.args:
+        node = node.args[0]
+    return ast.literal_eval(node)
+
+
+def read_bone_keyframe_script(script_path):
+    """Baca script ANIM_DATA lama sebagai data kurva tanpa exec dan tanpa frame_set.
+
+    Hasilnya berbentuk sama dengan read_anim_clip, dengan frame relatif terhadap frame pertama.
+    """
+    with open(script_path, 'r') as file:
+        tree = ast.parse(file.read(), filename=script_path)
+
+    points = {}
+    bones = []
+    frame = 0
+    for node in tree.body:
+        # frame_target = frame_current + N
+        if (isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name)
+                and node.targets[0].id == "frame_target" and isinstance(node.value, ast.BinOp)):
+            frame += _literal_value(node.value.right)
+            continue
+
+        # if 'Bone' in selected_bones: bone.<prop> = (...) / bone["prop"] = ...
+        if not (isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+                and isinstance(node.test.left, ast.Constant)):
+            continue
+        bone_name = node.test.left.value
+        if bone_name not in bones:
+            bones.append(bone_name)
+
+        for statement in node.body:
+            if not isinstance(statement, ast.Assign):
+                continue
+            target = statement.targets[0]
+            if isinstance(target, ast.Attribute):
+                path = f".{target.attr}"
+            elif isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name) and target.value.id == "bone":
+                path = f'["{_literal_value(target.slice)}"]'
+            else:
+                continue
+
+            try:
+                value = _literal_value(statement.value)
+            except ValueError:
+                continue
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for index, item in enumerate(values):
+                if isinstance(item, (int, float)) and not isinstance(item, bool):
+                    points.setdefault((bone_name, path, index), []).append((float(frame), float(item)))
+
+    curves = []
+    for (bone_name, path, index), bone_points in points.items():
+        keys = keys_from_points(bone_points)
+        keys.update(bone=bone_name, path=path, index=index)
+        curves.append(keys)
+
+    header = {"bones": bones, "frame_start": 0.0, "frame_end": float(frame)}
+    return header, curves
+
+
+def clip_meta(armature_obj, bone_names, curves):
+    curve_bones = {curve["bone"] for curve in curves}
+    bones = [name for name in bone_names if name in curve_bones]
+    render = bpy.context.scene.render
+    return {
+        "armature": armature_obj.name,
+        "bones": bones,
+        "frame_start": min(curve["co"][0] for curve in curves),
+        "frame_end": max(curve["co"][-2] for curve in curves),
+        "fps": render.fps / render.fps_base,
+        "rotation_modes": {name: armature_obj.pose.bones[name].rotation_mode for name in bones},
+    }
+
+
+def clip_hash(hashes):
+    """Hash seluruh isi klip, dihitung dari hash per kurva."""
+    digest = hashlib.sha1()
+    for key in sorted(hashes):
+        digest.update(f"{key}={hashes[key]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def clip_sidecar(clip_format, meta, hashes):
+    """Isi sidecar .json: metadata ringkas (dibaca browser tanpa membuka klip) + hash per kurva."""
+    sidecar = {"format": clip_format}
+    if meta is not None:
+        sidecar["meta"] = dict(meta, hash=clip_hash(hashes))
+    sidecar["curves"] = hashes
+    return sidecar
+
+
+def export_anim_clip(armature_obj, bone_names, filepath, frame_range=None):
+    curves = collect_anim_clip(armature_obj, bone_names, frame_range)
+    if not curves:
+        return 0
+
+    write_anim_clip(filepath, curves, clip_meta(armature_obj, bone_names, curves))
+    return len(curves)
+
+
+def apply_anim_clip(armature_obj, header, curves, bone_names, frame_target):
+    """Buat/isi fcurve target langsung; frame pertama klip ditempatkan di frame_target."""
+    if armature_obj.animation_data is None:
+        armature_obj.animation_data_create()
+    action = armature_obj.animation_data.action
+    if action is None:
+        action = bpy.data.actions.new(f"{armature_obj.name}Action")
+        armature_obj.animation_data.action = action
+
+    fcurves = {(fc.data_path, fc.array_index): fc for fc in action.fcurves}
+    frame_offset = frame_target - header["frame_start"]
+    wanted = set(bone_names)
+    applied = 0
+
+    for curve in curves:
+        bone_name = curve["bone"]
+        if bone_name not in wanted:
+            continue
+        pose_bone = armature_obj.pose.bones.get(bone_name)
+        if pose_bone is None:
+            continue
+
+        path = curve["path"]
+        if path.startswith('["'):
+            # Custom property harus ada di bone agar fcurve valid
+            prop_name = path[2:-2]
+            if prop_name not in pose_bone.keys():
+                pose_bone[prop_name] = float(curve["co"][1])
+
+        data_path = bone_data_path(bone_name, path)
+        fcurve = fcurves.get((data_path, curve["index"]))
+        if fcurve is None:
+            fcurve = action.fcurves.new(data_path, index=curve["index"], action_group=bone_name)
+            fcurves[(data_path, curve["index"])] = fcurve
+
+        write_fcurve_keys(fcurve, curve, frame_offset)
+        fcurve.extrapolation = curve.get("extrapolation", 'CONSTANT')
+        applied += 1
+
+    return applied
+
 
-    finally:
-        # Kembalikan nilai asli frame_start dan frame_end
-        scene.frame_start = original_start_frame
-        scene.frame_end = original_end_frame
 #========================================= EKPORT BONE ================================================
 def get_value_type(bone, prop_name, value):
     # Periksa tipe data properti di Blender
@@ -132,7 +634,388 @@ def get_value_type(bone, prop_name, value):
     else:
         return "unknown"
 
-def export_bone_keyframe_data(context, filepath):
+def write_bone_keyframe_script(armature_obj, scene, script_path):
+    """Format lama: script Python per frame yang dijalankan saat import."""
+    # Mendapatkan data keyframe dari bone yang dipilih
+    bone_data = {}
+    for bone in armature_obj.pose.bones:
+        if bone.bone.select:
+            bone_data[bone.name] = {}
+
+            # Pastikan armature_obj memiliki animation_data dan action
+            if armature_obj.animation_data:
+                action = armature_obj.animation_data.action
+                
+                # Periksa apakah action ada dan memiliki fcurves
+                if action and hasattr(action, 'fcurves') and action.fcurves:
+                    for fcurve in get_bone_fcurves(action, bone.name):
+                        for keyframe in fcurve.keyframe_points:
+                            frame = int(keyframe.co[0])
+                            
+                            # Filter keyframe berdasarkan rentang frame yang ditentukan
+                            if scene.use_custom_frame_range:
+                                if frame < scene.custom_start_frame or frame > scene.custom_end_frame:
+                                    continue  # Skip keyframe di luar rentang
+                            
+                            if frame not in bone_data[bone.name]:
+                                bone_data[bone.name][frame] = {}
+
+                            # Simpan data_path dan nilai keyframe
+                            data_path = fcurve.data_path.split('"]')[-1][1:]  # Ambil properti (misal: ".location")
+                            if data_path not in bone_data[bone.name][frame]:
+                                bone_data[bone.name][frame][data_path] = {}
+
+                            # Simpan nilai sesuai dengan indeks sumbu (0: X, 1: Y, 2: Z)
+                            bone_data[bone.name][frame][data_path][fcurve.array_index] = keyframe.co[1]
+
+                else:
+                    print(f"No fcurves or action found for bone: {bone.name}")
+
+            # Simpan custom properties jika ada
+            if bone.keys():
+                for frame in bone_data[bone.name]:
+                    bone_data[bone.name][frame]["custom_props"] = {}
+
+                for prop_name in bone.keys():
+                    if prop_name not in "_RNA_UI":  # Abaikan properti internal Blender
+                        # Pastikan action dan fcurves ada sebelum mengaksesnya
+                        if armature_obj.animation_data and armature_obj.animation_data.action:
+                            action = armature_obj.animation_data.action
+                            fcurve = get_action_index(action).get(bone.name, {}).get((f'["{prop_name}"]', 0))
+                            if fcurve is not None:
+                                for keyframe in fcurve.keyframe_points:
+                                    frame = int(keyframe.co[0])
+
+                                    # Filter keyframe berdasarkan rentang frame yang ditentukan
+                                    if scene.use_custom_frame_range:
+                                        if frame < scene.custom_start_frame or frame > scene.custom_end_frame:
+                                            continue  # Skip keyframe di luar rentang
+
+                                    # Ambil nilai keyframe
+                                    value = keyframe.co[1]
+
+                                    # Simpan custom property dengan tipe data
+                                    bone_data[bone.name][frame]["custom_props"][prop_name] = {
+                                        "value": value,
+                                        "type": get_value_type(bone, prop_name, value)
+                                    }
+
+    if not bone_data:
+        return False
+
+    # Menulis data ke file .py
+    with open(script_path, 'w') as file:
+        file.write("import bpy\n")
+        file.write("import math\n\n")
+        file.write("# Mendapatkan scene aktif\n")
+        file.write("scene = bpy.context.scene\n\n")
+        file.write("# Mendapatkan daftar tulang yang dipilih\n")
+        file.write("selected_pose_bones = bpy.context.selected_pose_bones\n")
+        file.write("if not selected_pose_bones:\n")  
+        file.write("    print('Tidak ada tulang yang dipilih.')\n")  
+        file.write("else:\n") 
+        file.write("    armature_obj = selected_pose_bones[0].id_data\n")  
+        file.write("    selected_bones = [bone.name for bone in selected_pose_bones]\n")                                  
+        file.write("# Menyiapkan dictionary untuk menyimpan bone yang cocok\n")
+        file.write("matched_bones = {}\n\n")
+
+        # Gabungkan semua frame dari semua bone
+        all_frames = set()
+        for bone_name, frames in bone_data.items():
+            all_frames.update(frames.keys())
+        all_frames = sorted(all_frames)
+
+        prev_frame = None
+        for frame in all_frames:
+            file.write(f"# Frame {frame}\n")
+            if prev_frame is None:
+                file.write("frame_current = scene.frame_current\n")
+                file.write("scene.frame_set(frame_current)\n")
+                file.write("bpy.ops.anim.keyframe_insert()\n")
+
+            else:
+                frame_distance = frame - prev_frame
+                file.write(f"frame_target = frame_current + {frame_distance}\n")
+                file.write("scene.frame_set(frame_target)\n")
+                file.write("frame_current = frame_target\n")
+            
+            for bone_name, frames in bone_data.items():
+                if frame in frames:
+                    file.write(f"if '{bone_name}' in selected_bones:\n")
+                    file.write(f"    bone = armature_obj.pose.bones['{bone_name}']\n")
+                    data = frames[frame]
+                    for data_path, value in data.items():
+                        if data_path == "location":
+                            # Ambil nilai untuk X, Y, Z. Gunakan nilai default jika tidak ada keyframe.
+                            x = value.get(0, bone.location[0])  # Gunakan nilai saat ini untuk X jika tidak ada keyframe
+                            y = value.get(1, bone.location[1])  # Gunakan nilai saat ini untuk Y jika tidak ada keyframe
+                            z = value.get(2, bone.location[2])  # Gunakan nilai saat ini untuk Z jika tidak ada keyframe
+                            
+                            # Menulis data lokasi dengan nilai yang sudah disinkronisasi
+                            file.write(f"    bone.location = ({x}, {y}, {z})\n")
+                            file.write(f"    bone.keyframe_insert(data_path='location')\n")
+
+
+                        elif data_path == "rotation_quaternion":
+                            # Pastikan semua sumbu (W, X, Y, Z) memiliki keyframe
+                            w = value.get(0, bone.rotation_quaternion[0])
+                            x = value.get(1, bone.rotation_quaternion[1])
+                            y = value.get(2, bone.rotation_quaternion[2])
+                            z = value.get(3, bone.rotation_quaternion[3])
+                            file.write(f"    bone.rotation_quaternion = ({w}, {x}, {y}, {z})\n")
+                            file.write(f"    bone.keyframe_insert(data_path='rotation_quaternion')\n")
+                        elif data_path == "rotation_euler":
+                            # Pastikan semua sumbu (X, Y, Z) memiliki keyframe
+                            x = value.get(0, bone.rotation_euler[0])
+                            y = value.get(1, bone.rotation_euler[1])
+                            z = value.get(2, bone.rotation_euler[2])
+                            file.write(f"    bone.rotation_euler = ({x}, {y}, {z})\n")
+                            file.write(f"    bone.keyframe_insert(data_path='rotation_euler')\n")
+                        elif data_path == "scale":
+                            # Pastikan semua sumbu (X, Y, Z) memiliki keyframe
+                            x = value.get(0, bone.scale[0])
+                            y = value.get(1, bone.scale[1])
+                            z = value.get(2, bone.scale[2])
+                            file.write(f"    bone.scale = ({x}, {y}, {z})\n")
+                            file.write(f"    bone.keyframe_insert(data_path='scale')\n")
+                                
+                        elif data_path == "custom_props":
+                            for prop_name, prop_data in value.items():
+                                prop_value = prop_data["value"]
+                                prop_type = prop_data["type"]
+                                
+                                if prop_type == "int":
+                                    file.write(f'    bone["{prop_name}"] = int({prop_value})\n')
+                                elif prop_type == "float":
+                                    file.write(f'    bone["{prop_name}"] = float({prop_value})\n')
+                                elif prop_type == "str":
+                                    file.write(f'    bone["{prop_name}"] = "{prop_value}"\n')
+                                elif prop_type == "list":
+                                    file.write(f'    bone["{prop_name}"] = {list(prop_value)}\n')
+                                else:
+                                    file.write(f'    bone["{prop_name}"] = {prop_value}\n')
+                                
+                                # Tambahkan keyframe
+                                file.write(f'    bone.keyframe_insert(data_path=\'["{prop_name}"]\')\n')
+
+                                
+            prev_frame = frame
+            file.write("\n")
+
+    return True
+
+#========================================= PREVIEW BACKGROUND ==========================================
+# Script untuk proses "blender -b": render workbench mp4 lalu png frame pertama
+PREVIEW_JOB_SCRIPT = """
+import bpy
+scene = bpy.context.scene
+scene.render.engine = 'BLENDER_WORKBENCH'
+scene.render.filepath = {playblast_path!r}
+scene.render.image_settings.file_format = 'FFMPEG'
+scene.render.ffmpeg.format = 'MPEG4'
+scene.render.ffmpeg.codec = 'H264'
+scene.render.ffmpeg.audio_codec = 'AAC'
+bpy.ops.render.render(animation=True)
+scene.frame_set(scene.frame_start)
+scene.render.image_settings.file_format = 'PNG'
+scene.render.filepath = {screenshot_path!r}
+bpy.ops.render.render(write_still=True)
+scene.render.resolution_percentage = {sprite_percentage}
+for frame, path in {sprite_frames!r}:
+    scene.frame_set(frame)
+    scene.render.filepath = path
+    bpy.ops.render.render(write_still=True)
+"""
+
+# Sprite sheet: SPRITE_FRAMES frame sampel kecil dalam satu png (Preview/<nama>_sprite.png),
+# dipakai browser untuk scrub preview tanpa membuka video
+SPRITE_FRAMES = 16
+SPRITE_COLUMNS = 4
+SPRITE_WIDTH = 160
+SPRITE_SUFFIX = "_sprite.png"
+
+def sprite_frame_paths(scene, file_name):
+    """[(frame, path png sementara)] untuk frame sampel yang tersebar rata di rentang scene."""
+    temp_dir = os.path.join(bpy.app.tempdir or tempfile.gettempdir(), f"raha_sprite_{file_name}")
+    os.makedirs(temp_dir, exist_ok=True)
+    step = (scene.frame_end - scene.frame_start) / (SPRITE_FRAMES - 1)
+    return [(round(scene.frame_start + step * i), os.path.join(temp_dir, f"{i:02d}.png")) for i in range(SPRITE_FRAMES)]
+
+def sprite_percentage(scene):
+    return max(1, min(100, round(100 * SPRITE_WIDTH / scene.render.resolution_x)))
+
+def pack_sprite_sheet(frame_paths, sprite_path):
+    """Gabungkan png frame sampel menjadi grid SPRITE_COLUMNS kolom, frame pertama di kiri atas."""
+    frames = []
+    size = None
+    for path in frame_paths:
+        try:
+            image = bpy.data.images.load(path, check_existing=False)
+        except RuntimeError as e:
+            print(f"Frame sprite tidak bisa dibaca: {e}")
+            return False
+        try:
+            if size is None:
+                size = tuple(image.size)
+            elif tuple(image.size) != size:
+                image.scale(*size)
+            pixels = array('f', bytes(size[0] * size[1] * 16))
+            image.pixels.foreach_get(pixels)
+            frames.append(pixels)
+        finally:
+            bpy.data.images.remove(image)
+    if not frames or not all(size):
+        return False
+
+    cell_width, cell_height = size
+    rows = -(-len(frames) // SPRITE_COLUMNS)
+    width, height = cell_width * SPRITE_COLUMNS, cell_height * rows
+    row_floats = cell_width * 4
+    sheet_pixels = array('f', bytes(width * height * 16))
+    for i, pixels in enumerate(frames):
+        column, row = i % SPRITE_COLUMNS, i // SPRITE_COLUMNS
+        # Buffer pixel Blender dimulai dari baris bawah
+        y0 = (rows - 1 - row) * cell_height
+        for y in range(cell_height):
+            dst = ((y0 + y) * width + column * cell_width) * 4
+            sheet_pixels[dst:dst + row_floats] = pixels[y * row_floats:(y + 1) * row_floats]
+
+    sheet = bpy.data.images.new(os.path.basename(sprite_path), width, height, alpha=True)
+    try:
+        sheet.pixels.foreach_set(sheet_pixels)
+        sheet.filepath_raw = sprite_path
+        sheet.file_format = 'PNG'
+        sheet.save()
+    finally:
+        bpy.data.images.remove(sheet)
+    return True
+
+def finish_sprite_sheet(frames, sprite_path):
+    try:
+        if pack_sprite_sheet([path for _frame, path in frames], sprite_path):
+            print(f"Sprite sheet {os.path.basename(sprite_path)} ditulis.")
+    finally:
+        shutil.rmtree(os.path.dirname(frames[0][1]), ignore_errors=True)
+
+_FRAME_RE = re.compile(r"Fra:\s*(\d+)")
+_preview_jobs = {}
+
+def _read_preview_output(job):
+    # Thread pembaca stdout: hanya mengubah dict job, tidak menyentuh bpy
+    for line in job["process"].stdout:
+        match = _FRAME_RE.search(line)
+        if match:
+            done = int(match.group(1)) - job["frame_start"] + 1
+            job["progress"] = min(max(done / job["frame_count"], job["progress"]), 1.0)
+
+def start_preview_job(scene, file_name, playblast_path, screenshot_path, sprite_path):
+    """Simpan salinan file sementara lalu render preview di 'blender -b'. False jika tidak bisa."""
+    if scene.camera is None:
+        return False
+
+    temp_dir = bpy.app.tempdir or os.path.dirname(playblast_path)
+    temp_blend = os.path.join(temp_dir, f"raha_preview_{file_name}.blend")
+    try:
+        bpy.ops.wm.save_as_mainfile(filepath=temp_blend, copy=True)
+        sprite_frames = sprite_frame_paths(scene, file_name)
+        script = PREVIEW_JOB_SCRIPT.format(playblast_path=playblast_path, screenshot_path=screenshot_path,
+                                           sprite_percentage=sprite_percentage(scene), sprite_frames=sprite_frames)
+        process = subprocess.Popen(
+            [bpy.app.binary_path, "-b", temp_blend, "--python-expr", script],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+    except Exception as e:
+        print(f"Gagal memulai preview di background: {e}")
+        return False
+
+    job = {
+        "process": process,
+        "temp_blend": temp_blend,
+        "library": os.path.dirname(screenshot_path),
+        "frame_start": scene.frame_start,
+        "frame_count": max(scene.frame_end - scene.frame_start + 1, 1),
+        "progress": 0.0,
+        "sprite": (sprite_frames, sprite_path),
+    }
+    _preview_jobs[file_name] = job
+    threading.Thread(target=_read_preview_output, args=(job,), daemon=True).start()
+    if not bpy.app.timers.is_registered(poll_preview_jobs):
+        bpy.app.timers.register(poll_preview_jobs, first_interval=0.5)
+    return True
+
+def poll_preview_jobs():
+    for file_name, job in list(_preview_jobs.items()):
+        returncode = job["process"].poll()
+        if returncode is None:
+            continue
+
+        del _preview_jobs[file_name]
+        if os.path.exists(job["temp_blend"]):
+            os.remove(job["temp_blend"])
+        if returncode != 0:
+            print(f"Preview {file_name} gagal dirender (kode {returncode}).")
+            shutil.rmtree(os.path.dirname(job["sprite"][0][0][1]), ignore_errors=True)
+            continue
+
+        finish_sprite_sheet(*job["sprite"])
+
+        print(f"Preview {file_name} selesai.")
+        # Entry library baru muncul setelah png-nya ada
+        scene = bpy.context.scene
+        if getattr(scene, "sna_custom_path", "") and os.path.normpath(bpy.path.abspath(scene.sna_custom_path)) == os.path.normpath(job["library"]):
+            try:
+                bpy.ops.wm.refresh_list()
+            except (AttributeError, RuntimeError):
+                pass
+
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+    return 0.5 if _preview_jobs else None
+
+def render_preview_foreground(scene, playblast_path, screenshot_path, sprite_path=None):
+    # Playblast viewport dalam format MP4
+    bpy.context.scene.render.filepath = playblast_path
+    bpy.context.scene.render.image_settings.file_format = 'FFMPEG'
+    bpy.context.scene.render.ffmpeg.format = 'MPEG4'
+    bpy.context.scene.render.ffmpeg.codec = 'H264'
+    bpy.context.scene.render.ffmpeg.audio_codec = 'AAC'
+    bpy.ops.render.opengl(animation=True)  # Render playblast
+
+    # Ambil screenshot dari frame pertama
+    scene.frame_set(scene.frame_start)  # Set frame ke frame pertama
+
+    # Simpan pengaturan format file asli
+    original_file_format = bpy.context.scene.render.image_settings.file_format
+
+    # Set format file ke PNG untuk screenshot
+    bpy.context.scene.render.image_settings.file_format = 'PNG'
+    bpy.context.scene.render.filepath = screenshot_path  # Set filepath untuk screenshot
+    bpy.ops.render.opengl(write_still=True)  # Ambil screenshot
+
+    # Frame sampel kecil untuk sprite sheet
+    if sprite_path:
+        frames = sprite_frame_paths(scene, os.path.splitext(os.path.basename(screenshot_path))[0])
+        original_percentage = scene.render.resolution_percentage
+        scene.render.resolution_percentage = sprite_percentage(scene)
+        try:
+            for frame, path in frames:
+                scene.frame_set(frame)
+                scene.render.filepath = path
+                bpy.ops.render.opengl(write_still=True)
+        finally:
+            scene.render.resolution_percentage = original_percentage
+        finish_sprite_sheet(frames, sprite_path)
+
+    # Kembalikan format file ke pengaturan asli (untuk playblast)
+    bpy.context.scene.render.image_settings.file_format = original_file_format
+
+def export_bone_keyframe_data(context, filepath, clip_format='BINARY', preview=True):
     armature_obj = context.object
     if not armature_obj or armature_obj.type != 'ARMATURE':
         return {'CANCELLED'}   
@@ -148,10 +1031,6 @@ def export_bone_keyframe_data(context, filepath):
         if scene.use_custom_frame_range:
             scene.frame_start = scene.custom_start_frame
             scene.frame_end = scene.custom_end_frame
-                 
-        selected_bones = [bone.name for bone in bpy.context.selected_pose_bones]
-        
-        matched_bones = {}            
 
         # Tentukan path folder ANIM_DATA dan Preview
         base_folder = os.path.dirname(filepath)
@@ -167,199 +1046,69 @@ def export_bone_keyframe_data(context, filepath):
         # Tentukan path untuk file script, video, dan screenshot
         file_name = os.path.splitext(os.path.basename(filepath))[0]
         script_path = os.path.join(anim_data_folder, f"{file_name}.py")
+        clip_path = os.path.join(anim_data_folder, f"{file_name}{ANM_EXT}")
         playblast_path = os.path.join(preview_folder, f"{file_name}.mp4")
         screenshot_path = os.path.join(base_folder, f"{file_name}.png")
+        sprite_path = os.path.join(preview_folder, f"{file_name}{SPRITE_SUFFIX}")
         
-        # Mendapatkan data keyframe dari bone yang dipilih
-        bone_data = {}
-        for bone in armature_obj.pose.bones:
-            if bone.bone.select:
-                bone_data[bone.name] = {}
-
-                # Pastikan armature_obj memiliki animation_data dan action
-                if armature_obj.animation_data:
-                    action = armature_obj.animation_data.action
-                    
-                    # Periksa apakah action ada dan memiliki fcurves
-                    if action and hasattr(action, 'fcurves') and action.fcurves:
-                        for fcurve in action.fcurves:
-                            if fcurve.data_path.startswith(f'pose.bones["{bone.name}"]'):
-                                for keyframe in fcurve.keyframe_points:
-                                    frame = int(keyframe.co[0])
-                                    
-                                    # Filter keyframe berdasarkan rentang frame yang ditentukan
-                                    if scene.use_custom_frame_range:
-                                        if frame < scene.custom_start_frame or frame > scene.custom_end_frame:
-                                            continue  # Skip keyframe di luar rentang
-                                    
-                                    if frame not in bone_data[bone.name]:
-                                        bone_data[bone.name][frame] = {}
-
-                                    # Simpan data_path dan nilai keyframe
-                                    data_path = fcurve.data_path.split('"]')[-1][1:]  # Ambil properti (misal: ".location")
-                                    if data_path not in bone_data[bone.name][frame]:
-                                        bone_data[bone.name][frame][data_path] = {}
-
-                                    # Simpan nilai sesuai dengan indeks sumbu (0: X, 1: Y, 2: Z)
-                                    bone_data[bone.name][frame][data_path][fcurve.array_index] = keyframe.co[1]
-
-                    else:
-                        print(f"No fcurves or action found for bone: {bone.name}")
-
-                # Simpan custom properties jika ada
-                if bone.keys():
-                    for frame in bone_data[bone.name]:
-                        bone_data[bone.name][frame]["custom_props"] = {}
-
-                    for prop_name in bone.keys():
-                        if prop_name not in "_RNA_UI":  # Abaikan properti internal Blender
-                            # Pastikan action dan fcurves ada sebelum mengaksesnya
-                            if armature_obj.animation_data and armature_obj.animation_data.action:
-                                action = armature_obj.animation_data.action
-                                if hasattr(action, 'fcurves'):
-                                    for fcurve in action.fcurves:
-                                        if fcurve.data_path == f'pose.bones["{bone.name}"]["{prop_name}"]':
-                                            for keyframe in fcurve.keyframe_points:
-                                                frame = int(keyframe.co[0])
-
-                                                # Filter keyframe berdasarkan rentang frame yang ditentukan
-                                                if scene.use_custom_frame_range:
-                                                    if frame < scene.custom_start_frame or frame > scene.custom_end_frame:
-                                                        continue  # Skip keyframe di luar rentang
-
-                                                # Ambil nilai keyframe
-                                                value = keyframe.co[1]
-
-                                                # Simpan custom property dengan tipe data
-                                                bone_data[bone.name][frame]["custom_props"][prop_name] = {
-                                                    "value": value,
-                                                    "type": get_value_type(bone, prop_name, value)
-                                                }
-
-        if not bone_data:
-            return {'CANCELLED'}
-
-        # Menulis data ke file .py
-        with open(script_path, 'w') as file:
-            file.write("import bpy\n")
-            file.write("import math\n\n")
-            file.write("# Mendapatkan scene aktif\n")
-            file.write("scene = bpy.context.scene\n\n")
-            file.write("# Mendapatkan daftar tulang yang dipilih\n")
-            file.write("selected_pose_bones = bpy.context.selected_pose_bones\n")
-            file.write("if not selected_pose_bones:\n")  
-            file.write("    print('Tidak ada tulang yang dipilih.')\n")  
-            file.write("else:\n") 
-            file.write("    armature_obj = selected_pose_bones[0].id_data\n")  
-            file.write("    selected_bones = [bone.name for bone in selected_pose_bones]\n")                                  
-            file.write("# Menyiapkan dictionary untuk menyimpan bone yang cocok\n")
-            file.write("matched_bones = {}\n\n")
-
-            # Gabungkan semua frame dari semua bone
-            all_frames = set()
-            for bone_name, frames in bone_data.items():
-                all_frames.update(frames.keys())
-            all_frames = sorted(all_frames)
+        sidecar_path = os.path.join(anim_data_folder, f"{file_name}.json")
+        
+        frame_range = None
+        if scene.use_custom_frame_range:
+            frame_range = (scene.custom_start_frame, scene.custom_end_frame)
 
-            prev_frame = None
-            for frame in all_frames:
-                file.write(f"# Frame {frame}\n")
-                if prev_frame is None:
-                    file.write("frame_current = scene.frame_current\n")
-                    file.write("scene.frame_set(frame_current)\n")
-                    file.write("bpy.ops.anim.keyframe_insert()\n")
+        bone_names = [bone.name for bone in armature_obj.pose.bones if bone.bone.select]
+        curves = collect_anim_clip(armature_obj, bone_names, frame_range)
+        if clip_format == 'BINARY' and not curves:
+            return {'CANCELLED'}
 
-                else:
-                    frame_distance = frame - prev_frame
-                    file.write(f"frame_target = frame_current + {frame_distance}\n")
-                    file.write("scene.frame_set(frame_target)\n")
-                    file.write("frame_current = frame_target\n")
-                
-                for bone_name, frames in bone_data.items():
-                    if frame in frames:
-                        file.write(f"if '{bone_name}' in selected_bones:\n")
-                        file.write(f"    bone = armature_obj.pose.bones['{bone_name}']\n")
-                        data = frames[frame]
-                        for data_path, value in data.items():
-                            if data_path == "location":
-                                # Ambil nilai untuk X, Y, Z. Gunakan nilai default jika tidak ada keyframe.
-                                x = value.get(0, bone.location[0])  # Gunakan nilai saat ini untuk X jika tidak ada keyframe
-                                y = value.get(1, bone.location[1])  # Gunakan nilai saat ini untuk Y jika tidak ada keyframe
-                                z = value.get(2, bone.location[2])  # Gunakan nilai saat ini untuk Z jika tidak ada keyframe
-                                
-                                # Menulis data lokasi dengan nilai yang sudah disinkronisasi
-                                file.write(f"    bone.location = ({x}, {y}, {z})\n")
-                                file.write(f"    bone.keyframe_insert(data_path='location')\n")
-
-
-                            elif data_path == "rotation_quaternion":
-                                # Pastikan semua sumbu (W, X, Y, Z) memiliki keyframe
-                                w = value.get(0, bone.rotation_quaternion[0])
-                                x = value.get(1, bone.rotation_quaternion[1])
-                                y = value.get(2, bone.rotation_quaternion[2])
-                                z = value.get(3, bone.rotation_quaternion[3])
-                                file.write(f"    bone.rotation_quaternion = ({w}, {x}, {y}, {z})\n")
-                                file.write(f"    bone.keyframe_insert(data_path='rotation_quaternion')\n")
-                            elif data_path == "rotation_euler":
-                                # Pastikan semua sumbu (X, Y, Z) memiliki keyframe
-                                x = value.get(0, bone.rotation_euler[0])
-                                y = value.get(1, bone.rotation_euler[1])
-                                z = value.get(2, bone.rotation_euler[2])
-                                file.write(f"    bone.rotation_euler = ({x}, {y}, {z})\n")
-                                file.write(f"    bone.keyframe_insert(data_path='rotation_euler')\n")
-                            elif data_path == "scale":
-                                # Pastikan semua sumbu (X, Y, Z) memiliki keyframe
-                                x = value.get(0, bone.scale[0])
-                                y = value.get(1, bone.scale[1])
-                                z = value.get(2, bone.scale[2])
-                                file.write(f"    bone.scale = ({x}, {y}, {z})\n")
-                                file.write(f"    bone.keyframe_insert(data_path='scale')\n")
-                                    
-                            elif data_path == "custom_props":
-                                for prop_name, prop_data in value.items():
-                                    prop_value = prop_data["value"]
-                                    prop_type = prop_data["type"]
-                                    
-                                    if prop_type == "int":
-                                        file.write(f'    bone["{prop_name}"] = int({prop_value})\n')
-                                    elif prop_type == "float":
-                                        file.write(f'    bone["{prop_name}"] = float({prop_value})\n')
-                                    elif prop_type == "str":
-                                        file.write(f'    bone["{prop_name}"] = "{prop_value}"\n')
-                                    elif prop_type == "list":
-                                        file.write(f'    bone["{prop_name}"] = {list(prop_value)}\n')
-                                    else:
-                                        file.write(f'    bone["{prop_name}"] = {prop_value}\n')
-                                    
-                                    # Tambahkan keyframe
-                                    file.write(f'    bone.keyframe_insert(data_path=\'["{prop_name}"]\')\n')
-
-                                    
-                prev_frame = frame
-                file.write("\n")
+        # Bandingkan hash tiap kurva dengan export sebelumnya (sidecar .json)
+        hashes = hash_curves(curves)
+        sidecar = read_clip_sidecar(sidecar_path)
+        old_hashes = sidecar.get("curves") if sidecar.get("format") == clip_format else None
+        if old_hashes is None:
+            changed = set(hashes)
+        else:
+            changed = {key for key, digest in hashes.items() if old_hashes.get(key) != digest}
+            changed |= set(old_hashes) - set(hashes)
+
+        meta = clip_meta(armature_obj, bone_names, curves) if curves else None
+        new_sidecar = clip_sidecar(clip_format, meta, hashes)
+        data_path = clip_path if clip_format == 'BINARY' else script_path
+        if changed or old_hashes is None or not os.path.exists(data_path):
+            if clip_format == 'BINARY':
+                write_anim_clip(clip_path, curves, meta, changed if old_hashes is not None else None)
+            else:
+                detach_store_link(script_path)
+                if not write_bone_keyframe_script(armature_obj, scene, script_path):
+                    return {'CANCELLED'}
+            write_clip_sidecar(sidecar_path, new_sidecar)
+        else:
+            print(f"Tidak ada kurva yang berubah, {os.path.basename(data_path)} tidak ditulis ulang.")
+            if sidecar.get("meta") != new_sidecar.get("meta"):
+                write_clip_sidecar(sidecar_path, new_sidecar)  # Sidecar lama tanpa/beda metadata
+
+        # Satu entry hanya punya satu format: reader mengecek .anm lebih dulu dan store menghitung
+        # semua file, jadi file format lain dari export sebelumnya dihapus
+        stale_path = script_path if clip_format == 'BINARY' else clip_path
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+        # Preview hanya dirender ulang jika ada kurva yang berubah atau file preview belum ada
+        if not preview:
+            return {'FINISHED'}
+        if (not changed and os.path.exists(playblast_path) and os.path.exists(screenshot_path)
+                and os.path.exists(sprite_path)):
+            print(f"Preview {file_name} masih sesuai, render dilewati.")
+            return {'FINISHED'}
                 
-        # Playblast viewport dalam format MP4
-        bpy.context.scene.render.filepath = playblast_path
-        bpy.context.scene.render.image_settings.file_format = 'FFMPEG'
-        bpy.context.scene.render.ffmpeg.format = 'MPEG4'
-        bpy.context.scene.render.ffmpeg.codec = 'H264'
-        bpy.context.scene.render.ffmpeg.audio_codec = 'AAC'
-        bpy.ops.render.opengl(animation=True)  # Render playblast
-
-        # Ambil screenshot dari frame pertama
-        scene.frame_set(scene.frame_start)  # Set frame ke frame pertama
-
-        # Simpan pengaturan format file asli
-        original_file_format = bpy.context.scene.render.image_settings.file_format
-
-        # Set format file ke PNG untuk screenshot
-        bpy.context.scene.render.image_settings.file_format = 'PNG'
-        bpy.context.scene.render.filepath = screenshot_path  # Set filepath untuk screenshot
-        bpy.ops.render.opengl(write_still=True)  # Ambil screenshot
-
-        # Kembalikan format file ke pengaturan asli (untuk playblast)
-        bpy.context.scene.render.image_settings.file_format = original_file_format
-        
+        for path in (playblast_path, screenshot_path, sprite_path):
+            detach_store_link(path)
+        # Preview mp4 + png: di proses terpisah jika bisa, export langsung selesai
+        if not (scene.anim_preview_background
+                and start_preview_job(scene, file_name, playblast_path, screenshot_path, sprite_path)):
+            render_preview_foreground(scene, playblast_path, screenshot_path, sprite_path)
+
     finally:
         # Kembalikan nilai asli frame_start dan frame_end
         scene.frame_start = original_start_frame
@@ -378,21 +1127,42 @@ def import_bone_keyframe_data(context, filepath):
         print(f"Folder ANIM_DATA tidak ditemukan di: {directory}")
         return {'CANCELLED'}
 
+    clip_filepath = os.path.join(anim_data_dir, f"{name}{ANM_EXT}")
+    if os.path.exists(clip_filepath):
+        return import_anim_clip(context, clip_filepath)
+
     script_filepath = os.path.join(anim_data_dir, f"{name}.py")  # Asumsi file script berekstensi .py
 
     if not os.path.exists(script_filepath):
         print(f"File script {name}.py tidak ditemukan di: {anim_data_dir}")
         return {'CANCELLED'}
     
+    # Script lama tidak di-exec lagi: dibaca sebagai data lalu diterapkan per kurva
+    return import_anim_clip(context, script_filepath)
+    
+def import_anim_clip(context, clip_filepath):
+    selected_pose_bones = context.selected_pose_bones
+    if not selected_pose_bones:
+        print('Tidak ada tulang yang dipilih.')
+        return {'CANCELLED'}
+
+    armature_obj = selected_pose_bones[0].id_data
+    selected_bones = [bone.name for bone in selected_pose_bones]
+
     try:
-        with open(script_filepath, 'r') as file:
-            exec(file.read())
-        print(f"Data keyframe dari {script_filepath} berhasil diimpor.")
-        return {'FINISHED'}
-    except Exception as e:  # Tangani potensi error saat membaca atau mengeksekusi script
-        print(f"Terjadi error saat mengimpor script: {e}")
+        if clip_filepath.endswith(ANM_EXT):
+            # Hanya blok bone yang dipilih yang dibaca dari file
+            header, curves = read_anim_clip(clip_filepath, selected_bones)
+        else:
+            header, curves = read_bone_keyframe_script(clip_filepath)
+        applied = apply_anim_clip(armature_obj, header, curves, selected_bones, context.scene.frame_current)
+    except Exception as e:
+        print(f"Terjadi error saat mengimpor klip: {e}")
         return {'CANCELLED'}
-    
+
+    print(f"{applied} fcurve dari {clip_filepath} berhasil diimpor.")
+    return {'FINISHED'}
+
 def preview_video(filepath):
     if not os.path.exists(filepath):
         print(f"File video tidak ditemukan: {filepath}")
@@ -434,11 +1204,24 @@ class ANIMExportBoneKeyframeData(bpy.types.Operator):
         description="Insert missing keyframes before exporting",
         default=False
     )
+    clip_format: bpy.props.EnumProperty(
+        name="Clip Format",
+        items=[
+            ('SCRIPT', "Script (.py)", "Per-frame Python script"),
+            ('BINARY', "Binary (.anm)", "Lossless keys: handles, interpolation and easing"),
+        ],
+        default='BINARY'
+    )
 
     def execute(self, context):
         if self.insert_missing_keyframes:
             insert_missing_keyframes()
-        return export_bone_keyframe_data(context, self.filepath)
+        result = export_bone_keyframe_data(context, self.filepath, self.clip_format)
+        # Katalog bone (library_catalog.py) ikut diperbarui
+        update_catalog = bpy.app.driver_namespace.get("raha_library_catalog_update")
+        if 'FINISHED' in result and update_catalog is not None:
+            update_catalog(os.path.dirname(bpy.path.abspath(self.filepath)))
+        return result
 
     def invoke(self, context, event):
         context.window_manager.fileselect_add(self)
@@ -465,9 +1248,15 @@ class ANIMBoneKeyframePanel(bpy.types.Panel):
             layout.prop(scene, "custom_end_frame", text="End Frame")        
            
         layout.prop(context.scene, "insert_missing_keyframes", text="let's fix your keyframe")
+        layout.prop(context.scene, "anim_clip_format", text="Format")
         export_op = layout.operator("object.export_bone_keyframe_data", text="Export Animation")
         export_op.insert_missing_keyframes = context.scene.insert_missing_keyframes      
+        export_op.clip_format = context.scene.anim_clip_format
         layout.operator("object.export_bone_keyframe_data_pose", text="Export (Pose)") 
+        layout.prop(context.scene, "anim_preview_background", text="Background Preview")
+
+        for file_name, job in _preview_jobs.items():
+            layout.label(text=f"Preview {file_name}: {int(job['progress'] * 100)}%", icon='RENDER_ANIMATION')
         
         layout.separator()        
                                              
@@ -499,6 +1288,12 @@ def register():
     bpy.utils.register_class(ANIMExportBoneSettings) 
     bpy.utils.register_class(ANIMBoneKeyframePanel)
 
+    # Index fcurve bersama: invalidasi saat action berubah / file baru dibuka / undo / redo
+    for handlers, handler in action_index_handlers():
+        handlers[:] = [h for h in handlers if getattr(h, "__name__", "") != handler.__name__]
+        handlers.append(handler)
+    bpy.app.driver_namespace[ACTION_INDEX_KEY] = get_bone_fcurves
+
     # Definisi property dengan format yang benar
     use_custom_frame_range: bpy.props.BoolProperty(
         name="Custom Frame Range",
@@ -523,8 +1318,18 @@ def unregister():
     bpy.utils.unregister_class(ANIMExportBoneSettings) 
     bpy.utils.unregister_class(ANIMBoneKeyframePanel)
 
+    for handlers, handler in action_index_handlers():
+        if handler in handlers:
+            handlers.remove(handler)
+    bpy.app.driver_namespace.pop(ACTION_INDEX_KEY, None)
+    _action_index_cache.clear()
+    if bpy.app.timers.is_registered(poll_preview_jobs):
+        bpy.app.timers.unregister(poll_preview_jobs)
+
     # Menghapus properti dari bpy.types.Scene dengan benar
     del bpy.types.Scene.insert_missing_keyframes
+    del bpy.types.Scene.anim_clip_format
+    del bpy.types.Scene.anim_preview_background
     del bpy.types.Scene.custom_start_frame
     del bpy.types.Scene.custom_end_frame
     
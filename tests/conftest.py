@@ -0,0 +1,253 @@
+"""Load the add-on scripts outside Blender for testing their pure-Python helpers.
+
+The scripts import bpy at module level. When the tests run in Blender's own Python the real module
+is used; otherwise a minimal stand-in is installed that only satisfies the imports and class
+definitions. Anything a test actually exercises must not depend on it.
+"""
+import importlib.util
+import os
+import sys
+import types
+from array import array
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _Anything:
+    """Attribute, call and base-class sink for the parts of bpy only touched at import time."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return _Anything()
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+    def __iter__(self):
+        return iter(())
+
+    def __bool__(self):
+        return False
+
+    def __mro_entries__(self, bases):
+        return (object,)
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    module.__getattr__ = lambda attr: _Anything()
+    sys.modules[name] = module
+    return module
+
+
+def _escape_identifier(name):
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _flip_name(name, strip_digits=False):
+    for left, right in ((".L", ".R"), ("_L", "_R"), (".l", ".r"), ("_l", "_r")):
+        if name.endswith(left):
+            return name[:-len(left)] + right
+        if name.endswith(right):
+            return name[:-len(right)] + left
+    return name
+
+
+def _install_bpy_stand_in():
+    handlers = _module("bpy.app.handlers", persistent=lambda func: func,
+                       depsgraph_update_post=[], load_post=[], save_pre=[], undo_post=[], redo_post=[])
+    timers = types.SimpleNamespace(register=lambda *a, **k: None, unregister=lambda func: None,
+                                   is_registered=lambda func: False)
+    app = _module("bpy.app", handlers=handlers, timers=timers, background=True, binary_path="blender",
+                  driver_namespace={}, version=(4, 1, 0), version_string="4.1.0", tempdir="")
+    previews = _module("bpy.utils.previews", new=dict, remove=lambda collection: None)
+    utils = _module("bpy.utils", previews=previews, escape_identifier=_escape_identifier, flip_name=_flip_name,
+                    register_class=lambda cls: None, unregister_class=lambda cls: None)
+    bpy_types = _module("bpy.types", Operator=object, Panel=object, PropertyGroup=object, UIList=object,
+                        Menu=object, ID=type("ID", (), {}))
+    props = _module("bpy.props")
+    path = _module("bpy.path", abspath=lambda p: p)
+    _module("bpy", app=app, utils=utils, types=bpy_types, props=props, path=path)
+    _module("gpu")
+    io_utils = _module("bpy_extras.io_utils", ExportHelper=object, ImportHelper=object)
+    _module("bpy_extras", io_utils=io_utils)
+
+
+# Curve stand-ins for tests that drive the fcurve read/write engine without Blender
+class FakeKeyframePoints:
+    """keyframe_points with the foreach_get/foreach_set/add surface write_fcurve_keys uses."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.columns = {name: [] for name, _code, _width in fields}
+
+    def __len__(self):
+        return len(self.columns["co"]) // 2
+
+    def add(self, count):
+        for name, _code, width in self.fields:
+            self.columns[name].extend([0] * (width * count))
+
+    def foreach_get(self, name, buffer):
+        buffer[:] = array(buffer.typecode, self.columns[name])
+
+    def foreach_set(self, name, buffer):
+        self.columns[name] = list(buffer)
+
+    def __iter__(self):
+        co = self.columns["co"]
+        return iter([types.SimpleNamespace(co=point) for point in zip(co[0::2], co[1::2])])
+
+
+class FakeFCurve:
+    def __init__(self, fields, data_path, array_index, points=()):
+        self.data_path = data_path
+        self.array_index = array_index
+        self.extrapolation = 'CONSTANT'
+        self.keyframe_points = FakeKeyframePoints(fields)
+        self.keyframe_points.add(len(points))
+        self.keyframe_points.columns["co"] = [v for point in points for v in point]
+
+    def points(self):
+        co = self.keyframe_points.columns["co"]
+        return list(zip(co[0::2], co[1::2]))
+
+    def evaluate(self, frame):
+        # Linear is enough for the test: filled keys must sit on the existing curve
+        points = self.points()
+        for (f0, v0), (f1, v1) in zip(points, points[1:]):
+            if f0 <= frame <= f1:
+                return v0 + (v1 - v0) * (frame - f0) / (f1 - f0)
+        return points[0][1] if frame < points[0][0] else points[-1][1]
+
+    def update(self):
+        pass
+
+
+class FakeFCurves(list):
+    def __init__(self, fields, curves):
+        super().__init__(curves)
+        self.fields = fields
+
+    def new(self, data_path, index=0, action_group=""):
+        fcurve = FakeFCurve(self.fields, data_path, index)
+        self.append(fcurve)
+        return fcurve
+
+
+class FakePoseBones(dict):
+    # bpy collections iterate over their items and index by name
+    def __iter__(self):
+        return iter(self.values())
+
+
+def fake_armature(name, bone_names, fcurves):
+    """Armature object with every bone selected and one action holding the given FakeFCurves."""
+    bones = FakePoseBones({
+        bone: types.SimpleNamespace(name=bone, bone=types.SimpleNamespace(select=True), rotation_mode='XYZ',
+                                    location=(0.0, 0.0, 0.0), keys=lambda: [])
+        for bone in bone_names
+    })
+    action = types.SimpleNamespace(fcurves=fcurves, as_pointer=lambda: id(fcurves))
+    return types.SimpleNamespace(type='ARMATURE', name=name, animation_data=types.SimpleNamespace(action=action),
+                                 pose=types.SimpleNamespace(bones=bones))
+
+
+class FakePoseChannels:
+    """pose.bones with one float column per channel (foreach_get/foreach_set) and bones by index or name."""
+
+    class Bone(dict):
+        # Custom properties live in the dict itself, like ID properties on a pose bone
+        def __init__(self, name):
+            super().__init__()
+            self.name = name
+
+    def __init__(self, bone_names, channels):
+        self.bones = [self.Bone(name) for name in bone_names]
+        self.columns = {name: array("f", [0.0]) * (width * len(self.bones)) for name, width in channels}
+
+    def keys(self):
+        return [bone.name for bone in self.bones]
+
+    def __len__(self):
+        return len(self.bones)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self.bones[key]
+        return self.bones[self.keys().index(key)]
+
+    def foreach_get(self, name, out):
+        out[:] = self.columns[name]
+
+    def foreach_set(self, name, values):
+        self.columns[name] = array("f", values)
+
+    def get(self, bone, name):
+        width = len(self.columns[name]) // len(self.bones)
+        index = self.keys().index(bone)
+        return list(self.columns[name][index * width:(index + 1) * width])
+
+    def set(self, bone, name, values):
+        width = len(values)
+        index = self.keys().index(bone)
+        self.columns[name][index * width:(index + 1) * width] = array("f", values)
+
+
+def fake_pose_armature(bone_names, channels):
+    """Armature object whose pose.bones is a FakePoseChannels with the given (channel, width) columns."""
+    return types.SimpleNamespace(type='ARMATURE', name="rig", data=types.SimpleNamespace(name="rig"),
+                                 pose=types.SimpleNamespace(bones=FakePoseChannels(bone_names, channels)),
+                                 update_tag=lambda refresh=None: None)
+
+
+if importlib.util.find_spec("bpy") is None:
+    _install_bpy_stand_in()
+
+
+def load_script(name):
+    """Import <repo>/<name>.py as a fresh module (the scripts are not a package)."""
+    spec = importlib.util.spec_from_file_location(f"raha_{name}", os.path.join(ROOT, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def save_anm():
+    return load_script("save_anm")
+
+
+@pytest.fixture(scope="module")
+def import_anm():
+    return load_script("import_anm")
+
+
+@pytest.fixture
+def library_pose():
+    # Fresh per test: the browser keeps its listing and caches in module globals
+    return load_script("library_pose")
+
+
+@pytest.fixture(scope="module")
+def library_store():
+    return load_script("library_store")
+
+
+@pytest.fixture(scope="module")
+def anim_lib_cli():
+    return load_script("anim_lib_cli")
+
+
+@pytest.fixture
+def library_catalog():
+    module = load_script("library_catalog")
+    yield module
+    # Query connections are cached per library folder
+    for conn in module._connections.values():
+        conn.close()
@@ -0,0 +1,32 @@
+import types
+
+
+class FakeAction:
+    def __init__(self, data_paths, pointer=1):
+        self.fcurves = [types.SimpleNamespace(data_path=path, array_index=0) for path in data_paths]
+        self.pointer = pointer
+
+    def as_pointer(self):
+        return self.pointer
+
+
+def test_index_groups_fcurves_by_bone(save_anm):
+    action = FakeAction(['pose.bones["hand.L"].location', 'pose.bones["hand.L"]["ik_fk"]', 'pose.bones["spine"].scale'])
+    assert save_anm.get_bone_fcurves(action, "hand.L") == action.fcurves[:2]
+    assert save_anm.get_bone_fcurves(action, "hand.L", transforms_only=True) == action.fcurves[:1]
+    assert save_anm.get_bone_fcurves(action, "missing") == []
+
+
+def test_undo_and_redo_drop_cached_fcurves(save_anm):
+    handlers = save_anm.bpy.app.handlers
+    installed = dict((id(hooks), handler) for hooks, handler in save_anm.action_index_handlers())
+    for hooks in (handlers.load_post, handlers.undo_post, handlers.redo_post):
+        assert installed[id(hooks)] is save_anm.action_index_reset
+
+    before = FakeAction(['pose.bones["hand.L"].location'], pointer=7)
+    save_anm.get_bone_fcurves(before, "hand.L")
+    # Undo rebuilds the action; the new one can reuse the pointer with the same fcurve count
+    after = FakeAction(['pose.bones["spine"].location'], pointer=7)
+    save_anm.action_index_reset()
+    assert save_anm.get_bone_fcurves(after, "hand.L") == []
+    assert save_anm.get_bone_fcurves(after, "spine") == after.fcurves
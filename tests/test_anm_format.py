@@ -0,0 +1,171 @@
+import json
+from array import array
+
+import pytest
+
+
+def make_curve(save_anm, bone, path, index, frames):
+    keys = save_anm.keys_from_points([(float(frame), frame * 0.5 + index) for frame in frames])
+    keys.update(bone=bone, path=path, index=index)
+    return keys
+
+
+def make_clip(save_anm):
+    return [
+        make_curve(save_anm, "hand.L", ".location", 0, range(1, 6)),
+        make_curve(save_anm, "hand.L", ".location", 1, range(1, 6)),
+        make_curve(save_anm, "spine", ".rotation_quaternion", 0, range(1, 11, 3)),
+        make_curve(save_anm, 'odd "name"', '["ik_fk"]', 0, (1, 20)),
+    ]
+
+
+def write_v1_clip(save_anm, filepath, curves):
+    """Version 1 layout: co, handles and interpolation only, and no per-bone toc."""
+    fields = [["co", "f", 2], ["handle_left", "f", 2], ["handle_right", "f", 2], ["interpolation", "B", 1]]
+    header = {"bones": sorted({curve["bone"] for curve in curves}), "version": 1, "fields": fields, "curves": []}
+    blocks = []
+    offset = 0
+    for curve in curves:
+        block = b"".join(curve[name].tobytes() for name, _code, _width in fields)
+        header["curves"].append({"bone": curve["bone"], "path": curve["path"], "index": curve["index"],
+                                 "count": curve["count"], "offset": offset, "size": len(block)})
+        blocks.append(block)
+        offset += len(block)
+    header_bytes = json.dumps(header).encode("utf-8")
+    with open(filepath, 'wb') as file:
+        file.write(save_anm.ANM_PREFIX.pack(save_anm.ANM_MAGIC, 1, len(header_bytes)))
+        file.write(header_bytes)
+        file.write(b"".join(blocks))
+
+
+def test_round_trip_keeps_curves_and_meta(save_anm, tmp_path):
+    curves = make_clip(save_anm)
+    filepath = str(tmp_path / f"walk{save_anm.ANM_EXT}")
+    save_anm.write_anim_clip(filepath, curves, {"bones": ["hand.L", "spine"], "armature": "RIG"})
+
+    header, read = save_anm.read_anim_clip(filepath)
+    assert header["armature"] == "RIG"
+    assert [save_anm.curve_key(curve) for curve in read] == [save_anm.curve_key(curve) for curve in curves]
+    for original, loaded in zip(curves, read):
+        assert loaded["co"] == original["co"]
+    assert save_anm.hash_curves(read) == save_anm.hash_curves(curves)
+
+
+def test_version_1_files_get_default_columns(save_anm, tmp_path):
+    curves = make_clip(save_anm)
+    filepath = str(tmp_path / "old.anm")
+    write_v1_clip(save_anm, filepath, curves)
+
+    header, read = save_anm.read_anim_clip(filepath)
+    assert "toc" not in header
+    assert len(read) == len(curves)
+    for original, loaded in zip(curves, read):
+        for name in ("co", "handle_left", "handle_right", "interpolation"):
+            assert loaded[name] == original[name]
+        # Columns added in version 2 come back as Blender's defaults
+        assert loaded["easing"] == array("B", [save_anm.ANM_DEFAULTS["easing"]]) * original["count"]
+        assert loaded["handle_left_type"] == array("B", [save_anm.ANM_DEFAULTS["handle_left_type"]]) * original["count"]
+
+
+def test_rejects_other_files(save_anm, tmp_path):
+    filepath = tmp_path / "not_a_clip.anm"
+    filepath.write_bytes(save_anm.ANM_PREFIX.pack(b"NOPE", 1, 2) + b"{}")
+    with pytest.raises(ValueError):
+        save_anm.read_anim_clip(str(filepath))
+
+
+def test_lossless_columns_survive_the_round_trip(save_anm, tmp_path):
+    curve = make_curve(save_anm, "hand.L", ".location", 2, (1, 5, 9))
+    curve["handle_left"] = array("f", [0.5, 0.1, 4.0, 2.2, 8.5, 3.3])
+    curve["handle_right"] = array("f", [1.5, 0.2, 6.0, 2.4, 9.5, 3.6])
+    curve["interpolation"] = array("B", [0, 1, 2])
+    curve["easing"] = array("B", [1, 2, 3])
+    curve["handle_left_type"] = array("B", [0, 1, 3])
+    curve["handle_right_type"] = array("B", [2, 1, 4])
+    curve["back"] = array("f", [1.0, 2.0, 3.0])
+    curve["extrapolation"] = 'LINEAR'
+    filepath = str(tmp_path / "lossless.anm")
+    save_anm.write_anim_clip(filepath, [curve], {"bones": ["hand.L"]})
+
+    header, (loaded,) = save_anm.read_anim_clip(filepath)
+    assert header["version"] == save_anm.ANM_VERSION
+    assert loaded["extrapolation"] == 'LINEAR'
+    for name, _code, _width in save_anm.ANM_FIELDS:
+        assert loaded[name] == curve[name], name
+
+
+def test_rejects_newer_versions(save_anm, tmp_path):
+    filepath = tmp_path / "future.anm"
+    filepath.write_bytes(save_anm.ANM_PREFIX.pack(save_anm.ANM_MAGIC, save_anm.ANM_VERSION + 1, 2) + b"{}")
+    with pytest.raises(ValueError):
+        save_anm.read_anim_clip(str(filepath))
+
+
+def test_partial_read_returns_only_the_requested_bones(save_anm, tmp_path):
+    curves = make_clip(save_anm)
+    filepath = str(tmp_path / "walk.anm")
+    save_anm.write_anim_clip(filepath, curves, {"bones": ["hand.L", "spine", 'odd "name"']})
+
+    header, read = save_anm.read_anim_clip(filepath, ['odd "name"', "hand.L", "missing"])
+    assert [curve["bone"] for curve in read] == ['odd "name"', "hand.L", "hand.L"]
+    by_key = {save_anm.curve_key(curve): curve for curve in curves}
+    for loaded in read:
+        assert loaded["co"] == by_key[save_anm.curve_key(loaded)]["co"]
+
+    # The toc range of a bone spans exactly its curve blocks
+    for bone, (offset, size) in header["toc"].items():
+        entries = [entry for entry in header["curves"] if entry["bone"] == bone]
+        assert offset == entries[0]["offset"]
+        assert size == sum(entry["size"] for entry in entries)
+
+
+def test_partial_read_of_files_without_toc(save_anm, tmp_path):
+    curves = make_clip(save_anm)
+    filepath = str(tmp_path / "old.anm")
+    write_v1_clip(save_anm, filepath, curves)
+
+    _header, read = save_anm.read_anim_clip(filepath, ["spine"])
+    assert [save_anm.curve_key(curve) for curve in read] == [save_anm.curve_key(curves[2])]
+    assert read[0]["co"] == curves[2]["co"]
+
+
+def full_write(save_anm, filepath, curves, meta):
+    save_anm.write_anim_clip(filepath, curves, meta)
+    with open(filepath, 'rb') as file:
+        return file.read()
+
+
+def test_partial_rewrite_only_touches_changed_blocks(save_anm, tmp_path):
+    meta = {"bones": ["hand.L", "spine"]}
+    curves = make_clip(save_anm)
+    filepath = str(tmp_path / "walk.anm")
+    save_anm.write_anim_clip(filepath, curves, meta)
+
+    header, _read = save_anm.read_anim_clip(filepath)
+    base = save_anm.ANM_PREFIX.size + len(json.dumps(header).encode("utf-8"))
+    untouched = base + header["curves"][0]["offset"]
+    with open(filepath, 'r+b') as file:
+        file.seek(untouched)
+        file.write(b"\xff\xff\xff\xff")  # Would be overwritten by a full rewrite
+
+    curves[2]["co"] = array("f", [value + 1.0 for value in curves[2]["co"]])
+    save_anm.write_anim_clip(filepath, curves, meta, {save_anm.curve_key(curves[2])})
+
+    _header, read = save_anm.read_anim_clip(filepath)
+    assert read[2]["co"] == curves[2]["co"]
+    with open(filepath, 'rb') as file:
+        file.seek(untouched)
+        assert file.read(4) == b"\xff\xff\xff\xff"
+
+
+def test_layout_change_falls_back_to_a_full_rewrite(save_anm, tmp_path):
+    meta = {"bones": ["hand.L", "spine"]}
+    curves = make_clip(save_anm)
+    filepath = str(tmp_path / "walk.anm")
+    save_anm.write_anim_clip(filepath, curves, meta)
+
+    curves[0] = make_curve(save_anm, "hand.L", ".location", 0, range(1, 12))  # More keys: offsets move
+    save_anm.write_anim_clip(filepath, curves, meta, {save_anm.curve_key(curves[0])})
+    with open(filepath, 'rb') as file:
+        written = file.read()
+    assert written == full_write(save_anm, str(tmp_path / "reference.anm"), curves, meta)
@@ -0,0 +1,70 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+
+def browser_context():
+    scene = SimpleNamespace(sna_image_filter="", sna_image_tag='ALL', sna_image_page=1, sna_image_page_size=48,
+                            sna_image_cache_entries=256, sna_image_cache_mb=64)
+    return SimpleNamespace(scene=scene)
+
+
+@pytest.fixture
+def listing(library_pose, tmp_path):
+    browser = library_pose.browser
+    browser.icons = {}
+    files = {name: (i, 10) for i, name in enumerate(["a.png", "b.png", "c.png"])}
+    browser.listing[:] = [(name, os.path.join(str(tmp_path), name), None, library_pose._library_browser["name_tags"](name))
+                          for name in files]
+    browser.watch.update(path=str(tmp_path), entries={
+        name: {"name": name, "mtime": mtime, "size": size, "thumb": None} for name, (mtime, size) in files.items()})
+    return library_pose, str(tmp_path), files
+
+
+def enum_numbers(library_pose):
+    return {item[0]: item[4] for item in library_pose.sna_images_enum_items(None, browser_context())}
+
+
+# The scene stores the enum number; it must keep naming the same pose when the watcher edits the listing
+def test_enum_numbers_survive_removals_and_renames(listing):
+    library_pose, library, files = listing
+    before = enum_numbers(library_pose)
+    assert len(set(before.values())) == 3
+
+    del files["a.png"]
+    files["c_final.png"] = files.pop("c.png")  # Same mtime and size: a rename
+    assert library_pose.browser.apply_delta(library, files)
+
+    after = enum_numbers(library_pose)
+    assert sorted(after) == ["b.png", "c_final.png"]
+    assert after["b.png"] == before["b.png"]
+    assert after["c_final.png"] not in before.values()
+
+
+class LazyPreviews(dict):
+    """Preview collection whose previews fail if their size is read before Blender generated them."""
+
+    class Preview:
+        icon_id = 1
+
+        @property
+        def image_size(self):
+            raise AssertionError("image_size read in the icon accounting")
+
+    def load(self, name, path, kind):
+        self[name] = self.Preview()
+
+
+def test_icon_accounting_does_not_generate_previews(listing):
+    library_pose, library, _files = listing
+    library_pose.browser.icons = LazyPreviews()
+    for name in ("a.png", "b.png"):
+        open(os.path.join(library, name), 'wb').close()
+
+    enum_numbers(library_pose)
+    library_pose.browser.view_cache["items_key"] = None
+    enum_numbers(library_pose)  # Cache hits
+
+    assert library_pose.browser.icon_stats["bytes"] == 2 * library_pose._library_browser["PREVIEW_BYTES"]
+    assert library_pose.browser.icon_stats["hits"] == 2
@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import FakeFCurve, FakeFCurves, fake_armature
+
+
+def test_shot_command_builds_blender_argv(anim_lib_cli):
+    shot = {"blend": "shots/sh010.blend", "command": "export", "armature": "RIG", "bones": "hand.*",
+            "start": 1, "no_preview": True, "save": False, "end": None}
+
+    assert anim_lib_cli.shot_command(shot) == [
+        anim_lib_cli.bpy.app.binary_path, "-b", "shots/sh010.blend",
+        "--python", anim_lib_cli.SCRIPT_PATH, "--", "export",
+        "--armature", "RIG", "--bones", "hand.*", "--start", "1", "--no-preview",
+    ]
+
+
+def test_shot_command_without_blend_file(anim_lib_cli):
+    argv = anim_lib_cli.shot_command({"command": "import", "clip": "D:/lib/wave", "frame": 1001})
+    assert argv[:3] == [anim_lib_cli.bpy.app.binary_path, "-b", "--python"]
+    assert argv[-4:] == ["--clip", "D:/lib/wave", "--frame", "1001"]
+
+
+def test_shot_command_round_trips_through_the_parser(anim_lib_cli):
+    shot = {"command": "import", "armature": "RIG", "clip": "D:/lib/wave", "frame": 1001, "save": True}
+    argv = anim_lib_cli.shot_command(shot)
+    args = anim_lib_cli.build_parser().parse_args(argv[argv.index("--") + 1:])
+
+    assert (args.command, args.armature, args.clip, args.frame, args.save) == ("import", "RIG", "D:/lib/wave", 1001, True)
+    assert args.func is anim_lib_cli.cmd_import
+
+
+@pytest.fixture
+def export_scene(anim_lib_cli, monkeypatch):
+    fields = [(name, code, width) for name, code, width in anim_lib_cli.load_anim_lib()["ANM_FIELDS"]]
+    fcurves = FakeFCurves(fields, [
+        FakeFCurve(fields, f'pose.bones["{bone}"].location', 0, [(1.0, 0.0), (24.0, 1.0)])
+        for bone in ("hand.L", "spine")
+    ])
+    rig = fake_armature("RIG", ["hand.L", "spine"], fcurves)
+    rig.pose.bones["spine"].bone.select = False
+    scene = SimpleNamespace(frame_start=1, frame_end=250, use_custom_frame_range=False, custom_start_frame=1,
+                            custom_end_frame=250, anim_preview_background=False, camera=None,
+                            render=SimpleNamespace(fps=24, fps_base=1.0))
+    view_layer = SimpleNamespace(objects=SimpleNamespace(active=None))
+    monkeypatch.setattr(anim_lib_cli.bpy, "context", SimpleNamespace(scene=scene, view_layer=view_layer,
+                                                                     object=rig), raising=False)
+    monkeypatch.setattr(anim_lib_cli.bpy, "data", SimpleNamespace(objects={"RIG": rig}), raising=False)
+    return rig, scene, view_layer
+
+
+def test_export_goes_through_the_ui_exporter(anim_lib_cli, export_scene, tmp_path):
+    rig, scene, view_layer = export_scene
+    clip = str(tmp_path / "wave")
+    anim_data = tmp_path / "ANIM_DATA"
+
+    argv = ["export", "--armature", "RIG", "--bones", "hand.*", "--start", "5", "--clip", clip, "--no-preview"]
+    assert anim_lib_cli.main(argv + ["--format", "SCRIPT"]) == 0
+    assert (anim_data / "wave.py").exists()
+    assert json.loads((anim_data / "wave.json").read_text())["format"] == "SCRIPT"
+
+    assert anim_lib_cli.main(argv) == 0
+    assert not (anim_data / "wave.py").exists()
+    sidecar = json.loads((anim_data / "wave.json").read_text())
+    assert sidecar["format"] == "BINARY" and sidecar["meta"]["bones"] == ["hand.L"]
+    assert sidecar["meta"]["frame_start"] == 24  # The key on frame 1 is outside --start 5
+
+    # Unchanged curves: the incremental hashes skip the rewrite, exactly like the UI export
+    (anim_data / "wave.anm").write_bytes(b"untouched")
+    assert anim_lib_cli.main(argv) == 0
+    assert (anim_data / "wave.anm").read_bytes() == b"untouched"
+
+    # Selection, frame range and preview mode of the open file are left as they were
+    assert [bone.bone.select for bone in rig.pose.bones] == [True, False]
+    assert (scene.use_custom_frame_range, scene.anim_preview_background) == (False, False)
+    assert view_layer.objects.active is None
@@ -0,0 +1,44 @@
+import os
+import types
+
+import pytest
+
+from conftest import FakeFCurve, FakeFCurves, fake_armature
+
+
+@pytest.fixture
+def export_context(save_anm, monkeypatch):
+    fields = save_anm.ANM_FIELDS
+    fcurves = FakeFCurves(fields, [
+        FakeFCurve(fields, save_anm.bone_data_path("hand.L", ".location"), axis, [(1.0, axis), (12.0, axis + 1.0)])
+        for axis in range(3)
+    ])
+    obj = fake_armature("RIG", ["hand.L"], fcurves)
+    scene = types.SimpleNamespace(frame_start=1, frame_end=250, use_custom_frame_range=False, custom_start_frame=1,
+                                  custom_end_frame=250, anim_preview_background=True,
+                                  render=types.SimpleNamespace(fps=24, fps_base=1.0))
+    context = types.SimpleNamespace(object=obj, scene=scene)
+    monkeypatch.setattr(save_anm.bpy, "context", context, raising=False)
+    return context
+
+
+def test_re_export_in_the_other_format_replaces_the_old_file(save_anm, export_context, tmp_path):
+    filepath = str(tmp_path / "wave.png")
+    clip_path = str(tmp_path / "ANIM_DATA" / "wave.anm")
+    script_path = str(tmp_path / "ANIM_DATA" / "wave.py")
+    sidecar_path = str(tmp_path / "ANIM_DATA" / "wave.json")
+
+    assert save_anm.export_bone_keyframe_data(export_context, filepath, 'BINARY', preview=False) == {'FINISHED'}
+    assert os.path.exists(clip_path) and not os.path.exists(script_path)
+
+    # Readers check .anm first: it must not survive a SCRIPT re-export
+    assert save_anm.export_bone_keyframe_data(export_context, filepath, 'SCRIPT', preview=False) == {'FINISHED'}
+    assert os.path.exists(script_path) and not os.path.exists(clip_path)
+    assert save_anm.read_clip_sidecar(sidecar_path)["format"] == 'SCRIPT'
+
+    # And a stale .py would still be counted by the store after a BINARY re-export
+    assert save_anm.export_bone_keyframe_data(export_context, filepath, 'BINARY', preview=False) == {'FINISHED'}
+    assert os.path.exists(clip_path) and not os.path.exists(script_path)
+    assert save_anm.read_clip_sidecar(sidecar_path)["format"] == 'BINARY'
+    header, curves = save_anm.read_anim_clip(clip_path)
+    assert header["bones"] == ["hand.L"] and len(curves) == 3
@@ -0,0 +1,138 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import load_script
+
+
+# Clips and poses share one journaled transaction (library_browser.py), each with its own journal and trash
+@pytest.fixture(scope="module", params=["import_anm", "library_pose"])
+def browser(request):
+    return load_script(request.param).browser
+
+
+def make_files(library, *names):
+    for name in names:
+        path = library / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+    return [str(library / name) for name in names]
+
+
+def write_journal(browser, library, batch, owner, started, moves, trash=None):
+    journal_path = library / f"{browser.journal_name}-{batch}.json"
+    journal_path.write_text(json.dumps({"owner": owner, "time": started, "committed": False,
+                                        "trash": trash, "moves": moves}))
+    return journal_path
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_batch_moves_every_file_and_clears_the_journal(browser, tmp_path):
+    a, b = make_files(tmp_path, "a.png", "ANIM_DATA/a.anm")
+    moves = [(a, str(tmp_path / "z.png")), (b, str(tmp_path / "ANIM_DATA" / "z.anm"))]
+
+    assert browser.run_file_transaction(str(tmp_path), moves) is None
+    assert sorted(os.listdir(tmp_path)) == ["ANIM_DATA", "z.png"]
+    assert (tmp_path / "ANIM_DATA" / "z.anm").read_text() == "ANIM_DATA/a.anm"
+
+
+def test_delete_removes_only_its_own_trash(browser, tmp_path):
+    a, other = make_files(tmp_path, "a.png", f"{browser.trash_dir}/other-batch/b.png")
+    trash_dir = browser.new_trash_dir(str(tmp_path))
+    moves = [(a, os.path.join(trash_dir, "a.png"))]
+
+    assert browser.run_file_transaction(str(tmp_path), moves, trash_dir) is None
+    assert not os.path.exists(trash_dir) and not os.path.exists(a)
+    # Trash of a batch still running in another session
+    assert os.path.exists(other)
+    assert browser.journal_paths(str(tmp_path)) == []
+
+
+@pytest.mark.parametrize("targets", [("b.png", "c.png"), ("c.png", "c.png")])
+def test_existing_or_repeated_targets_are_rejected(browser, tmp_path, targets):
+    a, b, _c = make_files(tmp_path, "a.png", "b.png", "c.png")
+    moves = [(a, str(tmp_path / targets[0])), (b, str(tmp_path / targets[1]))]
+
+    assert "already exists" in browser.run_file_transaction(str(tmp_path), moves)
+    assert sorted(os.listdir(tmp_path)) == ["a.png", "b.png", "c.png"]
+
+
+def test_failed_move_rolls_back_the_batch(browser, tmp_path):
+    (a,) = make_files(tmp_path, "a.png")
+    moves = [(a, str(tmp_path / "x.png")), (str(tmp_path / "gone.png"), str(tmp_path / "y.png"))]
+
+    error = browser.run_file_transaction(str(tmp_path), moves)
+    assert error.endswith("(no file was changed)")
+    assert sorted(os.listdir(tmp_path)) == ["a.png"]
+
+
+def test_failed_rollback_keeps_the_journal_for_recovery(browser, tmp_path, monkeypatch):
+    (a,) = make_files(tmp_path, "a.png")
+    moved = str(tmp_path / "x.png")
+    moves = [(a, moved), (str(tmp_path / "gone.png"), str(tmp_path / "y.png"))]
+    rename = os.rename
+
+    def failing_rollback(src, dst):
+        if (src, dst) == (moved, a):
+            raise PermissionError("locked by another process")
+        rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", failing_rollback)
+    error = browser.run_file_transaction(str(tmp_path), moves)
+    monkeypatch.undo()
+
+    (journal,) = browser.journal_paths(str(tmp_path))
+    assert "no file was changed" not in error
+    assert "rollback incomplete" in error and journal in error
+    assert os.path.exists(journal) and os.path.exists(moved)
+    with open(journal) as file:
+        assert json.load(file)["owner"] == {"host": socket.gethostname(), "pid": os.getpid()}
+
+    # The next load of the library finishes the rollback
+    browser.recover_file_transactions(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ["a.png"]
+
+
+# Opening the library while another session runs a batch must not undo that batch or empty its trash
+def test_recovery_leaves_live_batches_alone(browser, tmp_path):
+    host = socket.gethostname()
+    live_a, live_trashed, _dead_trashed, _kept = make_files(
+        tmp_path, "live.png", f"{browser.trash_dir}/live/b.png", f"{browser.trash_dir}/dead/c.png",
+        f"{browser.trash_dir}/unlisted/d.png")
+    os.rename(live_a, str(tmp_path / "live_new.png"))
+    live = write_journal(browser, tmp_path, "live", {"host": host, "pid": os.getppid()}, time.time(),
+                         [("live.png", "live_new.png"), ("b.png", f"{browser.trash_dir}/live/b.png")],
+                         f"{browser.trash_dir}/live")
+    remote = write_journal(browser, tmp_path, "remote", {"host": host + "-other", "pid": 1}, time.time(), [])
+    dead = write_journal(browser, tmp_path, "dead", {"host": host, "pid": dead_pid()}, time.time(),
+                         [("c.png", f"{browser.trash_dir}/dead/c.png")], f"{browser.trash_dir}/dead")
+
+    browser.recover_file_transactions(str(tmp_path))
+
+    assert live.exists() and remote.exists() and not dead.exists()
+    assert (tmp_path / "live_new.png").exists() and os.path.exists(live_trashed)
+    # The abandoned batch is rolled back and only the trash it lists is removed
+    assert (tmp_path / "c.png").exists()
+    assert not (tmp_path / browser.trash_dir / "dead").exists()
+    assert (tmp_path / browser.trash_dir / "unlisted" / "d.png").exists()
+
+
+def test_journals_from_other_hosts_expire(browser, tmp_path):
+    make_files(tmp_path, "x.png")
+    stale = time.time() - load_script("library_browser").JOURNAL_TIMEOUT - 1
+    journal = write_journal(browser, tmp_path, "remote", {"host": socket.gethostname() + "-other", "pid": 1},
+                            stale, [("a.png", "x.png")])
+
+    browser.recover_file_transactions(str(tmp_path))
+    assert not journal.exists()
+    assert sorted(os.listdir(tmp_path)) == ["a.png"]
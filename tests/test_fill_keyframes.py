@@ -0,0 +1,73 @@
+import types
+
+import pytest
+
+from conftest import FakeFCurve, FakeFCurves
+
+
+@pytest.fixture
+def rig(save_anm, monkeypatch):
+    fields = save_anm.ANM_FIELDS
+
+    def curve(bone, path, index, points):
+        return FakeFCurve(fields, save_anm.bone_data_path(bone, path), index, points)
+
+    action = types.SimpleNamespace(fcurves=FakeFCurves(fields, [
+        # hand.L location: X keyed on 1 and 10, Y only on 5, Z has no fcurve at all
+        curve("hand.L", ".location", 0, [(1.0, 0.0), (10.0, 9.0)]),
+        curve("hand.L", ".location", 1, [(5.0, 2.0)]),
+        # spine quaternion: W and Z keyed on 1, X and Y missing on that frame
+        curve("spine", ".rotation_quaternion", 0, [(1.0, 1.0)]),
+        curve("spine", ".rotation_quaternion", 3, [(1.0, 0.0)]),
+        # head scale is complete and must not be touched, even though its frame 30 is unique
+        *(curve("head", ".scale", axis, [(30.0, 1.0)]) for axis in range(3)),
+    ]))
+    bones = {
+        "hand.L": types.SimpleNamespace(location=(0.0, 0.0, 7.0)),
+        "spine": types.SimpleNamespace(rotation_quaternion=(1.0, 0.0, 0.0, 0.0)),
+        "head": types.SimpleNamespace(scale=(1.0, 1.0, 1.0)),
+    }
+    obj = types.SimpleNamespace(type='ARMATURE', mode='POSE', animation_data=types.SimpleNamespace(action=action),
+                                pose=types.SimpleNamespace(bones=bones))
+    scene = types.SimpleNamespace(use_custom_frame_range=False, custom_start_frame=1, custom_end_frame=250)
+    monkeypatch.setattr(save_anm.bpy, "context", types.SimpleNamespace(active_object=obj, scene=scene),
+                        raising=False)
+    return action, scene
+
+
+def keyed(save_anm, action, bone, path, index):
+    data_path = save_anm.bone_data_path(bone, path)
+    for fcurve in action.fcurves:
+        if fcurve.data_path == data_path and fcurve.array_index == index:
+            return fcurve.points()
+    return None
+
+
+def test_fills_each_channel_on_its_own_frames(save_anm, rig):
+    action, _scene = rig
+    save_anm.insert_missing_keyframes()
+
+    # Only the frames keyed on hand.L location itself, never spine's or head's frames
+    assert keyed(save_anm, action, "hand.L", ".location", 0) == [(1.0, 0.0), (5.0, 4.0), (10.0, 9.0)]
+    assert [frame for frame, _v in keyed(save_anm, action, "hand.L", ".location", 1)] == [1.0, 5.0, 10.0]
+    # The axis without an fcurve is created and holds the bone's current value
+    assert keyed(save_anm, action, "hand.L", ".location", 2) == [(1.0, 7.0), (5.0, 7.0), (10.0, 7.0)]
+    # Quaternions are filled too (the baseline counted them but never inserted)
+    for axis in range(4):
+        assert [frame for frame, _v in keyed(save_anm, action, "spine", ".rotation_quaternion", axis)] == [1.0]
+    for axis in range(3):
+        assert keyed(save_anm, action, "head", ".scale", axis) == [(30.0, 1.0)]
+    assert len(action.fcurves) == 10
+
+
+def test_custom_frame_range_limits_the_fill(save_anm, rig):
+    action, scene = rig
+    scene.use_custom_frame_range = True
+    scene.custom_start_frame, scene.custom_end_frame = 4, 20
+    save_anm.insert_missing_keyframes()
+
+    assert keyed(save_anm, action, "hand.L", ".location", 0) == [(1.0, 0.0), (5.0, 4.0), (10.0, 9.0)]
+    assert [frame for frame, _v in keyed(save_anm, action, "hand.L", ".location", 1)] == [5.0, 10.0]
+    assert [frame for frame, _v in keyed(save_anm, action, "hand.L", ".location", 2)] == [5.0, 10.0]
+    # spine is keyed on frame 1 only, outside the range
+    assert keyed(save_anm, action, "spine", ".rotation_quaternion", 1) is None
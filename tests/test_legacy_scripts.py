@@ -0,0 +1,70 @@
+from array import array
+
+# Shape written by the old per-frame exporter (write_bone_keyframe_script)
+LEGACY_CLIP = """import bpy
+import math
+
+scene = bpy.context.scene
+selected_pose_bones = bpy.context.selected_pose_bones
+if not selected_pose_bones:
+    print('Tidak ada tulang yang dipilih.')
+else:
+    armature_obj = selected_pose_bones[0].id_data
+    selected_bones = [bone.name for bone in selected_pose_bones]
+matched_bones = {}
+
+# Frame 1
+frame_current = scene.frame_current
+scene.frame_set(frame_current)
+bpy.ops.anim.keyframe_insert()
+if 'hand.L' in selected_bones:
+    bone = armature_obj.pose.bones['hand.L']
+    bone.location = (0.0, 1.0, 2.0)
+    bone.keyframe_insert(data_path='location')
+    bone["ik_fk"] = float(0.25)
+    bone.keyframe_insert(data_path='["ik_fk"]')
+    bone["label"] = "left"
+    bone.keyframe_insert(data_path='["label"]')
+
+# Frame 5
+frame_target = frame_current + 4
+scene.frame_set(frame_target)
+frame_current = frame_target
+if 'hand.L' in selected_bones:
+    bone = armature_obj.pose.bones['hand.L']
+    bone.location = (0.5, 1.5, 2.5)
+    bone.keyframe_insert(data_path='location')
+if 'spine' in selected_bones:
+    bone = armature_obj.pose.bones['spine']
+    bone.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
+    bone.keyframe_insert(data_path='rotation_quaternion')
+    bone["stretch"] = int(3)
+    bone.keyframe_insert(data_path='["stretch"]')
+"""
+
+
+def test_legacy_clip_script_is_read_as_curves(save_anm, tmp_path):
+    script = tmp_path / "wave.py"
+    script.write_text(LEGACY_CLIP)
+
+    header, curves = save_anm.read_bone_keyframe_script(str(script))
+    assert header["bones"] == ["hand.L", "spine"]
+    assert (header["frame_start"], header["frame_end"]) == (0.0, 4.0)
+
+    by_key = {save_anm.curve_key(curve): curve for curve in curves}
+    assert by_key["hand.L.location[0]"]["co"] == array("f", [0.0, 0.0, 4.0, 0.5])
+    assert by_key["hand.L.location[2]"]["co"] == array("f", [0.0, 2.0, 4.0, 2.5])
+    assert by_key['hand.L["ik_fk"][0]']["co"] == array("f", [0.0, 0.25])
+    assert by_key['spine["stretch"][0]']["co"] == array("f", [4.0, 3.0])
+    assert by_key["spine.rotation_quaternion[0]"]["count"] == 1
+    # Strings cannot be keyed and are skipped
+    assert 'hand.L["label"][0]' not in by_key
+
+
+def test_legacy_clip_script_is_not_executed(save_anm, tmp_path):
+    script = tmp_path / "evil.py"
+    marker = tmp_path / "executed"
+    script.write_text(f"open({str(marker)!r}, 'w').close()\n" + LEGACY_CLIP)
+
+    save_anm.read_bone_keyframe_script(str(script))
+    assert not marker.exists()
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+
+def write_clip(library, name, bones, armature="RIG"):
+    folder = os.path.join(library, "ANIM_DATA")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{name}.json")
+    with open(path, 'w') as file:
+        json.dump({"format": "BINARY", "meta": {"armature": armature, "bones": bones}, "curves": {}}, file)
+    return path
+
+
+def write_pose(library, name, bones):
+    folder = os.path.join(library, "data_pose")
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f"{name}.json"), 'w') as file:
+        json.dump({"armature": "RIG", "bones": bones}, file)
+
+
+@pytest.fixture
+def library(library_catalog, tmp_path):
+    library = str(tmp_path)
+    write_clip(library, "exact", ["hand.L", "hand.R"])
+    write_clip(library, "wider", ["hand.L", "hand.R", "arm.L", "arm.R"])
+    write_clip(library, "arms", ["hand.L", "arm.L", "forearm.L"])
+    write_clip(library, "legs", ["foot.L", "foot.R"])
+    write_pose(library, "fist", ["hand.L", "hand.R"])
+    assert library_catalog.update_catalog(library) == {"entries": 5, "changed": 5, "removed": 0}
+    return library
+
+
+def names(rows):
+    return [row[0] for row in rows]
+
+
+def test_selected_mode_ranks_by_jaccard(library_catalog, library):
+    rows = library_catalog.query_catalog(library, ["hand.L", "hand.R"], "clip", 'SELECTED')
+    # exact 2/2, wider 2/4, arms 1/4; legs shares no bone and the pose is another kind
+    assert names(rows) == ["exact", "wider", "arms"]
+    assert rows[0] == ("exact", "RIG", 2, 2)
+    assert names(library_catalog.query_catalog(library, ["hand.L", "hand.R"], "pose", 'SELECTED')) == ["fist"]
+    assert library_catalog.query_catalog(library, [], "clip", 'SELECTED') == []
+
+
+def test_armature_mode_ranks_by_coverage(library_catalog, library):
+    armature = ["hand.L", "hand.R", "arm.L", "forearm.L"]
+    rows = library_catalog.query_catalog(library, armature, "clip", 'ARMATURE')
+    # exact and arms apply fully (ties broken by hits), wider has 3 of its 4 bones
+    assert names(rows) == ["arms", "exact", "wider"]
+    assert [(hits, count) for _name, _armature, hits, count in rows] == [(3, 3), (2, 2), (3, 4)]
+
+
+def test_update_rereads_only_changed_entries(library_catalog, library):
+    assert library_catalog.update_catalog(library) == {"entries": 5, "changed": 0, "removed": 0}
+
+    path = write_clip(library, "legs", ["hand.L", "hand.R", "foot.L"])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))  # Coarse mtime filesystems
+    assert library_catalog.update_catalog(library) == {"entries": 5, "changed": 1, "removed": 0}
+    rows = library_catalog.query_catalog(library, ["foot.L", "hand.L"], "clip", 'SELECTED')
+    assert rows[0] == ("legs", "RIG", 2, 3)
+
+
+def test_update_drops_deleted_entries(library_catalog, library):
+    os.remove(os.path.join(library, "ANIM_DATA", "exact.json"))
+    assert library_catalog.update_catalog(library) == {"entries": 4, "changed": 0, "removed": 1}
+    assert names(library_catalog.query_catalog(library, ["hand.L", "hand.R"], "clip", 'SELECTED')) == ["wider", "arms"]
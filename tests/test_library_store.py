@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+from conftest import load_script
+
+
+def make_library(root, files):
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+    return str(root)
+
+
+LIBRARY = {
+    "wave.png": b"png-1",
+    "wave_copy.png": b"png-1",
+    "ANIM_DATA/wave.anm": b"clip-1" * 100,
+    "ANIM_DATA/wave_copy.anm": b"clip-1" * 100,
+    "ANIM_DATA/wave.json": json.dumps({"meta": {"hash": "curves-a"}}).encode(),
+    "ANIM_DATA/wave_copy.json": json.dumps({"meta": {"hash": "curves-a"}}).encode(),
+    "ANIM_DATA/wave_fps.anm": b"clip-2" * 100,
+    "ANIM_DATA/wave_fps.json": json.dumps({"meta": {"hash": "curves-a"}}).encode(),
+    "data_pose/fist.pose": b"pose-1",
+    "Preview/wave.mp4": b"video-1",
+}
+
+
+def test_report_finds_duplicates_without_changing_files(library_store, tmp_path):
+    library = make_library(tmp_path, LIBRARY)
+    report = library_store.dedupe_report(library)
+
+    assert report["files"] == 7  # Sidecar .json files are not stored
+    assert report["duplicate_groups"] == 2
+    assert sorted(group["paths"][0] for group in report["duplicates"]) == [
+        os.path.join("ANIM_DATA", "wave.anm"), "wave.png"]
+    assert report["reclaimable_bytes"] == len(b"clip-1" * 100) + len(b"png-1")
+    assert report["logical_bytes"] == report["physical_bytes"]
+    # Same curves (metadata hash) in different files, e.g. another fps
+    assert report["same_data_groups"] == [
+        {"kind": "clip", "data_hash": "curves-a", "entries": ["wave", "wave_copy", "wave_fps"]}]
+    assert not os.path.exists(os.path.join(library, library_store.STORE_DIR))
+
+
+def test_store_links_duplicates_and_gc_keeps_live_blobs(library_store, tmp_path):
+    library = make_library(tmp_path, LIBRARY)
+    result = library_store.store_library(library)
+    assert result == {"files": 7, "new_blobs": 5, "linked": 2, "saved_bytes": len(b"clip-1" * 100) + len(b"png-1"),
+                      "unsupported": 0}
+    assert os.path.samefile(os.path.join(library, "wave.png"), os.path.join(library, "wave_copy.png"))
+
+    report = library_store.dedupe_report(library)
+    assert report["reclaimable_bytes"] == 0
+    assert report["physical_bytes"] == report["logical_bytes"] - result["saved_bytes"]
+    assert library_store.gc_store(library)["removed_blobs"] == 0
+
+    # Deleting both entries of a content leaves its blob unused
+    os.remove(os.path.join(library, "wave.png"))
+    os.remove(os.path.join(library, "wave_copy.png"))
+    freed = library_store.gc_store(library)
+    assert (freed["removed_blobs"], freed["freed_bytes"], freed["dropped_refs"]) == (1, len(b"png-1"), 2)
+    assert library_store.gc_store(library)["removed_blobs"] == 0
+
+
+def test_checkout_restores_entries_from_the_store(library_store, tmp_path):
+    library = make_library(tmp_path, LIBRARY)
+    library_store.store_library(library)
+    os.remove(os.path.join(library, "data_pose", "fist.pose"))
+    os.remove(os.path.join(library, "ANIM_DATA", "wave_copy.anm"))
+
+    assert library_store.checkout_library(library) == {"restored": 2, "missing_blobs": 0}
+    with open(os.path.join(library, "data_pose", "fist.pose"), 'rb') as file:
+        assert file.read() == b"pose-1"
+
+
+# A rename onto another entry that is hardlinked to the same blob must not look like a no-op rename
+@pytest.mark.parametrize("browser_name", ["import_anm", "library_pose"])
+def test_rename_onto_a_linked_duplicate_is_rejected(library_store, tmp_path, browser_name):
+    library = make_library(tmp_path, LIBRARY)
+    library_store.store_library(library)
+    browser = load_script(browser_name).browser
+    moves = [(os.path.join(library, "wave.png"), os.path.join(library, "wave_copy.png"))]
+
+    assert "already exists" in browser.run_file_transaction(library, moves)
+    assert os.path.exists(os.path.join(library, "wave.png"))
+
+
+def run_job(library_store, library, action):
+    assert library_store.start_store_job(library, action)
+    library_store._jobs[library].join()
+    return library_store._results[library]
+
+
+def test_checkout_runs_as_a_store_job(library_store, tmp_path):
+    library = make_library(tmp_path, LIBRARY)
+    library_store.store_library(library)
+    os.remove(os.path.join(library, "wave_copy.png"))
+
+    assert run_job(library_store, library, 'CHECKOUT') == "1 files restored, 0 missing blobs"
+    assert os.path.samefile(os.path.join(library, "wave.png"), os.path.join(library, "wave_copy.png"))
+
+
+# Any error in the worker ends up in the panel result instead of killing the thread
+def test_job_reports_unexpected_errors(library_store, tmp_path, monkeypatch):
+    library = make_library(tmp_path, LIBRARY)
+
+    def broken(library):
+        raise ValueError("corrupt refs")
+
+    monkeypatch.setitem(library_store.STORE_ACTIONS, 'REPORT', broken)
+    assert run_job(library_store, library, 'REPORT') == "Failed: corrupt refs"
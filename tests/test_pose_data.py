@@ -0,0 +1,233 @@
+import json
+import math
+import struct
+from array import array
+
+import pytest
+
+from conftest import fake_pose_armature
+
+
+def legacy_pose_script(bone_data):
+    # Shape written by the old pose exporter: the pose is a dict literal inside a function
+    return f"""
+import bpy
+import json
+
+def apply_bone_pose():
+    obj = bpy.context.object
+    registered_bones = {json.dumps(list(bone_data), indent=4)}
+    bone_data = {json.dumps(bone_data, indent=4)}
+    for bone_name, data in bone_data.items():
+        obj.pose.bones[bone_name].location = data["location"]
+
+apply_bone_pose()
+"""
+
+
+def test_pose_data_round_trip(library_pose, tmp_path):
+    bones = ["hand.L", "spine"]
+    channels = {name: array("f", [float(i) for i in range(width * len(bones))])
+                for name, width in library_pose.POSE_CHANNELS}
+    filepath = str(tmp_path / f"wave{library_pose.POSE_EXT}")
+    library_pose.write_pose_data(filepath, bones, channels, {"spine": {"stretch": 0.5}})
+
+    header, read = library_pose.read_pose_data(filepath)
+    assert header["bones"] == bones
+    assert header["custom_properties"] == {"spine": {"stretch": 0.5}}
+    assert read == channels
+    assert library_pose.read_pose_header(filepath)["bones"] == bones
+
+
+def test_pose_data_rejects_clips(library_pose, tmp_path):
+    filepath = tmp_path / "clip.pose"
+    filepath.write_bytes(struct.pack("<4sHI", b"RRAN", 2, 2) + b"{}")
+    with pytest.raises(ValueError):
+        library_pose.read_pose_data(str(filepath))
+
+
+def test_legacy_pose_script_is_read_as_data(library_pose, tmp_path):
+    bone_data = {
+        "hand.L": {"location": [1, 2, 3], "rotation_quaternion": [1, 0, 0, 0],
+                   "rotation_euler": [0, 0.5, 0], "scale": [1, 1, 1], "custom_properties": {"ik_fk": 1.0}},
+        "spine": {"location": [0, 0, 0], "rotation_quaternion": [0.5, 0.5, 0.5, 0.5],
+                  "rotation_euler": [0, 0, 0], "scale": [2, 2, 2], "is_on": True},
+    }
+    script = tmp_path / "wave.py"
+    marker = tmp_path / "executed"
+    script.write_text(f"open({str(marker)!r}, 'w').close()\n" + legacy_pose_script(bone_data)
+                      .replace("true", "True").replace("false", "False"))
+
+    header, channels = library_pose.read_pose_script(str(script))
+    assert not marker.exists()
+    assert header["bones"] == ["hand.L", "spine"]
+    assert header["custom_properties"] == {"hand.L": {"ik_fk": 1.0}}
+    assert channels["location"] == array("f", [1, 2, 3, 0, 0, 0])
+    assert channels["rotation_quaternion"] == array("f", [1, 0, 0, 0, 0.5, 0.5, 0.5, 0.5])
+    assert channels["scale"] == array("f", [1, 1, 1, 2, 2, 2])
+
+
+def quaternion_matrix(w, x, y, z):
+    return [[1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)],
+            [2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)],
+            [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)]]
+
+
+def euler_matrix(x, y, z):
+    # XYZ order: R = Rz * Ry * Rx
+    cx, sx, cy, sy, cz, sz = math.cos(x), math.sin(x), math.cos(y), math.sin(y), math.cos(z), math.sin(z)
+    return [[cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz],
+            [cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz],
+            [-sy, sx * cy, cx * cy]]
+
+
+def axis_angle_matrix(angle, x, y, z):
+    norm = math.sqrt(x * x + y * y + z * z)
+    s = math.sin(angle / 2) / norm
+    return quaternion_matrix(math.cos(angle / 2), x * s, y * s, z * s)
+
+
+def mirrored(matrix):
+    # Mirror across the YZ plane: M * R * M with M = diag(-1, 1, 1)
+    sign = (-1, 1, 1)
+    return [[sign[r] * matrix[r][c] * sign[c] for c in range(3)] for r in range(3)]
+
+
+def signed(values, signs):
+    return [v * s for v, s in zip(values, signs)]
+
+
+# Each sign rule must be the X mirror of the rotation it is applied to, like pose.paste(flipped=True)
+@pytest.mark.parametrize("channel, to_matrix, values", [
+    ("rotation_quaternion", quaternion_matrix, (0.8, 0.2, -0.4, 0.4)),
+    ("rotation_euler", euler_matrix, (0.3, -0.7, 1.1)),
+    ("rotation_axis_angle", axis_angle_matrix, (0.9, 0.3, 0.5, -0.8)),
+])
+def test_mirror_signs_mirror_the_rotation(library_pose, channel, to_matrix, values):
+    if channel == "rotation_quaternion":
+        norm = math.sqrt(sum(v * v for v in values))
+        values = [v / norm for v in values]
+    expected = mirrored(to_matrix(*values))
+    result = to_matrix(*signed(values, library_pose.MIRROR_SIGNS[channel]))
+    for row, expected_row in zip(result, expected):
+        assert row == pytest.approx(expected_row)
+
+
+def test_mirror_signs_mirror_location_and_keep_scale(library_pose):
+    assert signed((1.0, 2.0, 3.0), library_pose.MIRROR_SIGNS["location"]) == [-1.0, 2.0, 3.0]
+    assert signed((1.0, 2.0, 3.0), library_pose.MIRROR_SIGNS["scale"]) == [1.0, 2.0, 3.0]
+
+
+def test_mirror_table_pairs_bones_by_name(library_pose):
+    obj = fake_pose_armature(["spine", "hand.L", "hand.R", "foot.L"], library_pose.FLIP_CHANNELS)
+    table = library_pose.mirror_table(obj)
+
+    assert list(table["mirror"]) == [0, 2, 1, 3]  # Centre and unpaired bones map to themselves
+    # Element k of bone i is read from element k of its mirror bone
+    assert list(table["perm"]["location"]) == [0, 1, 2, 6, 7, 8, 3, 4, 5, 9, 10, 11]
+    assert list(table["perm"]["rotation_axis_angle"][4:8]) == [8, 9, 10, 11]
+    assert list(table["signs"]["rotation_euler"]) == list(library_pose.MIRROR_SIGNS["rotation_euler"]) * 4
+    assert library_pose.mirror_table(obj) is table
+
+
+def test_mirror_table_is_rebuilt_after_reset_or_bone_changes(library_pose):
+    obj = fake_pose_armature(["hand.L", "hand.R"], library_pose.FLIP_CHANNELS)
+    table = library_pose.mirror_table(obj)
+    library_pose.pose_cache_reset()
+    assert library_pose.mirror_table(obj) is not table
+
+    renamed = fake_pose_armature(["hand.L", "hand.R", "head"], library_pose.FLIP_CHANNELS)
+    assert list(library_pose.mirror_table(renamed)["mirror"]) == [1, 0, 2]
+    handlers = library_pose.bpy.app.handlers
+    registered = [handler_list for handler_list, _handler in library_pose.pose_cache_handlers()]
+    assert any(h is handlers.load_post for h in registered) and any(h is handlers.undo_post for h in registered)
+
+
+def test_flip_writes_every_rotation_mode_to_the_other_side(library_pose):
+    obj = fake_pose_armature(["spine", "hand.L", "hand.R"], library_pose.FLIP_CHANNELS)
+    bones = obj.pose.bones
+    bones.set("hand.L", "location", (1.0, 2.0, 3.0))
+    bones.set("hand.L", "rotation_quaternion", (0.8, 0.2, -0.4, 0.4))
+    bones.set("hand.L", "rotation_euler", (0.5, 0.25, -0.75))
+    bones.set("hand.L", "rotation_axis_angle", (1.5, 0.0, 1.0, 0.0))
+    bones.set("hand.L", "scale", (1.0, 2.0, 1.0))
+    bones["hand.L"]["ik_fk"] = 0.5
+
+    assert library_pose.flip_pose_bones(obj, ["hand.L"]) == 1
+    assert bones.get("hand.R", "location") == [-1.0, 2.0, 3.0]
+    assert bones.get("hand.R", "rotation_quaternion") == pytest.approx([0.8, 0.2, 0.4, -0.4])
+    assert bones.get("hand.R", "rotation_euler") == [0.5, -0.25, 0.75]
+    assert bones.get("hand.R", "rotation_axis_angle") == [1.5, 0.0, -1.0, 0.0]
+    assert bones.get("hand.R", "scale") == [1.0, 2.0, 1.0]
+    assert bones["hand.R"]["ik_fk"] == 0.5
+    # The source side and the centre bone are untouched
+    assert bones.get("hand.L", "location") == [1.0, 2.0, 3.0]
+    assert bones.get("spine", "location") == [0.0, 0.0, 0.0]
+
+
+def test_flipping_both_sides_swaps_them(library_pose):
+    obj = fake_pose_armature(["hand.L", "hand.R"], library_pose.FLIP_CHANNELS)
+    bones = obj.pose.bones
+    bones.set("hand.L", "rotation_axis_angle", (1.0, 0.0, 1.0, 0.0))
+    bones.set("hand.R", "rotation_axis_angle", (2.0, 1.0, 0.0, 0.0))
+
+    assert library_pose.flip_pose_bones(obj, ["hand.L", "hand.R"]) == 2
+    assert bones.get("hand.L", "rotation_axis_angle") == [2.0, 1.0, -0.0, -0.0]
+    assert bones.get("hand.R", "rotation_axis_angle") == [1.0, 0.0, -1.0, -0.0]
+
+
+@pytest.fixture
+def blend_rig(library_pose):
+    obj = fake_pose_armature(["spine", "hand.L"], library_pose.POSE_CHANNELS)
+    bones = obj.pose.bones
+    bones.set("hand.L", "location", (0.0, 0.0, 0.0))
+    bones.set("hand.L", "rotation_quaternion", (1.0, 0.0, 0.0, 0.0))
+    bones.set("hand.L", "rotation_euler", (0.0, 0.0, 0.0))
+    bones.set("hand.L", "scale", (1.0, 1.0, 1.0))
+    bones["hand.L"]["ik_fk"] = 0.0
+
+    # Pose library entry: hand.L turned 90 degrees around X, stored with the opposite quaternion sign
+    half = math.sqrt(0.5)
+    header = {"bones": ["hand.L"], "custom_properties": {"hand.L": {"ik_fk": 1.0}}}
+    channels = {"location": array("f", [2.0, 4.0, -6.0]), "rotation_quaternion": array("f", [-half, -half, 0.0, 0.0]),
+                "rotation_euler": array("f", [1.0, 0.0, -1.0]), "scale": array("f", [3.0, 1.0, 1.0])}
+    blend = library_pose.prepare_pose_blend(obj, header, channels, ["hand.L", "spine"])
+    return obj, blend
+
+
+@pytest.mark.parametrize("factor, location, euler, scale, ik_fk", [
+    (0.0, [0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [1.0, 1.0, 1.0], 0.0),
+    (0.5, [1.0, 2.0, -3.0], [0.5, 0.0, -0.5], [2.0, 1.0, 1.0], 0.5),
+    (1.0, [2.0, 4.0, -6.0], [1.0, 0.0, -1.0], [3.0, 1.0, 1.0], 1.0),
+])
+def test_blend_interpolates_towards_the_pose(library_pose, blend_rig, factor, location, euler, scale, ik_fk):
+    obj, blend = blend_rig
+    library_pose.apply_pose_blend(obj, blend, factor)
+    bones = obj.pose.bones
+
+    assert bones.get("hand.L", "location") == pytest.approx(location)
+    assert bones.get("hand.L", "rotation_euler") == pytest.approx(euler)
+    assert bones.get("hand.L", "scale") == pytest.approx(scale)
+    assert bones["hand.L"]["ik_fk"] == pytest.approx(ik_fk)
+    # Bones without data in the entry keep their pose
+    assert bones.get("spine", "location") == [0.0, 0.0, 0.0]
+
+
+# The stored quaternion is the negated one: slerp must take the short way (to +90, not -270 degrees)
+@pytest.mark.parametrize("factor, angle", [(0.0, 0.0), (0.5, math.pi / 4), (1.0, math.pi / 2)])
+def test_blend_takes_the_shortest_quaternion_path(library_pose, blend_rig, factor, angle):
+    obj, blend = blend_rig
+    library_pose.apply_pose_blend(obj, blend, factor)
+
+    expected = [math.cos(angle / 2), math.sin(angle / 2), 0.0, 0.0]
+    assert obj.pose.bones.get("hand.L", "rotation_quaternion") == pytest.approx(expected, abs=1e-6)
+
+
+def test_restore_undoes_the_blend(library_pose, blend_rig):
+    obj, blend = blend_rig
+    library_pose.apply_pose_blend(obj, blend, 0.5)
+    library_pose.restore_pose_blend(obj, blend)
+
+    assert obj.pose.bones.get("hand.L", "rotation_quaternion") == [1.0, 0.0, 0.0, 0.0]
+    assert obj.pose.bones.get("hand.L", "location") == [0.0, 0.0, 0.0]
+    assert obj.pose.bones["hand.L"]["ik_fk"] == 0.0